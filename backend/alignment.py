@@ -0,0 +1,81 @@
+"""
+Aligns timed sentences with pyannote speaker turns and aggregates per speaker.
+Speaker assignment is a sorted sweep that keeps the turns in progress in a
+heap, so cost grows linearly with the number of sentences and turns (times
+the few turns overlapping any one sentence). Sentence timing comes from segmenter.py.
+"""
+import heapq
+
+
+def assign_speakers(intervals, turns):
+    """
+    Picks the speaker whose turns overlap each (start, end) interval the most.
+    Intervals must be in time order; turns are sorted here by start time.
+    Returns one speaker label (or None) per interval.
+    """
+    turns = sorted(turns, key=lambda turn: turn["start"])
+    speakers = []
+    # Turns that have started, keyed on end time, so a long turn does not hold back the others
+    active = []
+    upcoming = 0
+    for start, end in intervals:
+        if start is None:
+            speakers.append(None)
+            continue
+
+        while upcoming < len(turns) and turns[upcoming]["start"] < end:
+            heapq.heappush(active, (turns[upcoming]["end"], upcoming))
+            upcoming += 1
+        # Turns that ended before this interval can never overlap a later one
+        while active and active[0][0] <= start:
+            heapq.heappop(active)
+
+        overlap_by_speaker = {}
+        # In start order, so ties go to the same speaker as a plain scan of the sorted turns
+        for index in sorted(index for _, index in active):
+            turn = turns[index]
+            overlap = min(end, turn["end"]) - max(start, turn["start"])
+            if overlap > 0:
+                overlap_by_speaker[turn["speaker"]] = overlap_by_speaker.get(turn["speaker"], 0.0) + overlap
+
+        speakers.append(max(overlap_by_speaker, key=overlap_by_speaker.get) if overlap_by_speaker else None)
+    return speakers
+
+
+def speaker_summary(analysis, turns):
+    """Aggregates talk time, sentiment and profanity per speaker."""
+    summary = {}
+
+    def stats_for(speaker):
+        if speaker not in summary:
+            summary[speaker] = {
+                "talk_time": 0.0,
+                "sentences": 0,
+                "average_sentiment": 0.0,
+                "negative_sentences": 0,
+                "profane_sentences": 0,
+                "mildly_profane_sentences": 0,
+            }
+        return summary[speaker]
+
+    for turn in turns:
+        stats_for(turn["speaker"])["talk_time"] += turn["end"] - turn["start"]
+
+    for item in analysis:
+        stats = stats_for(item.get("speaker"))
+        compound = item["sentiment"]["compound"]
+        stats["sentences"] += 1
+        stats["average_sentiment"] += compound
+        if compound < 0:
+            stats["negative_sentences"] += 1
+        if item["profanity"] == "Profane":
+            stats["profane_sentences"] += 1
+        elif item["profanity"] == "Mildly Profane":
+            stats["mildly_profane_sentences"] += 1
+
+    for stats in summary.values():
+        if stats["sentences"]:
+            stats["average_sentiment"] /= stats["sentences"]
+
+    # JSON object keys must be strings; unattributed sentences go under "unknown"
+    return {("unknown" if speaker is None else speaker): stats for speaker, stats in summary.items()}
@@ -1,34 +1,167 @@
-import torch
-import whisper
+import time
+import queue
+import threading
+import contextvars
+import numpy as np
 import librosa
 import soundfile as sf
-from pyannote.audio.pipelines import SpeakerDiarization
-from pyannote.audio import Model
-from huggingface_hub import login
 import os
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from model_registry import registry
+from metrics import metrics
+from vad import energy_speech_regions, merge_close_regions, batch_regions, batch_audio, to_original_time, speech_seconds
 load_dotenv()
-# Authenticate with Hugging Face
+
+# Hugging Face token; only needed to download gated pyannote weights that are not cached yet
 HF_AUTH_TOKEN = os.getenv("HF_AUTH_TOKEN")
-if HF_AUTH_TOKEN:
-    login(HF_AUTH_TOKEN)
-else:
-    raise ValueError("Hugging Face authentication token not found!")
 
-# Load Whisper Model for Transcription
-whisper_model = whisper.load_model("medium")
+# Model configuration. Names may be hub IDs / Whisper sizes or paths to local files.
+WHISPER_MODEL_NAME = os.getenv("WHISPER_MODEL", "medium")
+WHISPER_FAST_MODEL_NAME = os.getenv("WHISPER_FAST_MODEL", "base")
+WHISPER_DEVICE = os.getenv("WHISPER_DEVICE")  # e.g. "cpu" or "cuda"; Whisper picks when unset
+WHISPER_DOWNLOAD_ROOT = os.getenv("WHISPER_DOWNLOAD_ROOT")
+SEGMENTATION_MODEL_ID = os.getenv("PYANNOTE_SEGMENTATION_MODEL", "pyannote/segmentation-3.0")
+DIARIZATION_MODEL_ID = os.getenv("PYANNOTE_DIARIZATION_MODEL", "pyannote/speaker-diarization-3.1")
+PYANNOTE_DEVICE = os.getenv("PYANNOTE_DEVICE")
+
+# "single" transcribes with WHISPER_MODEL; "tiered" transcribes with WHISPER_FAST_MODEL and
+# re-runs doubtful segments with WHISPER_MODEL (see tiered_transcription.py)
+TRANSCRIBE_MODE = os.getenv("ECHO_TRANSCRIBE_MODE", "single").lower()
+
+def _load_whisper(name=WHISPER_MODEL_NAME):
+    import whisper
+    return whisper.load_model(name, device=WHISPER_DEVICE, download_root=WHISPER_DOWNLOAD_ROOT)
+
+def _load_fast_whisper():
+    return _load_whisper(WHISPER_FAST_MODEL_NAME)
+
+def _load_segmentation():
+    from pyannote.audio import Model
+    segmentation = Model.from_pretrained(SEGMENTATION_MODEL_ID, use_auth_token=HF_AUTH_TOKEN)
+    if segmentation is None:
+        raise ValueError(f"Could not load {SEGMENTATION_MODEL_ID}; set HF_AUTH_TOKEN or use a local checkpoint")
+    return segmentation
+
+def _load_diarization():
+    import torch
+    from pyannote.audio.pipelines import SpeakerDiarization
+    diarization = SpeakerDiarization.from_pretrained(DIARIZATION_MODEL_ID, use_auth_token=HF_AUTH_TOKEN)
+    if diarization is None:
+        raise ValueError(f"Could not load {DIARIZATION_MODEL_ID}; set HF_AUTH_TOKEN or use a local config")
+    if PYANNOTE_DEVICE:
+        diarization.to(torch.device(PYANNOTE_DEVICE))
+    return diarization
+
+# Models load lazily on first use (or when the server warms them in the background)
+registry.register("whisper", _load_whisper)
+if TRANSCRIBE_MODE == "tiered":
+    registry.register("whisper_fast", _load_fast_whisper)  # only warmed when it will be used
+registry.register("segmentation", _load_segmentation)
+registry.register("diarization", _load_diarization)
+
+def get_whisper_model():
+    return registry.get("whisper")
+
+def get_segmentation_model():
+    return registry.get("segmentation")
 
-# Load PyAnnote Pretrained Models
-model = Model.from_pretrained("pyannote/segmentation-3.0", use_auth_token=HF_AUTH_TOKEN)
-pipeline = SpeakerDiarization.from_pretrained("pyannote/speaker-diarization-3.1", use_auth_token=HF_AUTH_TOKEN)
+def get_diarization_pipeline():
+    return registry.get("diarization")
 
-def separate_speakers(audio_path):
+# Whisper and pyannote both expect 16 kHz mono input
+SAMPLE_RATE = 16000
+
+# Silence skipping before Whisper: "energy" (fast, NumPy only), "pyannote" (reuses the
+# segmentation model, also skips music and noise) or "off" to transcribe everything
+VAD_MODE = os.getenv("ECHO_VAD", "energy").lower()
+VAD_MAX_BATCH_SECONDS = float(os.getenv("ECHO_VAD_MAX_BATCH_SECONDS", 30))
+
+# Diarization of long recordings: "auto" switches to windows past one window's length,
+# "windowed" always uses them and "full" sends the whole recording to pyannote at once
+DIARIZATION_MODE = os.getenv("ECHO_DIARIZATION_MODE", "auto").lower()
+DIARIZATION_WINDOW_SECONDS = float(os.getenv("ECHO_DIARIZATION_WINDOW_SECONDS", 300))
+DIARIZATION_OVERLAP_SECONDS = float(os.getenv("ECHO_DIARIZATION_OVERLAP_SECONDS", 30))
+# Cosine similarity above which speakers from different windows are treated as the same person
+SPEAKER_LINK_THRESHOLD = float(os.getenv("ECHO_SPEAKER_LINK_THRESHOLD", 0.5))
+
+# Streaming transcription windows; consecutive windows overlap by WINDOW - STRIDE seconds
+STREAM_WINDOW_SECONDS = 30.0
+STREAM_STRIDE_SECONDS = 25.0
+
+def load_waveform(audio_path):
+    """
+    Decodes an audio file once into a 16 kHz mono float32 waveform
+    that can be shared by diarization and transcription.
+    Waveforms already decoded to .npy by ingestion.py are memory-mapped, not decoded.
+    """
+    if str(audio_path).endswith(".npy"):
+        return np.load(audio_path, mmap_mode="r")
+    with metrics.stage("decode"):
+        waveform, _ = librosa.load(audio_path, sr=SAMPLE_RATE, mono=True)
+    return waveform.astype(np.float32, copy=False)
+
+def _pyannote_input(audio):
+    """Wraps an in-memory waveform in the dict pyannote expects; paths pass through."""
+    if isinstance(audio, np.ndarray):
+        import torch
+        # Memory-mapped waveforms are read-only; torch needs a writable buffer
+        waveform = torch.from_numpy(np.array(audio, dtype=np.float32, copy=not audio.flags.writeable))
+        return {"uri": "waveform", "waveform": waveform.unsqueeze(0), "sample_rate": SAMPLE_RATE}
+    if str(audio).endswith(".npy"):
+        return _pyannote_input(load_waveform(audio))
+    return {"uri": "file", "audio": audio}
+
+def audio_duration(audio):
+    """Length in seconds of a waveform or file, without decoding it where possible."""
+    if isinstance(audio, np.ndarray):
+        return len(audio) / SAMPLE_RATE
+    if str(audio).endswith(".npy"):
+        return len(load_waveform(audio)) / SAMPLE_RATE
+    try:
+        return sf.info(audio).duration
+    except Exception:
+        return librosa.get_duration(path=audio)
+
+def use_windowed_diarization(audio):
+    if DIARIZATION_MODE == "windowed":
+        return True
+    if DIARIZATION_MODE == "auto":
+        try:
+            return audio_duration(audio) > DIARIZATION_WINDOW_SECONDS
+        except Exception:
+            return False
+    return False
+
+def stream_speakers(audio):
+    """
+    Yields speaker turns as they become known: window by window for long
+    recordings (see windowed_diarization.py), all at once otherwise.
+    """
+    if use_windowed_diarization(audio):
+        from windowed_diarization import stream_diarization
+        with metrics.stage("diarize"):
+            yield from stream_diarization(audio)
+    else:
+        yield from separate_speakers(audio, windowed=False)
+
+def separate_speakers(audio, windowed=None):
     """
     Performs speaker diarization to identify and separate speakers in an audio file.
+    Accepts a file path or a 16 kHz mono waveform from load_waveform.
+    Long recordings are diarized in windows (see DIARIZATION_MODE) to bound memory;
+    windowed=True or False forces one path regardless of the mode.
     Returns a list of speaker segments with start time, end time, and speaker label.
     """
     try:
-        diarization = pipeline({"uri": "file", "audio": audio_path})
+        if windowed is None:
+            windowed = use_windowed_diarization(audio)
+        if windowed:
+            from windowed_diarization import stream_diarization
+            with metrics.stage("diarize"):
+                return list(stream_diarization(audio))
+        with metrics.stage("diarize"):
+            diarization = get_diarization_pipeline()(_pyannote_input(audio))
         speaker_segments = [
             {"start": turn.start, "end": turn.end, "speaker": speaker}
             for turn, _, speaker in diarization.itertracks(yield_label=True)
@@ -38,26 +171,246 @@ def separate_speakers(audio_path):
         print(f"Error during speaker diarization: {e}")
         return []
 
-def transcribe_audio(audio_path):
+def transcribe_audio(audio):
     """
     Transcribes audio using OpenAI's Whisper model.
+    Accepts a file path or a 16 kHz mono waveform from load_waveform.
     Returns the full transcript text.
     """
+    return " ".join(segment["text"] for segment in transcribe_segments(audio))
+
+def detect_speech(waveform, vad=None):
+    """
+    Returns the (start, end) seconds of speech in a 16 kHz mono waveform,
+    using the VAD named by `vad` (defaults to VAD_MODE).
+    """
+    vad = vad or VAD_MODE
+    with metrics.stage("vad"):
+        if vad == "pyannote":
+            from pyannote.audio.pipelines import VoiceActivityDetection
+            pipeline = VoiceActivityDetection(segmentation=get_segmentation_model())
+            pipeline.instantiate({"min_duration_on": 0.25, "min_duration_off": 0.5})
+            speech = pipeline(_pyannote_input(waveform)).get_timeline().support()
+            return merge_close_regions([(segment.start, segment.end) for segment in speech], 0.0)
+        return energy_speech_regions(waveform, SAMPLE_RATE)
+
+def transcribe_segments(audio, vad=None):
+    """
+    Transcribes audio with Whisper and keeps its segment timestamps.
+    Unless VAD is off, only detected speech is transcribed; timestamps stay
+    relative to the original audio.
+    Returns a list of dicts with start, end (seconds) and stripped text.
+    """
+    vad = vad or VAD_MODE
+    if vad == "off":
+        if isinstance(audio, str) and audio.endswith(".npy"):
+            audio = load_waveform(audio)
+        return _whisper_segments(audio)
+
+    waveform = audio if isinstance(audio, np.ndarray) else load_waveform(audio)
+    try:
+        regions = detect_speech(waveform, vad)
+    except Exception as e:
+        print(f"Error during voice activity detection, transcribing everything: {e}")
+        return _whisper_segments(np.asarray(waveform, dtype=np.float32))
+
+    duration = len(waveform) / SAMPLE_RATE
+    print(f"🔇 VAD ({vad}): {speech_seconds(regions):.1f}s of speech in {duration:.1f}s of audio")
+
+    segments = []
+    prompt = None
+    for batch in batch_regions(regions, VAD_MAX_BATCH_SECONDS):
+        for segment in _whisper_segments(batch_audio(waveform, batch, SAMPLE_RATE), prompt):
+            segment["start"] = to_original_time(segment["start"], batch, is_start=True)
+            segment["end"] = to_original_time(segment["end"], batch)
+            segments.append(segment)
+            prompt = segment["text"]
+    return segments
+
+def _whisper_segments(audio, prompt=None):
+    if TRANSCRIBE_MODE == "tiered":
+        from tiered_transcription import tiered_segments
+        return tiered_segments(audio, prompt)
     try:
-        result = whisper_model.transcribe(audio_path, language="en")  # Force English
-        return result["text"]
+        with metrics.stage("transcribe"):
+            result = get_whisper_model().transcribe(audio, language="en", initial_prompt=prompt)  # Force English
+        return [
+            {"start": segment["start"], "end": segment["end"], "text": segment["text"].strip()}
+            for segment in result["segments"]
+            if segment["text"].strip()
+        ]
     except Exception as e:
         print(f"Error during transcription: {e}")
-        return ""
+        return []
 
-def process_audio(audio_path):
+def _timed(func, audio, timings, stage):
+    start = time.perf_counter()
+    try:
+        return func(audio)
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+def process_audio(audio_path, timings=None):
     """
     Handles speaker separation and transcription.
+    The file is decoded once and both stages run concurrently on the shared waveform.
+    Pass a dict as timings to receive per-stage wall-clock seconds.
     Returns:
         - Speaker segments (start, end, speaker ID)
         - Transcribed text
     """
-    speakers = separate_speakers(audio_path)
-    transcript = transcribe_audio(audio_path)
-    
-    return speakers, transcript
+    speakers, segments = process_audio_segments(audio_path, timings)
+    return speakers, " ".join(segment["text"] for segment in segments)
+
+def process_audio_segments(audio_path, timings=None):
+    """
+    Same as process_audio, but returns Whisper segments with timestamps
+    instead of the joined transcript text.
+    """
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+
+    waveform = _timed(load_waveform, audio_path, timings, "decode")
+
+    # torch releases the GIL during inference, so threads give real overlap here.
+    # Each thread runs in a copy of this context so an active metrics trace sees its stages.
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        speakers_future = executor.submit(
+            contextvars.copy_context().run, _timed, separate_speakers, waveform, timings, "diarize"
+        )
+        segments_future = executor.submit(
+            contextvars.copy_context().run, _timed, transcribe_segments, waveform, timings, "transcribe"
+        )
+        speakers = speakers_future.result()
+        segments = segments_future.result()
+
+    timings["total"] = time.perf_counter() - start
+    print(
+        f"⏱️ process_audio: decode {timings['decode']:.2f}s, diarize {timings['diarize']:.2f}s, "
+        f"transcribe {timings['transcribe']:.2f}s, total {timings['total']:.2f}s"
+    )
+
+    return speakers, segments
+
+def iter_audio_windows(audio_path, window_s=STREAM_WINDOW_SECONDS, stride_s=STREAM_STRIDE_SECONDS):
+    """
+    Yields (start_seconds, waveform) for overlapping 16 kHz mono windows of a file or waveform.
+    Formats soundfile can read are decoded progressively, one window at a time;
+    anything else is decoded once with librosa and sliced.
+    """
+    try:
+        if isinstance(audio_path, np.ndarray):
+            raise TypeError("already decoded")
+        audio_file = sf.SoundFile(audio_path)
+    except Exception:
+        waveform = audio_path if isinstance(audio_path, np.ndarray) else load_waveform(audio_path)
+        window = int(window_s * SAMPLE_RATE)
+        stride = int(stride_s * SAMPLE_RATE)
+        start = 0
+        while True:
+            yield start / SAMPLE_RATE, waveform[start:start + window]
+            if start + window >= len(waveform):
+                break
+            start += stride
+        return
+
+    with audio_file:
+        native_sr = audio_file.samplerate
+        window = int(window_s * native_sr)
+        stride = int(stride_s * native_sr)
+        buffer = np.zeros(0, dtype=np.float32)
+        offset = 0
+
+        while True:
+            needed = window - len(buffer)
+            block = audio_file.read(needed, dtype="float32", always_2d=True).mean(axis=1)
+            if len(block) == 0 and offset > 0:
+                break  # the previous window already reached the end of the file
+            buffer = np.concatenate([buffer, block])
+
+            chunk = buffer
+            if native_sr != SAMPLE_RATE:
+                with metrics.stage("decode_window"):
+                    chunk = librosa.resample(buffer, orig_sr=native_sr, target_sr=SAMPLE_RATE)
+            yield offset / native_sr, chunk.astype(np.float32, copy=False)
+
+            if len(block) < needed:
+                break
+            buffer = buffer[stride:]
+            offset += stride
+
+def stream_transcribe(audio_path, window_s=STREAM_WINDOW_SECONDS, stride_s=STREAM_STRIDE_SECONDS, vad=None):
+    """
+    Transcribes audio window by window and yields segments as each window finishes.
+    A background thread decodes upcoming windows while Whisper works on the current one.
+    Overlapping segments are kept only by the window whose centre region contains them,
+    and windows without speech are skipped unless VAD is off.
+    Yields dicts with absolute start, end and text.
+    """
+    windows = queue.Queue(maxsize=2)
+    stopped = threading.Event()
+
+    def put(item):
+        # Give up if the consumer has gone away instead of blocking forever
+        while not stopped.is_set():
+            try:
+                windows.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def decode():
+        try:
+            for item in iter_audio_windows(audio_path, window_s, stride_s):
+                if not put(item):
+                    return
+        except Exception as e:
+            put(e)
+        put(None)
+
+    threading.Thread(target=decode, daemon=True).start()
+    try:
+        yield from _transcribe_windows(windows, window_s, stride_s, vad or VAD_MODE)
+    finally:
+        stopped.set()
+
+def _transcribe_windows(windows, window_s, stride_s, vad):
+    """Consumes decoded windows one ahead, so the final window is known to be last."""
+    overlap = window_s - stride_s
+    prompt = None
+    current = windows.get()
+    while current is not None:
+        if isinstance(current, Exception):
+            print(f"Error during streaming decode: {current}")
+            return
+        upcoming = windows.get()
+        is_last = upcoming is None
+
+        offset, chunk = current
+        lower = offset + overlap / 2 if offset > 0 else float("-inf")
+        upper = float("inf") if is_last else offset + stride_s + overlap / 2
+
+        try:
+            if vad != "off" and not detect_speech(chunk, vad):
+                result = {"segments": []}  # silence or hold music; nothing for Whisper to hear
+            elif TRANSCRIBE_MODE == "tiered":
+                from tiered_transcription import tiered_segments
+                with metrics.stage("transcribe_window"):
+                    result = {"segments": tiered_segments(chunk, prompt)}
+            else:
+                with metrics.stage("transcribe_window"):
+                    result = get_whisper_model().transcribe(chunk, language="en", initial_prompt=prompt)
+        except Exception as e:
+            print(f"Error during transcription of window at {offset:.1f}s: {e}")
+            result = {"segments": []}
+
+        for segment in result["segments"]:
+            start = offset + segment["start"]
+            end = offset + segment["end"]
+            text = segment["text"].strip()
+            if text and lower <= (start + end) / 2 < upper:
+                prompt = text
+                yield {"start": start, "end": end, "text": text}
+
+        current = upcoming
@@ -0,0 +1,265 @@
+"""
+Offline batch runner: analyzes whole directories of recordings across cores.
+
+Examples (run from the backend directory):
+    python batch_cli.py /data/calls/2026-10-16 --output results.jsonl
+    python batch_cli.py "/data/calls/**/*.mp3" --output results.parquet --workers 4
+
+Results are written as each file finishes. Re-running with the same output
+skips files that are already in it, so an interrupted run can be resumed.
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+AUDIO_EXTENSIONS = {".wav", ".mp3", ".flac", ".ogg", ".m4a"}
+STAGES = ("decode", "diarize", "transcribe", "analyze")
+
+
+def discover_files(inputs, extensions=AUDIO_EXTENSIONS):
+    """Expands directories (recursively) and glob patterns into a sorted list of audio files."""
+    found = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in files:
+                    if os.path.splitext(name)[1].lower() in extensions:
+                        found.add(os.path.abspath(os.path.join(root, name)))
+        else:
+            for path in glob.glob(item, recursive=True):
+                if os.path.isfile(path) and os.path.splitext(path)[1].lower() in extensions:
+                    found.add(os.path.abspath(path))
+    return sorted(found)
+
+
+def _init_worker():
+    """Loads the models once per worker process."""
+    import pipeline  # noqa: F401  (registers every model loader)
+    from model_registry import registry
+    registry.warm()
+
+
+def analyze_file(path):
+    """Runs the full pipeline on one file inside a worker and returns a result record."""
+    import soundfile as sf
+    from pipeline import analyze_audio_file
+    from result_columns import ResultColumns
+
+    record = {"path": path, "filename": os.path.basename(path), "error": None}
+    timings = {}
+    start = time.perf_counter()
+    try:
+        try:
+            record["duration"] = sf.info(path).duration
+        except Exception:
+            import librosa
+            record["duration"] = librosa.get_duration(path=path)
+
+        entry = analyze_audio_file(path, timings=timings)
+        record.update({
+            "transcript": entry["transcript"],
+            "speakers": entry["speakers"],
+            "analysis": entry["analysis"],
+            "speaker_summary": entry.get("speaker_summary", {}),
+            "summary": ResultColumns.from_entry(entry).summary(),
+            "cached": not timings,
+        })
+    except Exception as e:
+        record["error"] = str(e)
+
+    timings["wall"] = time.perf_counter() - start
+    record["timings"] = timings
+    return record
+
+
+class JsonlWriter:
+    def __init__(self, path):
+        self.path = path
+
+    def completed(self):
+        done = set()
+        if not os.path.exists(self.path):
+            return done
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # a partially written last line from an interrupted run
+                if not record.get("error"):
+                    done.add(record["path"])
+        return done
+
+    def __enter__(self):
+        self.file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + "\n")
+        self.file.flush()
+
+    def __exit__(self, *exc):
+        self.file.close()
+
+
+class ParquetWriter:
+    """
+    Writes one small Parquet part file per finished recording into the output directory.
+    Each part is complete on disk before the next file finishes, so an interrupted run
+    loses nothing it reported. Nested fields are stored as JSON strings so every row has
+    the same schema.
+    """
+
+    def __init__(self, path):
+        import pyarrow  # noqa: F401  (fail early if Parquet output is not available)
+        self.path = path
+        self.parts = 0
+
+    def completed(self):
+        import pyarrow.parquet as pq
+        done = set()
+        if not os.path.isdir(self.path):
+            return done
+        for name in sorted(os.listdir(self.path)):
+            if name.endswith(".parquet"):
+                try:
+                    table = pq.read_table(os.path.join(self.path, name), columns=["path", "error"])
+                except Exception:
+                    continue  # unreadable part file; its recordings are processed again
+                for path, error in zip(table.column("path").to_pylist(), table.column("error").to_pylist()):
+                    if not error:
+                        done.add(path)
+        return done
+
+    def __enter__(self):
+        os.makedirs(self.path, exist_ok=True)
+        self.prefix = f"part-{int(time.time())}-{os.getpid()}"
+        return self
+
+    def write(self, record):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        table = pa.Table.from_pylist([{
+            "path": record["path"],
+            "filename": record["filename"],
+            "duration": record.get("duration"),
+            "error": record["error"],
+            "transcript": record.get("transcript"),
+            "total_sentences": record.get("summary", {}).get("total_sentences"),
+            "profane_sentences": record.get("summary", {}).get("profane_sentences"),
+            "negative_sentiment_sentences": record.get("summary", {}).get("negative_sentiment_sentences"),
+            "speakers": json.dumps(record.get("speakers")),
+            "analysis": json.dumps(record.get("analysis")),
+            "speaker_summary": json.dumps(record.get("speaker_summary")),
+            "timings": json.dumps(record["timings"]),
+        }], schema=parquet_schema())
+        self.parts += 1
+        name = f"{self.prefix}-{self.parts:06d}.parquet"
+        # Written under a hidden temporary name so readers never see a half-written part
+        temp_path = os.path.join(self.path, f".{name}.tmp")
+        pq.write_table(table, temp_path)
+        os.replace(temp_path, os.path.join(self.path, name))
+
+    def __exit__(self, *exc):
+        pass
+
+
+def parquet_schema():
+    """Fixed schema for the part files; single-row parts would otherwise infer null columns."""
+    import pyarrow as pa
+    return pa.schema([
+        ("path", pa.string()),
+        ("filename", pa.string()),
+        ("duration", pa.float64()),
+        ("error", pa.string()),
+        ("transcript", pa.string()),
+        ("total_sentences", pa.int64()),
+        ("profane_sentences", pa.int64()),
+        ("negative_sentiment_sentences", pa.int64()),
+        ("speakers", pa.string()),
+        ("analysis", pa.string()),
+        ("speaker_summary", pa.string()),
+        ("timings", pa.string()),
+    ])
+
+
+def make_writer(output, output_format=None):
+    output_format = output_format or ("parquet" if output.endswith(".parquet") else "jsonl")
+    if output_format == "parquet":
+        return ParquetWriter(output)
+    return JsonlWriter(output)
+
+
+def print_report(records, skipped, elapsed):
+    processed = [record for record in records if not record["error"]]
+    failed = len(records) - len(processed)
+    audio_seconds = sum(record.get("duration") or 0 for record in processed)
+
+    print("\n📊 Batch summary")
+    print(f"  Files processed: {len(processed)}  failed: {failed}  skipped (already done): {skipped}")
+    print(f"  Wall time:       {elapsed:.1f}s")
+    if elapsed > 0:
+        print(f"  Throughput:      {len(records) / elapsed:.2f} files/s, {audio_seconds / elapsed:.1f} audio-seconds/s")
+    if audio_seconds:
+        print(f"  Real-time factor: {elapsed / audio_seconds:.3f} (wall / audio duration)")
+
+    computed = [record for record in processed if not record.get("cached")]
+    if computed:
+        print(f"  Per-stage timings over {len(computed)} uncached files (total / mean seconds):")
+        for stage in STAGES:
+            values = [record["timings"][stage] for record in computed if stage in record["timings"]]
+            if values:
+                print(f"    {stage:<11} {sum(values):10.1f} {sum(values) / len(values):10.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("inputs", nargs="+", help="Directories, files or glob patterns")
+    parser.add_argument("--output", "-o", required=True, help="Output .jsonl file or .parquet directory")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], help="Output format (default: from --output)")
+    parser.add_argument("--workers", "-w", type=int, default=os.cpu_count() or 1, help="Worker processes")
+    parser.add_argument("--no-resume", action="store_true", help="Process files even if already in the output")
+    args = parser.parse_args(argv)
+
+    files = discover_files(args.inputs)
+    writer = make_writer(args.output, args.format)
+    done = set() if args.no_resume else writer.completed()
+    todo = [path for path in files if path not in done]
+    skipped = len(files) - len(todo)
+
+    print(f"🔎 Found {len(files)} files, {len(todo)} to process with {args.workers} workers")
+    if not todo:
+        return 0
+
+    records = []
+    start = time.perf_counter()
+    with writer, ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+    ) as executor:
+        futures = {executor.submit(analyze_file, path): path for path in todo}
+        for count, future in enumerate(as_completed(futures), start=1):
+            try:
+                record = future.result()
+            except Exception as e:
+                # The worker itself died; record the failure so the file is retried next run
+                record = {"path": futures[future], "filename": os.path.basename(futures[future]),
+                          "error": str(e), "timings": {}}
+            writer.write(record)
+            records.append({key: record.get(key) for key in ("error", "duration", "timings", "cached")})
+
+            status = "❌" if record["error"] else "✅"
+            print(f"{status} [{count}/{len(todo)}] {record['filename']} ({record['timings'].get('wall', 0):.1f}s)")
+
+    print_report(records, skipped, time.perf_counter() - start)
+    return 0 if all(not record["error"] for record in records) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+"""
+Throughput of NLTK's per-sentence VADER versus the vectorized BulkVader.
+
+Each size is scored both ways on the same sentences (best of --repeat
+runs). The vectorized scores are checked against polarity_scores.
+
+Run from the backend directory:
+    python -m benchmarks.bench_bulk_sentiment --sentences 1000 10000 50000 100000
+"""
+import time
+import argparse
+
+from model_registry import registry
+import nlp_analysis  # registers "vader" and "vader_bulk"
+from benchmarks.bench_keyword_matcher import build_sentences
+
+
+def best_of(repeat, func, *args):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, nargs="+", default=[1000, 10000, 50000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    analyzer = registry.get("vader")
+    bulk = registry.get("vader_bulk")
+
+    def per_sentence(texts):
+        return [analyzer.polarity_scores(text) for text in texts]
+
+    print(f"{'sentences':>9} {'nltk s':>8} {'bulk s':>8} {'nltk sent/s':>12} {'bulk sent/s':>12} "
+          f"{'speedup':>8} {'max |diff|':>11}")
+    for count in args.sentences:
+        sentences = build_sentences(count)
+        expected, nltk_time = best_of(args.repeat, per_sentence, sentences)
+        actual, bulk_time = best_of(args.repeat, bulk.polarity_scores_batch, sentences)
+        max_diff = max(
+            (abs(want[key] - got[key]) for want, got in zip(expected, actual) for key in want), default=0.0
+        )
+        print(f"{count:>9} {nltk_time:>8.2f} {bulk_time:>8.2f} {count / nltk_time:>12.0f} "
+              f"{count / bulk_time:>12.0f} {nltk_time / bulk_time:>7.1f}x {max_diff:>11.1e}")
+
+
+if __name__ == "__main__":
+    main()
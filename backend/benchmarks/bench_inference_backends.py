@@ -0,0 +1,89 @@
+"""
+Measures cold start, batch latency and peak RSS of each profanity backend.
+
+Each backend runs in a fresh subprocess so TensorFlow's footprint does not
+leak into the others. Run from the backend directory:
+    python -m benchmarks.bench_inference_backends --batch-size 64 --repeats 50
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+
+from inference_backends import QUANTIZED_ONNX_MODEL_PATH
+
+BACKENDS = ["keras", "onnx", "onnx-int8", "numpy"]
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_child(label, batch_size, repeats):
+    start = time.perf_counter()
+    from inference_backends import load_backend
+    from nlp_analysis import BACKEND_PATHS, MAX_SEQUENCE_LENGTH, preprocess_batch
+    from benchmarks.bench_profanity_batching import SAMPLE_SENTENCES
+
+    name = "onnx" if label == "onnx-int8" else label
+    path = QUANTIZED_ONNX_MODEL_PATH if label == "onnx-int8" else BACKEND_PATHS[name]
+    backend = load_backend(name, path)
+    cold_start = time.perf_counter() - start
+
+    texts = (SAMPLE_SENTENCES * (batch_size // len(SAMPLE_SENTENCES) + 1))[:batch_size]
+    padded = preprocess_batch(texts)
+    assert padded.shape == (batch_size, MAX_SEQUENCE_LENGTH)
+
+    backend.predict(padded)  # warm-up
+    latencies = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        backend.predict(padded)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    print(json.dumps({
+        "backend": label,
+        "cold_start_s": cold_start,
+        "p50_ms": latencies[len(latencies) // 2] * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "sentences_per_s": batch_size / (sum(latencies) / len(latencies)),
+        "peak_rss_mb": peak_rss_mb(),
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--child", choices=BACKENDS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.batch_size, args.repeats)
+        return
+
+    print(f"{'backend':<10} {'cold start':>11} {'p50 ms':>9} {'p95 ms':>9} {'sent/s':>10} {'peak RSS MB':>12}")
+    for label in BACKENDS:
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_inference_backends", "--child", label,
+             "--batch-size", str(args.batch_size), "--repeats", str(args.repeats)],
+            capture_output=True, text=True, cwd=os.getcwd(),
+        )
+        lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+        if proc.returncode != 0 or not lines:
+            error = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+            print(f"{label:<10} skipped: {error}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"{label:<10} {r['cold_start_s']:>10.2f}s {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} "
+              f"{r['sentences_per_s']:>10.0f} {r['peak_rss_mb']:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
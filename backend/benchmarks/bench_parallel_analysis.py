@@ -0,0 +1,61 @@
+"""
+Scaling of parallel sentence analysis from 1 to N worker processes.
+
+The sentence memo is disabled so every run does the full scoring work, and
+each pool is warmed up (models loaded in every worker) before it is timed.
+Results are checked against the serial run.
+
+Run from the backend directory:
+    python -m benchmarks.bench_parallel_analysis --sentences 50000 --max-workers 8
+"""
+import os
+import time
+import argparse
+
+from nlp_analysis import analyze_sentences, sentence_cache, shutdown_analysis_pools, PARALLEL_MIN_SENTENCES
+from benchmarks.bench_keyword_matcher import build_sentences
+
+
+def worker_counts(max_workers):
+    counts = [1]
+    while counts[-1] * 2 <= max_workers:
+        counts.append(counts[-1] * 2)
+    if counts[-1] != max_workers:
+        counts.append(max_workers)
+    return counts
+
+
+def timed(sentences, workers):
+    start = time.perf_counter()
+    results = analyze_sentences(sentences, workers=workers)
+    return results, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sentences", type=int, default=50000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    sentence_cache.max_entries = 0
+    sentences = build_sentences(args.sentences)
+    warmup = build_sentences(PARALLEL_MIN_SENTENCES, seed=1)
+
+    baseline = None
+    print(f"{'workers':>7} {'seconds':>9} {'sent/s':>10} {'speedup':>8} {'efficiency':>11} {'matches':>8}")
+    for workers in worker_counts(args.max_workers):
+        analyze_sentences(warmup, workers=workers)  # start the pool and load models in every worker
+        results, elapsed = timed(sentences, workers)
+        if baseline is None:
+            baseline = (results, elapsed)
+        serial_results, serial_time = baseline
+        matches = results == serial_results
+        speedup = serial_time / elapsed
+        print(f"{workers:>7} {elapsed:>9.2f} {len(results) / elapsed:>10.0f} {speedup:>7.2f}x "
+              f"{speedup / workers:>10.0%} {'yes' if matches else 'NO':>8}")
+
+    shutdown_analysis_pools()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compares per-sentence and batched profanity inference in analyze_transcript.
+
+Run from the backend directory:
+    python -m benchmarks.bench_profanity_batching --sentences 400
+"""
+import argparse
+import random
+import time
+
+from nlp_analysis import analyze_transcript, sentence_cache
+
+SAMPLE_SENTENCES = [
+    "Thank you for calling, how can I help you today?",
+    "I have been waiting on hold for forty minutes.",
+    "This is the worst service I have ever received.",
+    "Can you hear me now?",
+    "Okay, let me check that for you.",
+    "You people are useless and stupid.",
+    "I really appreciate your patience.",
+    "What a ridiculous waste of my time.",
+    "Have a great day.",
+    "Stop talking nonsense and fix my account.",
+]
+
+
+def build_transcript(count, seed=0):
+    # Numbered so every sentence is distinct and the batched path cannot score repeats once
+    rng = random.Random(seed)
+    return " ".join(f"Call {i}: {rng.choice(SAMPLE_SENTENCES)}" for i in range(count))
+
+
+def run(transcript, batched):
+    start = time.perf_counter()
+    results = analyze_transcript(transcript, batched=batched)
+    elapsed = time.perf_counter() - start
+    return results, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sentences", type=int, default=400)
+    args = parser.parse_args()
+
+    # The warm-up and timed runs share sentences; time the scoring, not memo hits
+    sentence_cache.max_entries = 0
+    transcript = build_transcript(args.sentences)
+
+    # Warm up both paths so graph tracing is not counted
+    run(build_transcript(8, seed=1), batched=False)
+    run(build_transcript(8, seed=1), batched=True)
+
+    serial_results, serial_time = run(transcript, batched=False)
+    batched_results, batched_time = run(transcript, batched=True)
+
+    serial_labels = [item["profanity"] for item in serial_results]
+    batched_labels = [item["profanity"] for item in batched_results]
+    mismatches = sum(1 for a, b in zip(serial_labels, batched_labels) if a != b)
+
+    count = len(serial_results)
+    print(f"Sentences:          {count}")
+    print(f"Per-sentence:       {count / serial_time:10.1f} sentences/sec ({serial_time:.2f}s)")
+    print(f"Batched:            {count / batched_time:10.1f} sentences/sec ({batched_time:.2f}s)")
+    print(f"Speedup:            {serial_time / batched_time:10.2f}x")
+    print(f"Label mismatches:   {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
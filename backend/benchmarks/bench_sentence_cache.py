@@ -0,0 +1,97 @@
+"""
+Measures the sentence memo on call-centre-like transcripts.
+
+Each transcript mixes boilerplate phrases, drawn with a Zipf-like skew the
+way real calls repeat "okay" and "can you hear me", with one-off
+sentences. Reports analyze_transcript throughput with the memo disabled,
+cold (first transcript) and warm (later transcripts from the same process).
+
+Run from the backend directory:
+    python -m benchmarks.bench_sentence_cache --calls 20 --sentences 400 --boilerplate 0.6
+"""
+import time
+import random
+import argparse
+
+import nlp_analysis
+from nlp_analysis import analyze_transcript, sentence_cache
+from benchmarks.bench_keyword_matcher import build_sentences
+
+BOILERPLATE = [
+    "Okay.",
+    "Thank you for calling, how can I help you today?",
+    "Can you hear me?",
+    "Yes.",
+    "Let me check that for you.",
+    "Please hold.",
+    "Is there anything else I can help you with?",
+    "Have a great day.",
+    "Sorry, could you repeat that?",
+    "Thank you for your patience.",
+    "Can I have your account number please?",
+    "This is ridiculous.",
+    "I have been on hold for forty minutes.",
+    "Alright, thank you.",
+    "No.",
+]
+
+
+def build_calls(calls, sentences_per_call, boilerplate_share, seed=0):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(BOILERPLATE))]
+    unique = iter(build_sentences(calls * sentences_per_call, seed=seed + 1))
+    transcripts = []
+    for _ in range(calls):
+        sentences = []
+        for _ in range(sentences_per_call):
+            if rng.random() < boilerplate_share:
+                sentences.append(rng.choices(BOILERPLATE, weights)[0])
+            else:
+                sentences.append(next(unique))
+        transcripts.append(" ".join(sentences))
+    return transcripts
+
+
+def run(transcripts):
+    start = time.perf_counter()
+    count = sum(len(analyze_transcript(transcript)) for transcript in transcripts)
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--sentences", type=int, default=400)
+    parser.add_argument("--boilerplate", type=float, default=0.6, help="Share of boilerplate sentences")
+    parser.add_argument("--fake-models", action="store_true", help="Use the fast-mode stand-in LSTM")
+    args = parser.parse_args()
+
+    if args.fake_models:
+        from benchmarks.fakes import install_fake_models
+        install_fake_models()
+
+    transcripts = build_calls(args.calls, args.sentences, args.boilerplate)
+    max_entries = sentence_cache.max_entries
+    analyze_transcript(BOILERPLATE[1])  # load models outside the timed runs
+
+    sentence_cache.max_entries = 0
+    count, disabled = run(transcripts)
+
+    sentence_cache.max_entries = max_entries
+    sentence_cache.clear()
+    _, cold_first = run(transcripts[:1])
+    _, warm_rest = run(transcripts[1:])
+    stats = sentence_cache.stats()
+
+    per_call_disabled = disabled / len(transcripts)
+    per_call_warm = warm_rest / max(1, len(transcripts) - 1)
+    print(f"Calls x sentences:  {args.calls} x {args.sentences} ({count} analyzed)")
+    print(f"Memo disabled:      {count / disabled:10.1f} sentences/sec ({per_call_disabled * 1000:.1f} ms/call)")
+    print(f"Memo, first call:   {cold_first * 1000:10.1f} ms")
+    print(f"Memo, later calls:  {per_call_warm * 1000:10.1f} ms/call  ({per_call_disabled / per_call_warm:.2f}x)")
+    print(f"Hit rate:           {stats['hit_rate']:.1%} ({stats['entries']} entries, {stats['evictions']} evictions)")
+    print(f"Profanity backend:  {nlp_analysis.backend_choice()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Tiered transcription (fast first pass + targeted re-runs) versus the large model alone.
+
+For each local fixture, transcribes the file once with WHISPER_MODEL only and
+once in tiered mode. It reports wall-clock time for both runs, the share of
+segments and seconds that were re-transcribed, and word agreement. Word
+agreement is the share of the large-model transcript's words that the tiered
+transcript reproduces in order (case and punctuation ignored). Models are
+loaded before anything is timed. VAD is applied the same way in both runs.
+
+Run from the backend directory:
+    python -m benchmarks.bench_tiered_transcription call1.wav call2.mp3 --fast-model base
+    python -m benchmarks.bench_tiered_transcription fixtures/*.wav --json bench-results/tiered.json
+"""
+import re
+import json
+import time
+import argparse
+import difflib
+
+import numpy as np
+
+import audio_processing
+from audio_processing import load_waveform, transcribe_segments, SAMPLE_RATE
+from model_registry import registry
+from metrics import metrics
+
+
+def words(segments):
+    return re.findall(r"[a-z0-9']+", " ".join(segment["text"] for segment in segments).lower())
+
+
+def word_agreement(reference, candidate):
+    """Share of reference words matched, in order, by the candidate."""
+    if not reference:
+        return 1.0 if not candidate else 0.0
+    matcher = difflib.SequenceMatcher(None, reference, candidate, autojunk=False)
+    return sum(block.size for block in matcher.get_matching_blocks()) / len(reference)
+
+
+def tier_counters():
+    segments = {
+        dict(labels)["outcome"]: value
+        for (name, labels), value in metrics.counters.items()
+        if name == "echo_tier_segments_total"
+    }
+    seconds = sum(value for (name, _), value in metrics.counters.items() if name == "echo_tier_retry_seconds_total")
+    return segments, seconds
+
+
+def timed_transcription(waveform, mode):
+    audio_processing.TRANSCRIBE_MODE = mode
+    start = time.perf_counter()
+    segments = transcribe_segments(waveform)
+    return segments, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--fast-model", help="Whisper size or path for the first pass (default WHISPER_FAST_MODEL)")
+    parser.add_argument("--json", help="Also write the per-file report here")
+    args = parser.parse_args()
+
+    if args.fast_model:
+        audio_processing.WHISPER_FAST_MODEL_NAME = args.fast_model
+    registry.register("whisper_fast", audio_processing._load_fast_whisper)
+    registry.warm(["whisper", "whisper_fast", "vader", "vader_bulk", "tokenizer", "profanity_lstm"])
+    warmup = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    registry.get("whisper").transcribe(warmup, language="en")
+    registry.get("whisper_fast").transcribe(warmup, language="en")
+
+    print(f"Large model: {audio_processing.WHISPER_MODEL_NAME}, fast model: {audio_processing.WHISPER_FAST_MODEL_NAME}")
+    print(f"{'file':<28} {'audio s':>8} {'large s':>8} {'tiered s':>9} {'speedup':>8} "
+          f"{'re-run segs':>12} {'re-run s':>9} {'agreement':>10}")
+    report = []
+    for path in args.files:
+        waveform = load_waveform(path)
+        reference, large_time = timed_transcription(waveform, "single")
+
+        segments_before, seconds_before = tier_counters()
+        tiered, tiered_time = timed_transcription(waveform, "tiered")
+        segments_after, seconds_after = tier_counters()
+
+        outcomes = {key: value - segments_before.get(key, 0) for key, value in segments_after.items()}
+        total = sum(outcomes.values())
+        rerun = total - outcomes.get("kept", 0)
+        row = {
+            "file": path,
+            "audio_seconds": len(waveform) / SAMPLE_RATE,
+            "large_seconds": large_time,
+            "tiered_seconds": tiered_time,
+            "speedup": large_time / tiered_time if tiered_time else None,
+            "fast_segments": total,
+            "rerun_segments": rerun,
+            "rerun_reasons": {key: value for key, value in outcomes.items() if key != "kept" and value},
+            "rerun_audio_seconds": seconds_after - seconds_before,
+            "word_agreement": word_agreement(words(reference), words(tiered)),
+        }
+        report.append(row)
+        print(f"{path[-28:]:<28} {row['audio_seconds']:>8.1f} {large_time:>8.1f} {tiered_time:>9.1f} "
+              f"{row['speedup'] or 0:>7.2f}x {f'{rerun}/{total}':>12} {row['rerun_audio_seconds']:>9.1f} "
+              f"{row['word_agreement']:>9.1%}")
+
+    audio_processing.TRANSCRIBE_MODE = "single"
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Real-time factor of Whisper transcription with and without silence skipping.
+
+Each input is made silence-heavy by inserting silence between stretches of
+speech (--silence-ratio of the result is silence, 0 keeps the file as is).
+RTF = processing seconds / audio seconds; lower is better.
+
+Run from the backend directory:
+    python -m benchmarks.bench_vad call.wav --silence-ratio 0.6 --modes off energy pyannote
+"""
+import time
+import argparse
+
+import numpy as np
+
+from audio_processing import SAMPLE_RATE, load_waveform, transcribe_segments, detect_speech, get_whisper_model
+from vad import speech_seconds
+
+
+def add_silence(waveform, ratio, chunk_s=10.0, noise_db=-65.0, seed=0):
+    """Splits speech into chunks and puts low-level noise between them until `ratio` of the audio is silence."""
+    if ratio <= 0:
+        return np.asarray(waveform, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    chunk = int(chunk_s * SAMPLE_RATE)
+    pieces = [waveform[i:i + chunk] for i in range(0, len(waveform), chunk)]
+    gap = int(chunk * ratio / (1 - ratio))
+    amplitude = 10 ** (noise_db / 20)
+    padded = []
+    for piece in pieces:
+        padded.append(np.asarray(piece, dtype=np.float32))
+        padded.append((rng.standard_normal(gap) * amplitude).astype(np.float32))
+    return np.concatenate(padded)
+
+
+def run(waveform, mode):
+    start = time.perf_counter()
+    segments = transcribe_segments(waveform, vad=mode)
+    elapsed = time.perf_counter() - start
+    return elapsed, segments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+")
+    parser.add_argument("--silence-ratio", type=float, default=0.6)
+    parser.add_argument("--modes", nargs="+", default=["off", "energy", "pyannote"],
+                        choices=["off", "energy", "pyannote"])
+    args = parser.parse_args()
+
+    get_whisper_model()  # load outside the timed region
+    print(f"{'file':<24} {'mode':<9} {'audio s':>8} {'speech s':>9} {'time s':>8} {'RTF':>6} {'segments':>9}")
+    for path in args.files:
+        waveform = add_silence(load_waveform(path), args.silence_ratio)
+        duration = len(waveform) / SAMPLE_RATE
+        for mode in args.modes:
+            try:
+                speech = duration if mode == "off" else speech_seconds(detect_speech(waveform, mode))
+                elapsed, segments = run(waveform, mode)
+            except Exception as e:
+                print(f"{path[-24:]:<24} {mode:<9} skipped: {e}")
+                continue
+            print(f"{path[-24:]:<24} {mode:<9} {duration:>8.1f} {speech:>9.1f} {elapsed:>8.1f} "
+                  f"{elapsed / duration:>6.3f} {len(segments):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Peak memory and wall time of whole-file versus windowed diarization.
+
+The recording is repeated until it reaches each target length, and each
+(mode, length) pair runs in a fresh subprocess so peak RSS is not shared.
+With windows, peak RSS should stay flat as the recording grows.
+
+Run from the backend directory:
+    python -m benchmarks.bench_windowed_diarization meeting.wav --minutes 10 30 60
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+MODES = ["full", "windowed"]
+
+
+def run_child(path, mode, minutes):
+    import numpy as np
+    from audio_processing import SAMPLE_RATE, load_waveform, separate_speakers
+    from metrics import peak_rss_bytes
+
+    source = load_waveform(path)
+    samples = int(minutes * 60 * SAMPLE_RATE)
+    # Build the long recording on disk and memory-map it, as ingestion does
+    target = os.path.join(tempfile.mkdtemp(prefix="echo-diar-"), "long.f32.npy")
+    long_audio = np.lib.format.open_memmap(target, mode="w+", dtype=np.float32, shape=(samples,))
+    for start in range(0, samples, len(source)):
+        chunk = source[:samples - start]
+        long_audio[start:start + len(chunk)] = chunk
+    long_audio.flush()
+    del long_audio
+    baseline = peak_rss_bytes()
+
+    start = time.perf_counter()
+    turns = separate_speakers(target, windowed=(mode == "windowed"))
+    print(json.dumps({
+        "seconds": time.perf_counter() - start,
+        "peak_rss_mb": peak_rss_bytes() / 2**20,
+        "baseline_rss_mb": baseline / 2**20,
+        "turns": len(turns),
+        "speakers": len({turn["speaker"] for turn in turns}),
+    }))
+    os.remove(target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("file")
+    parser.add_argument("--minutes", type=float, nargs="+", default=[10, 30, 60])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "MINUTES"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.file, args.child[0], float(args.child[1]))
+        return
+
+    print(f"{'minutes':>7} {'mode':<9} {'seconds':>9} {'peak RSS MB':>12} {'turns':>7} {'speakers':>9}")
+    for minutes in args.minutes:
+        for mode in MODES:
+            proc = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_windowed_diarization", args.file,
+                 "--child", mode, str(minutes)],
+                capture_output=True, text=True, cwd=os.getcwd(),
+            )
+            lines = [line for line in proc.stdout.splitlines() if line.startswith("{")]
+            if proc.returncode != 0 or not lines:
+                error = (proc.stderr.strip().splitlines() or ["unknown error"])[-1]
+                print(f"{minutes:>7.0f} {mode:<9} failed: {error}")
+                continue
+            r = json.loads(lines[-1])
+            print(f"{minutes:>7.0f} {mode:<9} {r['seconds']:>9.1f} {r['peak_rss_mb']:>12.0f} "
+                  f"{r['turns']:>7} {r['speakers']:>9}")
+
+
+if __name__ == "__main__":
+    main()
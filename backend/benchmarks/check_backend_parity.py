@@ -0,0 +1,76 @@
+"""
+Checks that the ONNX, int8 ONNX and NumPy backends agree with the Keras model.
+
+Run from the backend directory after exporting (python export_model.py --quantize):
+    python -m benchmarks.check_backend_parity
+
+Exits non-zero if any backend exceeds its tolerance or flips a profanity label.
+"""
+import os
+import sys
+import argparse
+
+import joblib
+
+from inference_backends import load_backend, VocabTokenizer, QUANTIZED_ONNX_MODEL_PATH
+from nlp_analysis import (
+    BACKEND_PATHS,
+    MAX_SEQUENCE_LENGTH,
+    TOKENIZER_PATH,
+    VOCAB_PATH,
+    label_from_prediction,
+    pad_sequences_post,
+)
+from benchmarks.bench_profanity_batching import SAMPLE_SENTENCES
+
+# Maximum absolute probability difference allowed against Keras
+TOLERANCES = {"onnx": 1e-4, "numpy": 1e-4, "onnx-int8": 5e-2}
+
+CORPUS = SAMPLE_SENTENCES + [
+    "you are an idiot", "this is stupid", "i hate you", "have a great day",
+    "I appreciate your help", "that's complete bullshit", "your work is garbage",
+    "let's find a solution", "words the tokenizer has never seen before",
+    "", "a " * 80,
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.parse_args()
+
+    keras_tokenizer = joblib.load(TOKENIZER_PATH)
+    padded = pad_sequences_post(keras_tokenizer.texts_to_sequences(CORPUS), MAX_SEQUENCE_LENGTH)
+    failed = False
+
+    if os.path.exists(VOCAB_PATH):
+        exported = pad_sequences_post(VocabTokenizer(VOCAB_PATH).texts_to_sequences(CORPUS), MAX_SEQUENCE_LENGTH)
+        same = (exported == padded).all()
+        print(f"{'✅' if same else '❌'} exported tokenizer matches Keras tokenizer")
+        failed |= not same
+
+    reference = load_backend("keras", BACKEND_PATHS["keras"]).predict(padded)
+    candidates = {
+        "onnx": ("onnx", BACKEND_PATHS["onnx"]),
+        "onnx-int8": ("onnx", QUANTIZED_ONNX_MODEL_PATH),
+        "numpy": ("numpy", BACKEND_PATHS["numpy"]),
+    }
+
+    for label, (name, path) in candidates.items():
+        if not os.path.exists(path):
+            print(f"⚠️ {label}: {path} not found, skipped")
+            continue
+        scores = load_backend(name, path).predict(padded)
+        max_diff = float(abs(scores - reference).max())
+        flips = sum(
+            1 for a, b in zip(scores, reference) if label_from_prediction(a) != label_from_prediction(b)
+        )
+        ok = max_diff <= TOLERANCES[label] and flips == 0
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {label}: max |diff| {max_diff:.2e} (tolerance {TOLERANCES[label]:.0e}), "
+              f"{flips} label flips over {len(CORPUS)} sentences")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,49 @@
+"""
+Checks the compiled keyword matcher on punctuation, phrases, tier priority and
+text whose lowercase form changes length (the case-insensitive regex path).
+
+Run from the backend directory:
+    python -m benchmarks.check_keyword_matcher
+
+Exits non-zero if any case fails.
+"""
+import sys
+
+from keyword_matcher import KeywordMatcher, STRONG, MILD
+
+MATCHER = KeywordMatcher([
+    (STRONG, ["idiot", "bloody hell"]),
+    (MILD, ["damn", "bloody", "idiot", "straße"]),
+])
+
+# (text, expected (term, tier) pairs in order)
+CASES = [
+    ("Thanks for calling.", []),
+    ("You idiot!", [("idiot", STRONG)]),
+    ("Damn, that's BLOODY   hell.", [("damn", MILD), ("bloody hell", STRONG)]),
+    ("That's bloody annoying.", [("bloody", MILD)]),
+    ("idiotic behaviour", []),
+    # Lowercasing "İ" gives two characters, so these take the case-insensitive path
+    ("You İdiot.", [("idiot", STRONG)]),
+    ("İstanbul, you DAMN idiot", [("damn", MILD), ("idiot", STRONG)]),
+    ("İ İ İ", []),
+    ("Die STRASSE and the Straße", [("straße", MILD)]),
+]
+
+
+def main():
+    failures = 0
+    for text, expected in CASES:
+        try:
+            found = [(term, tier) for term, _, _, tier in MATCHER.finditer(text)]
+        except Exception as e:
+            found = f"{type(e).__name__}: {e}"
+        ok = found == expected
+        failures += not ok
+        print(f"{'✅' if ok else '❌'} {text!r}" + ("" if ok else f"\n   expected {expected}\n   found    {found}"))
+    print(f"{failures} of {len(CASES)} cases failed")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Checks that the vectorized VADER scorer agrees with NLTK's polarity_scores.
+
+The corpus has the benchmark sentences, hand-written cases for every VADER
+rule (caps, boosters, negation, "never so", idioms, "least", "but",
+punctuation emphasis, repeated tokens), and seeded random word soups drawn
+from the lexicon, boosters and negations, with random caps and punctuation.
+
+Run from the backend directory:
+    python -m benchmarks.check_vader_parity --random 20000
+
+Exits non-zero if any score differs by more than the tolerance.
+"""
+import sys
+import random
+import argparse
+
+from model_registry import registry
+import nlp_analysis  # registers "vader" and "vader_bulk"
+from benchmarks.bench_profanity_batching import SAMPLE_SENTENCES
+from benchmarks.bench_keyword_matcher import build_sentences
+from benchmarks.bench_sentence_cache import BOILERPLATE
+
+# Scores are rounded to 3 (compound 4) decimals; summation order may move the last digit
+TOLERANCE = 1e-3
+
+EDGE_CASES = [
+    "", "a", "I", ":)", "!!!", "? ? ?",
+    "This is GOOD but the service is TERRIBLE!!",
+    "The food is extremely good.", "The food is EXTREMELY good, the staff less so.",
+    "I do not like it.", "I don't like it at all.", "It isn't very good.", "It was never so good.",
+    "It was never this bad.", "Never so much as a hello.", "this so fun",
+    "That movie was the bomb.", "Yeah right, like that would work.", "He can cut the mustard.",
+    "It was the kiss of death.", "They live hand to mouth.", "That was the shit!", "He is a bad ass.",
+    "It was kind of good.", "It was sort of bad.", "kind of", "It was just enough fun.",
+    "It was the least bad option.", "At least it was good.", "This is very least fun.", "least good",
+    "Good good good bad good.", "bad, bad, BAD, bad!", "GOOD GOOD GOOD", "Not bad. Not bad at all.",
+    "Why would you do that???", "Is it good??", "Is it good?", "Great!!!!!!", "great!?!", "'great'",
+    "!great", "great...", "-great-", "(great)", "“great”", "It is :( and :-( today", "lol :D haha",
+    "I love it but I hate it but I love it.", "BUT it was fine", "it was fine but",
+    "He said he ain't ever going back.", "nothing is wrong", "without doubt the best",
+    "I can't not love this.", "The plot was hardly interesting.", "It's barely okay, isn't it?",
+]
+
+
+def random_corpus(count, seed=0):
+    """Word soups that exercise every rule far more densely than real sentences."""
+    analyzer = registry.get("vader")
+    constants = analyzer.constants
+    rng = random.Random(seed)
+    lexicon = sorted(analyzer.lexicon)
+    special = sorted(constants.BOOSTER_DICT) + sorted(constants.NEGATE) + [
+        "but", "But", "BUT", "least", "at", "very", "never", "so", "this", "kind", "of", "sort",
+        "the", "bomb", "shit", "yeah", "right", "cut", "mustard", "kiss", "death", "hand", "to", "mouth",
+        "bad", "ass", "is", "it", "and", "x",
+    ]
+    punctuation = constants.PUNC_LIST + ["", "", "", "", "(", ")", "..."]
+    corpus = []
+    for _ in range(count):
+        words = []
+        for _ in range(rng.randint(0, 14)):
+            word = rng.choice(special if rng.random() < 0.5 else lexicon)
+            roll = rng.random()
+            if roll < 0.1:
+                word = word.upper()
+            elif roll < 0.15:
+                word = word.capitalize()
+            if rng.random() < 0.2:
+                word = rng.choice(punctuation) + word
+            if rng.random() < 0.3:
+                word += rng.choice(punctuation)
+            words.append(word)
+        corpus.append(" ".join(words))
+    return corpus
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--random", type=int, default=20000, help="Random word soups to add to the corpus")
+    parser.add_argument("--sentences", type=int, default=5000, help="Benchmark sentences to add to the corpus")
+    args = parser.parse_args()
+
+    analyzer = registry.get("vader")
+    bulk = registry.get("vader_bulk")
+    corpus = (SAMPLE_SENTENCES + BOILERPLATE + EDGE_CASES + build_sentences(args.sentences)
+              + random_corpus(args.random))
+
+    expected = [analyzer.polarity_scores(text) for text in corpus]
+    actual = bulk.polarity_scores_batch(corpus)
+
+    worst = {key: (0.0, None) for key in ("neg", "neu", "pos", "compound")}
+    mismatches = 0
+    for text, want, got in zip(corpus, expected, actual):
+        over = False
+        for key in worst:
+            diff = abs(want[key] - got[key])
+            if diff > worst[key][0]:
+                worst[key] = (diff, text)
+            over |= diff > TOLERANCE
+        if over:
+            mismatches += 1
+            if mismatches <= 10:
+                print(f"❌ {text!r}\n   polarity_scores {want}\n   bulk            {got}")
+
+    for key, (diff, text) in worst.items():
+        print(f"{'✅' if diff <= TOLERANCE else '❌'} {key:<8} max |diff| {diff:.1e}"
+              + (f"  ({text!r})" if diff else ""))
+    print(f"{mismatches} of {len(corpus)} sentences outside tolerance {TOLERANCE:.0e}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
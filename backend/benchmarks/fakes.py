@@ -0,0 +1,135 @@
+"""
+Stand-in models and synthetic audio fixtures for fast benchmark runs.
+
+The fakes return deterministic, plausible output instantly, so fast-mode
+benchmarks measure everything around the models (decoding, VAD, alignment,
+analysis, the API) without needing weights, a GPU or network access.
+"""
+import os
+import zlib
+
+import numpy as np
+import soundfile as sf
+
+from model_registry import registry
+from benchmarks.bench_keyword_matcher import build_sentences
+
+SAMPLE_RATE = 16000
+SEGMENT_SECONDS = 4.0
+TURN_SECONDS = 7.0
+
+
+class FakeWhisper:
+    """Emits one segment of canned text per SEGMENT_SECONDS of input."""
+
+    def __init__(self, seed=0):
+        self.sentences = build_sentences(500, seed=seed)
+
+    def transcribe(self, audio, language=None, initial_prompt=None, **kwargs):
+        duration = len(audio) / SAMPLE_RATE
+        segments = []
+        start = 0.0
+        while start < duration:
+            end = min(duration, start + SEGMENT_SECONDS)
+            text = self.sentences[int(start / SEGMENT_SECONDS) % len(self.sentences)]
+            # Confidence from the text, so tiered transcription re-runs a stable share of segments
+            confidence = zlib.crc32(text.encode()) % 1000 / 1000.0
+            segments.append({
+                "start": start, "end": end, "text": " " + text,
+                "avg_logprob": -1.2 * confidence, "no_speech_prob": 0.1 * confidence,
+            })
+            start = end
+        return {"text": "".join(segment["text"] for segment in segments), "segments": segments}
+
+
+class _Turn:
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+
+class _Annotation:
+    def __init__(self, turns):
+        self.turns = turns
+
+    def labels(self):
+        return sorted({speaker for _, speaker in self.turns})
+
+    def itertracks(self, yield_label=False):
+        for turn, speaker in self.turns:
+            yield (turn, None, speaker) if yield_label else (turn, None)
+
+
+class FakeDiarization:
+    """Alternates two speakers every TURN_SECONDS; each speaker has a fixed embedding."""
+
+    def __call__(self, audio, return_embeddings=False):
+        duration = len(audio["waveform"]) / SAMPLE_RATE
+        turns = []
+        start = 0.0
+        while start < duration:
+            end = min(duration, start + TURN_SECONDS)
+            turns.append((_Turn(start, end), f"SPEAKER_{len(turns) % 2:02d}"))
+            start = end
+        annotation = _Annotation(turns)
+        if return_embeddings:
+            return annotation, np.eye(len(annotation.labels()), 8, dtype=np.float32)
+        return annotation
+
+
+class FakeProfanityModel:
+    """Scores by a hash of the token IDs; has the backend .predict(padded) interface."""
+
+    def predict(self, padded):
+        padded = np.asarray(padded, dtype=np.int64)
+        return ((padded.sum(axis=1) * 2654435761) % 1000 / 1000.0).astype(np.float32)
+
+
+class FakeTokenizer:
+    """Maps words to stable IDs without a vocabulary file."""
+
+    def texts_to_sequences(self, texts):
+        return [[zlib.crc32(word.encode()) % 20000 + 1 for word in text.lower().split()] for text in texts]
+
+
+def install_fake_models():
+    """Replaces every heavy model with a fake. VADER stays real; it is cheap and part of what is measured."""
+    import audio_processing
+    import nlp_analysis  # noqa: F401  (registers the real loaders first)
+
+    registry.override("whisper", FakeWhisper())
+    registry.override("whisper_fast", FakeWhisper())
+    registry.override("diarization", FakeDiarization())
+    registry.override("segmentation", None)
+    registry.override("profanity_lstm", FakeProfanityModel())
+    registry.override("tokenizer", FakeTokenizer())
+
+    # The real wrapper converts to a torch tensor; the fake pipeline takes the array as is
+    audio_processing._pyannote_input = lambda audio: {
+        "uri": "waveform", "waveform": audio_processing.load_waveform(audio) if isinstance(audio, str) else audio,
+        "sample_rate": SAMPLE_RATE,
+    }
+
+
+def write_fixture(path, seconds, silence_ratio=0.3, seed=0):
+    """
+    Writes a 16 kHz mono WAV of speech-like bursts (noise shaped by a ~4 Hz
+    syllable envelope) separated by quiet gaps. Same arguments, same file.
+    """
+    rng = np.random.default_rng(seed)
+    samples = int(seconds * SAMPLE_RATE)
+    t = np.arange(samples) / SAMPLE_RATE
+    envelope = 0.5 * (1 + np.sin(2 * np.pi * 4 * t + rng.uniform(0, np.pi)))
+    signal = rng.standard_normal(samples) * envelope * 0.1
+
+    # Knock out a share of 1-3 s stretches to create pauses
+    position = 0
+    while position < samples:
+        length = int(rng.uniform(1, 3) * SAMPLE_RATE)
+        if rng.random() < silence_ratio:
+            signal[position:position + length] *= 0.001
+        position += length
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    sf.write(path, signal.astype(np.float32), SAMPLE_RATE, subtype="PCM_16")
+    return path
@@ -0,0 +1,126 @@
+"""
+Load test for concurrent WebSocket sessions against a running server.
+
+Uploads each audio file once, then opens N /ws-graph subscribers spread over
+the uploads and records time to first point, time to completion and bytes
+received per session. With --server-pid the server's resident memory is
+sampled during the run (Linux).
+
+    uvicorn nlp_trial:app --port 8000 &
+    python -m benchmarks.load_test_sessions sample.wav other.mp3 --sessions 50 --server-pid $!
+
+Requires httpx and websockets.
+"""
+import json
+import time
+import asyncio
+import argparse
+import statistics
+
+import httpx
+import websockets
+
+
+def rss_mb(pid):
+    """Resident set size of a process in MB, from /proc."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+async def upload(client, base_url, path):
+    with open(path, "rb") as f:
+        response = await client.post(f"{base_url}/upload-audio/", files={"file": (path, f, "audio/wav")})
+    response.raise_for_status()
+    return response.json()["upload_id"]
+
+
+async def subscribe(ws_url, upload_id):
+    """Runs one graph session to completion and returns its timings."""
+    start = time.perf_counter()
+    first_point = None
+    received = 0
+    points = 0
+    async with websockets.connect(f"{ws_url}/ws-graph", max_size=None) as ws:
+        await ws.send(json.dumps({"action": "start", "upload_id": upload_id}))
+        async for message in ws:
+            received += len(message)
+            data = json.loads(message)
+            if data.get("type") == "graph_delta":
+                points += len(data["timestamps"])
+                if first_point is None:
+                    first_point = time.perf_counter() - start
+            elif data.get("type") in ("graph_complete", "error"):
+                break
+    return {
+        "first_point_s": first_point,
+        "total_s": time.perf_counter() - start,
+        "bytes": received,
+        "points": points,
+    }
+
+
+async def sample_memory(pid, samples, stop):
+    while not stop.is_set():
+        value = rss_mb(pid)
+        if value is not None:
+            samples.append(value)
+        await asyncio.sleep(0.2)
+
+
+def describe(values, unit):
+    values = [v for v in values if v is not None]
+    if not values:
+        return "n/a"
+    values.sort()
+    p95 = values[max(0, int(len(values) * 0.95) - 1)]
+    return f"p50 {statistics.median(values):.2f}{unit}  p95 {p95:.2f}{unit}  max {values[-1]:.2f}{unit}"
+
+
+async def main_async(args):
+    base_url = args.url.rstrip("/")
+    ws_url = base_url.replace("http", "ws", 1)
+
+    async with httpx.AsyncClient(timeout=None) as client:
+        upload_ids = [await upload(client, base_url, path) for path in args.files]
+    print(f"Uploaded {len(upload_ids)} files; starting {args.sessions} sessions")
+
+    memory = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_memory(args.server_pid, memory, stop)) if args.server_pid else None
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*[
+        subscribe(ws_url, upload_ids[i % len(upload_ids)]) for i in range(args.sessions)
+    ])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    if sampler:
+        await sampler
+
+    print(f"\nSessions:           {len(results)} over {len(upload_ids)} uploads in {elapsed:.1f}s")
+    print(f"Time to first point {describe([r['first_point_s'] for r in results], 's')}")
+    print(f"Time to complete    {describe([r['total_s'] for r in results], 's')}")
+    print(f"Bytes per session   {describe([r['bytes'] / 1024 for r in results], ' KiB')}")
+    print(f"Points per session  {describe([r['points'] for r in results], '')}")
+    if memory:
+        print(f"Server RSS          start {memory[0]:.0f} MB, peak {max(memory):.0f} MB, end {memory[-1]:.0f} MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Audio files to upload")
+    parser.add_argument("--sessions", "-n", type=int, default=20)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--server-pid", type=int, help="Sample this process's RSS during the run")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
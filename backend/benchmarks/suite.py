@@ -0,0 +1,287 @@
+"""
+Reproducible benchmark suite for the whole pipeline.
+
+Covers transcript analysis on synthetic transcripts, process_audio on
+generated audio fixtures, and the upload + WebSocket routes through an
+in-process ASGI client. In --mode fast every heavy model is replaced by a
+deterministic fake (see benchmarks/fakes.py); --mode full uses the real
+models. Results are written as JSON; pass --compare to flag regressions
+against an earlier run.
+
+Run from the backend directory:
+    python -m benchmarks.suite --mode fast --output bench-results/fast.json
+    python -m benchmarks.suite --mode fast --compare bench-results/fast.json --fail-on-regression
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_SIZES = [10, 1000, 10000, 100000]
+
+
+def timed(func, repeats):
+    """Runs func `repeats` times; returns (median seconds, all timings, last result)."""
+    timings = []
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), timings, result
+
+
+def entry(name, seconds, timings, items=None, **extra):
+    record = {"name": name, "seconds": round(seconds, 6), "runs": [round(t, 6) for t in timings]}
+    if items:
+        record["items"] = items
+        record["items_per_s"] = round(items / seconds, 2) if seconds else None
+    record.update(extra)
+    return record
+
+
+def bench_nlp(sizes, repeats, profanity_sample):
+    from nlp_analysis import analyze_transcript, analyze_sentiment, analyze_sentiment_batch, detect_profanity
+    from nlp_analysis import sentence_cache
+    from benchmarks.bench_keyword_matcher import build_sentences
+
+    # Every repeat scores the same transcript; the memo would turn all but the first into hits
+    sentence_cache.max_entries = 0
+    results = []
+    analyze_transcript(" ".join(build_sentences(8, seed=1)))  # warm-up
+    for size in sizes:
+        transcript = " ".join(build_sentences(size, seed=size))
+        seconds, timings, analysis = timed(lambda: analyze_transcript(transcript), repeats)
+        results.append(entry(f"analyze_transcript[n={size}]", seconds, timings, len(analysis)))
+        print(f"  analyze_transcript n={size:<7} {seconds:8.3f}s")
+
+    sentences = build_sentences(profanity_sample, seed=7)
+    sentiments = [analyze_sentiment(sentence) for sentence in sentences]
+    seconds, timings, _ = timed(
+        lambda: [detect_profanity(sentence, sentiment) for sentence, sentiment in zip(sentences, sentiments)],
+        repeats,
+    )
+    results.append(entry(f"detect_profanity[n={profanity_sample}]", seconds, timings, profanity_sample))
+    print(f"  detect_profanity n={profanity_sample:<9} {seconds:8.3f}s")
+
+    sentences = build_sentences(max(sizes), seed=11)
+    seconds, timings, _ = timed(lambda: analyze_sentiment_batch(sentences), repeats)
+    results.append(entry(f"analyze_sentiment_batch[n={len(sentences)}]", seconds, timings, len(sentences)))
+    print(f"  analyze_sentiment_batch n={len(sentences):<2} {seconds:8.3f}s")
+    return results
+
+
+def bench_audio(fixtures, repeats):
+    from audio_processing import process_audio_segments
+    from pipeline import build_entry
+
+    results = []
+    for path, duration in fixtures:
+        stage_runs = []
+
+        def run():
+            timings = {}
+            speakers, segments = process_audio_segments(path, timings)
+            start = time.perf_counter()
+            built = build_entry(speakers, segments)
+            timings["analyze"] = time.perf_counter() - start
+            stage_runs.append(timings)
+            return built
+
+        seconds, timings, built = timed(run, repeats)
+        stages = {
+            stage: round(statistics.median(run_timings[stage] for run_timings in stage_runs), 6)
+            for stage in stage_runs[0]
+        }
+        name = f"process_audio[{os.path.basename(path)}]"
+        results.append(entry(
+            name, seconds, timings, len(built["analysis"]),
+            audio_seconds=round(duration, 2), rtf=round(seconds / duration, 4), stages=stages,
+        ))
+        print(f"  {name:<40} {seconds:8.3f}s  RTF {seconds / duration:.4f}")
+    return results
+
+
+def bench_api(fixture_paths, clients, mode, timeout, workdir):
+    """Uploads and subscribes from `clients` concurrent clients against the app in this process."""
+    from starlette.testclient import TestClient
+    import nlp_trial
+    from jobs import job_manager
+
+    nlp_trial.UPLOAD_FOLDER = os.path.join(workdir, "uploads")
+    if mode == "fast":
+        # Worker processes would load the real models; run jobs on threads that share the fakes
+        job_manager.executor = ThreadPoolExecutor(max_workers=job_manager.max_workers)
+
+    def one_client(client, index):
+        path = fixture_paths[index % len(fixture_paths)]
+        start = time.perf_counter()
+        with open(path, "rb") as f:
+            response = client.post("/upload-audio/", files={"file": (os.path.basename(path), f, "audio/wav")})
+        response.raise_for_status()
+        upload = response.json()
+        upload_s = time.perf_counter() - start
+
+        first_delta = None
+        points = 0
+        ws_start = time.perf_counter()
+        with client.websocket_connect("/ws-graph") as ws:
+            ws.send_text(json.dumps({"action": "start", "upload_id": upload["upload_id"]}))
+            while True:
+                message = ws.receive_json()
+                if message.get("type") == "graph_delta":
+                    points += len(message["timestamps"])
+                    if first_delta is None:
+                        first_delta = time.perf_counter() - ws_start
+                elif message.get("type") in ("graph_complete", "error"):
+                    break
+        ws_s = time.perf_counter() - ws_start
+
+        deadline = time.perf_counter() + timeout
+        status = upload["status"]
+        while status not in ("done", "failed") and time.perf_counter() < deadline:
+            time.sleep(0.05)
+            status = client.get(f"/jobs/{upload['job_id']}").json()["status"]
+        return {
+            "upload_s": upload_s,
+            "ws_first_delta_s": first_delta,
+            "ws_total_s": ws_s,
+            "job_total_s": time.perf_counter() - start,
+            "job_status": status,
+            "points": points,
+        }
+
+    with TestClient(nlp_trial.app) as client:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as executor:
+            runs = list(executor.map(lambda i: one_client(client, i), range(clients)))
+        elapsed = time.perf_counter() - start
+        metrics_text = client.get("/metrics").text
+
+    results = [entry(f"api_load[clients={clients}]", elapsed, [elapsed], clients,
+                     failed_jobs=sum(1 for run in runs if run["job_status"] != "done"))]
+    for key in ("upload_s", "ws_first_delta_s", "ws_total_s", "job_total_s"):
+        values = sorted(run[key] for run in runs if run[key] is not None)
+        if values:
+            p95 = values[max(0, int(len(values) * 0.95) - 1)]
+            results.append(entry(f"api_load[clients={clients}].{key}.p50", statistics.median(values), values))
+            results.append(entry(f"api_load[clients={clients}].{key}.p95", p95, values))
+    print(f"  api_load clients={clients:<4} {elapsed:8.3f}s")
+    return results, metrics_text
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Prints entries slower than the baseline by more than `threshold`; returns how many there were."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {record["name"]: record for record in json.load(f)["results"]}
+
+    regressions = 0
+    print(f"\nCompared with {baseline_path} (threshold {threshold:.0%}):")
+    for record in results:
+        previous = baseline.get(record["name"])
+        if not previous or not previous["seconds"]:
+            continue
+        change = record["seconds"] / previous["seconds"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"  {record['name']:<48} {previous['seconds']:9.3f}s -> {record['seconds']:9.3f}s {change:+7.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=["fast", "full"], default="fast")
+    parser.add_argument("--only", nargs="+", choices=["nlp", "audio", "api"], default=["nlp", "audio", "api"])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Transcript sizes in sentences")
+    parser.add_argument("--profanity-sample", type=int, default=10000, help="Sentences for detect_profanity")
+    parser.add_argument("--audio", nargs="*", default=[], help="Extra audio files to benchmark")
+    parser.add_argument("--fixture-seconds", type=float, nargs="+", default=[10, 60])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=600, help="Per-job wait in the API load test")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="JSON file for the results")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown counted as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="echo-bench-")
+    # Cached results from earlier runs would skip the work being measured; use a fresh cache
+    os.environ["ECHO_CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ.setdefault("ECHO_WARM_MODELS", "0")
+
+    if args.mode == "fast":
+        from benchmarks.fakes import install_fake_models
+        install_fake_models()
+
+    from benchmarks.fakes import write_fixture, SAMPLE_RATE
+    import soundfile as sf
+
+    fixtures = [
+        (write_fixture(os.path.join(workdir, f"fixture-{int(seconds)}s.wav"), seconds, seed=args.seed), seconds)
+        for seconds in args.fixture_seconds
+    ]
+    for path in args.audio:
+        fixtures.append((path, sf.info(path).frames / sf.info(path).samplerate))
+
+    results = []
+    metrics_text = None
+    if "nlp" in args.only:
+        print("Transcript analysis")
+        results += bench_nlp(args.sizes, args.repeats, args.profanity_sample)
+    if "audio" in args.only:
+        print("process_audio")
+        results += bench_audio(fixtures, args.repeats)
+    if "api" in args.only:
+        print("Upload + WebSocket routes")
+        # Distinct audio per client, so every upload is processed rather than answered from the cache
+        api_fixtures = [
+            write_fixture(os.path.join(workdir, f"client-{i}.wav"), args.fixture_seconds[0], seed=args.seed + i + 1)
+            for i in range(args.clients)
+        ]
+        api_results, metrics_text = bench_api(api_fixtures, args.clients, args.mode, args.timeout, workdir)
+        results += api_results
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "mode": args.mode,
+            "git_revision": git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "sample_rate": SAMPLE_RATE,
+            "args": vars(args),
+        },
+        "results": results,
+        "metrics": metrics_text,
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {len(results)} results to {args.output}")
+
+    regressions = compare(results, args.compare, args.threshold) if args.compare else 0
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
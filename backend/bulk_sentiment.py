@@ -0,0 +1,292 @@
+"""
+Vectorized VADER scoring for many sentences at once.
+
+NLTK's SentimentIntensityAnalyzer scores one sentence at a time in pure
+Python. BulkVader gives the same polarity_scores dicts for a whole batch.
+Only tokenization runs per sentence. Each distinct token gets an integer ID
+with precomputed features (lexicon valence, booster scalar, negation, caps).
+The tokens of all sentences are then laid out as one flat, ragged array,
+and VADER's rules run over it as NumPy array operations. These rules are
+caps emphasis, the three-token booster/negation window, "never so", idioms,
+"least", "but" and punctuation emphasis. VADER's quirks are kept as well,
+e.g. a repeated token is scored at its first occurrence. Results match
+polarity_scores up to float summation order.
+"""
+import string
+import threading
+
+import numpy as np
+
+# Per-token feature bits
+LEXICON = 1
+BOOSTER = 2
+NEGATION = 4
+ALL_CAPS = 8
+KIND = 16
+OF = 32
+NEVER = 64
+SO_THIS = 128
+LEAST = 256
+AT_VERY = 512
+BUT = 1024
+
+# Distinct tokens remembered between batches before the vocabulary is reset
+MAX_VOCABULARY = 200_000
+
+
+class BulkVader:
+    """Batch equivalent of SentimentIntensityAnalyzer.polarity_scores, built from a loaded analyzer."""
+
+    def __init__(self, analyzer, max_vocabulary=MAX_VOCABULARY):
+        self.lexicon = analyzer.lexicon
+        self.constants = analyzer.constants
+        self.strip_punctuation = self.constants.REGEX_REMOVE_PUNCTUATION
+        self.punc_list = set(self.constants.PUNC_LIST)
+        self.max_vocabulary = max_vocabulary
+        self.idioms = [(key.split(" "), value) for key, value in self.constants.SPECIAL_CASE_IDIOMS.items()]
+        # "kind of" / "sort of" style boosters are only ever looked up as raw bigrams
+        self.booster_bigrams = [(key.split(" "), 1.0) for key in self.constants.BOOSTER_DICT if " " in key]
+        # The registry shares one instance across threads; guards vocabulary growth and resets
+        self.lock = threading.Lock()
+        self._reset_vocabulary()
+
+    def _reset_vocabulary(self):
+        self.ids = {}
+        self.valence = np.zeros(1024)
+        self.boost = np.zeros(1024)
+        self.flags = np.zeros(1024, dtype=np.int32)
+
+    def _add(self, token):
+        # Called with self.lock held. Growing swaps in new arrays and never rewrites an
+        # existing entry, so a batch can keep reading the arrays it started with.
+        index = len(self.ids)
+        if index == len(self.flags):
+            self.valence = np.concatenate([self.valence, np.zeros(index)])
+            self.boost = np.concatenate([self.boost, np.zeros(index)])
+            self.flags = np.concatenate([self.flags, np.zeros(index, dtype=np.int32)])
+        self.ids[token] = index
+
+        c = self.constants
+        lower = token.lower()
+        flags = 0
+        if lower in self.lexicon:
+            flags |= LEXICON
+            self.valence[index] = self.lexicon[lower]
+        if lower in c.BOOSTER_DICT:
+            flags |= BOOSTER
+            self.boost[index] = c.BOOSTER_DICT[lower]
+        if lower in c.NEGATE or "n't" in lower:
+            flags |= NEGATION
+        if token.isupper():
+            flags |= ALL_CAPS
+        if lower == "kind":
+            flags |= KIND
+        if lower == "of":
+            flags |= OF
+        # VADER compares these case-sensitively
+        if token == "never":
+            flags |= NEVER
+        if token in ("so", "this"):
+            flags |= SO_THIS
+        if lower == "least":
+            flags |= LEAST
+        if lower in ("at", "very"):
+            flags |= AT_VERY
+        if lower == "but":
+            flags |= BUT
+        self.flags[index] = flags
+        return index
+
+    def tokens(self, text):
+        """VADER's words_and_emoticons: whitespace tokens longer than one character, minus a single
+        leading or trailing PUNC_LIST item when what is left is a word of the text."""
+        if not isinstance(text, str):
+            text = str(text.encode("utf-8"))
+        words = [word for word in text.split() if len(word) > 1]
+        bare = None
+        for i, word in enumerate(words):
+            stripped = word.strip(string.punctuation)
+            if stripped == word or not stripped:
+                continue
+            if bare is None:
+                bare = {w for w in self.strip_punctuation.sub("", text).split() if len(w) > 1}
+            # A bare word has no punctuation, so the stripped item is the whole leading or trailing run
+            lead = len(word) - len(word.lstrip(string.punctuation))
+            trail = len(word) - len(word.rstrip(string.punctuation))
+            if lead and word[:lead] in self.punc_list and word[lead:] in bare:
+                words[i] = word[lead:]
+            elif trail and word[-trail:] in self.punc_list and word[:-trail] in bare:
+                words[i] = word[:-trail]
+        return words
+
+    def polarity_scores_batch(self, texts):
+        """Returns one polarity_scores dict (neg, neu, pos, compound) per text."""
+        texts = [text if isinstance(text, str) else str(text.encode("utf-8")) for text in texts]
+        rows = [self.tokens(text) for text in texts]
+        counts = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+
+        with self.lock:
+            if len(self.ids) > self.max_vocabulary:
+                self._reset_vocabulary()
+            ids, add = self.ids, self._add
+            token_ids = []
+            for row in rows:
+                for token in row:
+                    index = ids.get(token)
+                    token_ids.append(add(token) if index is None else index)
+            # This batch's view of the vocabulary; other threads may grow or reset it from here on
+            vocabulary = (ids, self.flags, self.valence, self.boost)
+        token_ids = np.asarray(token_ids, dtype=np.int64)
+
+        sentence = np.repeat(np.arange(len(rows)), counts)
+        starts = np.cumsum(counts) - counts
+        position = np.arange(len(token_ids)) - starts[sentence]
+        length = counts[sentence]
+
+        valences = self._valences(vocabulary, token_ids, sentence, position, length)
+        return self._score(texts, valences, sentence, counts)
+
+    def _phrases(self, ids, token_ids, position, length, phrases, size):
+        """Value of the size-token phrase starting at each token, NaN where none starts there."""
+        values = np.full(len(token_ids), np.nan)
+        fits = position + size <= length
+        for words, value in phrases:
+            if len(words) != size:
+                continue
+            word_ids = [ids.get(word) for word in words]
+            if None in word_ids:
+                continue
+            match = fits & (token_ids == word_ids[0])
+            for offset in range(1, size):
+                match[:-offset] &= token_ids[offset:] == word_ids[offset]
+            values[match] = value
+        return values
+
+    def _valences(self, vocabulary, token_ids, sentence, position, length):
+        """Per-token valence after every VADER rule, in sentence order."""
+        c = self.constants
+        ids, token_flags, token_valence, token_boost = vocabulary
+        n = len(token_ids)
+        if n == 0:
+            return np.zeros(0)
+        flat = np.arange(n)
+
+        def shifted(offset):
+            # Flat index of the token `offset` places away; callers mask out other sentences
+            return np.clip(flat + offset, 0, n - 1)
+
+        flags = token_flags[token_ids]
+        before = {distance: flags[shifted(-distance)] for distance in (1, 2, 3)}
+        in_lexicon = (flags & LEXICON) != 0
+
+        # VADER's allcap_differential: some, but not all, tokens of the sentence are ALL CAPS
+        caps_tokens = np.bincount(sentence, weights=(flags & ALL_CAPS) != 0)[sentence]
+        cap_differential = (caps_tokens > 0) & (caps_tokens < length)
+
+        valence = np.where(in_lexicon, token_valence[token_ids], 0.0)
+        emphasized = in_lexicon & ((flags & ALL_CAPS) != 0) & cap_differential
+        valence = np.where(emphasized, np.where(valence > 0, valence + c.C_INCR, valence - c.C_INCR), valence)
+
+        bigrams = self._phrases(ids, token_ids, position, length, self.idioms, 2)
+        trigrams = self._phrases(ids, token_ids, position, length, self.idioms, 3)
+        booster_bigrams = self._phrases(ids, token_ids, position, length, self.booster_bigrams, 2)
+
+        for start_i, damping in enumerate((1.0, 0.95, 0.9)):
+            distance = start_i + 1
+            previous = before[distance]
+            window = in_lexicon & (position > start_i) & ((previous & LEXICON) == 0)
+
+            # scalar_inc_dec
+            is_booster = (previous & BOOSTER) != 0
+            scalar = np.where(is_booster, token_boost[token_ids[shifted(-distance)]], 0.0)
+            scalar = np.where(valence < 0, -scalar, scalar)
+            caps = is_booster & ((previous & ALL_CAPS) != 0) & cap_differential
+            scalar = np.where(caps, np.where(valence > 0, scalar + c.C_INCR, scalar - c.C_INCR), scalar)
+            valence = np.where(window, valence + scalar * damping, valence)
+
+            # _never_check
+            negated = window & ((previous & NEGATION) != 0)
+            if start_i == 0:
+                valence = np.where(negated, valence * c.N_SCALAR, valence)
+                continue
+            if start_i == 1:
+                never_so = ((before[2] & NEVER) != 0) & ((before[1] & SO_THIS) != 0)
+                factor = 1.5
+            else:
+                never_so = (((before[3] & NEVER) != 0) & ((before[2] & SO_THIS) != 0)) | ((before[1] & SO_THIS) != 0)
+                factor = 1.25
+            never_so &= window
+            valence = np.where(never_so, valence * factor, np.where(negated, valence * c.N_SCALAR, valence))
+
+            if start_i == 2:
+                valence = np.where(window, self._idioms(valence, bigrams, trigrams, booster_bigrams, shifted),
+                                   valence)
+
+        # _least_check
+        least = ((before[1] & LEXICON) == 0) & ((before[1] & LEAST) != 0)
+        far = position > 1
+        valence = np.where(in_lexicon & far & least & ((before[2] & AT_VERY) == 0), valence * c.N_SCALAR, valence)
+        valence = np.where(in_lexicon & ~far & (position > 0) & least, valence * c.N_SCALAR, valence)
+
+        # Boosters and "kind of" carry no valence of their own
+        kind_of = ((flags & KIND) != 0) & (position + 1 < length) & ((flags[shifted(1)] & OF) != 0)
+        valence = np.where(((flags & BOOSTER) != 0) | kind_of, 0.0, valence)
+
+        # polarity_scores looks a token up by its first index, so repeats get the first occurrence's score
+        key = sentence * (len(ids) + 1) + token_ids
+        _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        valence = valence[first[inverse.reshape(-1)]]
+
+        # _but_check: halve everything before the first "but", boost everything after it
+        is_but = (flags & BUT) != 0
+        first_but = np.full(sentence[-1] + 1, np.iinfo(np.int64).max)
+        np.minimum.at(first_but, sentence[is_but], position[is_but])
+        but_at = first_but[sentence]
+        has_but = but_at < np.iinfo(np.int64).max
+        valence = np.where(has_but & (position < but_at), valence * 0.5, valence)
+        valence = np.where(has_but & (position > but_at), valence * 1.5, valence)
+        return valence
+
+    def _idioms(self, valence, bigrams, trigrams, booster_bigrams, shifted):
+        # The first matching preceding sequence wins, then phrases starting at the token override it
+        idiom = np.full(len(valence), np.nan)
+        for offset, table in ((-1, bigrams), (-2, trigrams), (-2, bigrams), (-3, trigrams), (-3, bigrams)):
+            idiom = np.where(np.isnan(idiom), table[shifted(offset)], idiom)
+        valence = np.where(np.isnan(idiom), valence, idiom)
+        valence = np.where(np.isnan(bigrams), valence, bigrams)
+        valence = np.where(np.isnan(trigrams), valence, trigrams)
+        dampened = ~np.isnan(booster_bigrams[shifted(-3)]) | ~np.isnan(booster_bigrams[shifted(-2)])
+        return np.where(dampened, valence + self.constants.B_DECR, valence)
+
+    def _score(self, texts, valences, sentence, counts):
+        """score_valence for every sentence at once."""
+        size = len(texts)
+        exclamations = np.minimum([text.count("!") for text in texts], 4) * 0.292
+        questions = np.array([text.count("?") for text in texts], dtype=np.float64)
+        questions = np.where(questions > 3, 0.96, np.where(questions > 1, questions * 0.18, 0.0))
+        amplifier = exclamations + questions
+
+        total = np.bincount(sentence, weights=valences, minlength=size)
+        total = np.where(total > 0, total + amplifier, np.where(total < 0, total - amplifier, total))
+        compound = total / np.sqrt(total * total + 15)
+
+        pos_sum = np.bincount(sentence, weights=np.where(valences > 0, valences + 1, 0.0), minlength=size)
+        neg_sum = np.bincount(sentence, weights=np.where(valences < 0, valences - 1, 0.0), minlength=size)
+        neu_count = np.bincount(sentence, weights=valences == 0, minlength=size)
+        more_positive = pos_sum > np.abs(neg_sum)
+        more_negative = pos_sum < np.abs(neg_sum)
+        pos_sum = np.where(more_positive, pos_sum + amplifier, pos_sum)
+        neg_sum = np.where(more_negative, neg_sum - amplifier, neg_sum)
+
+        # Sentences without tokens score all zeros, as in polarity_scores
+        scored = counts > 0
+        denominator = np.where(scored, pos_sum + np.abs(neg_sum) + neu_count, 1.0)
+        pos = np.where(scored, np.abs(pos_sum / denominator), 0.0)
+        neg = np.where(scored, np.abs(neg_sum / denominator), 0.0)
+        neu = np.where(scored, np.abs(neu_count / denominator), 0.0)
+        compound = np.where(scored, compound, 0.0)
+
+        return [
+            {"neg": round(n, 3), "neu": round(u, 3), "pos": round(p, 3), "compound": round(cp, 4)}
+            for n, u, p, cp in zip(neg.tolist(), neu.tolist(), pos.tolist(), compound.tolist())
+        ]
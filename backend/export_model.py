@@ -0,0 +1,129 @@
+"""
+Exports the trained profanity LSTM for TensorFlow-free serving.
+
+Writes an ONNX model (optionally also an int8 dynamically quantized copy),
+a NumPy weights archive for the pure NumPy backend, and the tokenizer
+vocabulary as JSON. new_model.py calls export_all() after training; an
+existing .h5 model can be converted without retraining:
+
+    python export_model.py --quantize
+"""
+import argparse
+import json
+import numpy as np
+
+from inference_backends import (
+    ONNX_MODEL_PATH,
+    QUANTIZED_ONNX_MODEL_PATH,
+    NUMPY_WEIGHTS_PATH,
+    TOKENIZER_VOCAB_PATH,
+)
+
+MAX_SEQUENCE_LENGTH = 50
+
+
+def export_onnx(model, output_path=ONNX_MODEL_PATH, max_length=MAX_SEQUENCE_LENGTH):
+    import tensorflow as tf
+    import tf2onnx
+
+    signature = [tf.TensorSpec((None, max_length), tf.int32, name="input_ids")]
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=13, output_path=output_path)
+    print(f"✅ ONNX model written to {output_path}")
+    return output_path
+
+
+def quantize_onnx(input_path=ONNX_MODEL_PATH, output_path=QUANTIZED_ONNX_MODEL_PATH):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(input_path, output_path, weight_type=QuantType.QInt8)
+    print(f"✅ int8 ONNX model written to {output_path}")
+    return output_path
+
+
+def extract_weights(model):
+    """Collects the layer weights the NumPy backend needs, keyed by role."""
+    from tensorflow.keras import layers
+
+    def of_type(cls):
+        return [layer for layer in model.layers if isinstance(layer, cls)]
+
+    (embedding,) = of_type(layers.Embedding)
+    lstm1, lstm2 = of_type(layers.LSTM)
+    (attention,) = of_type(layers.MultiHeadAttention)
+    (layer_norm,) = of_type(layers.LayerNormalization)
+    dense1, dense2 = of_type(layers.Dense)
+
+    weights = {"embedding": embedding.get_weights()[0]}
+    for prefix, lstm in (("lstm1", lstm1), ("lstm2", lstm2)):
+        kernel, recurrent, bias = lstm.get_weights()
+        weights[f"{prefix}_kernel"] = kernel
+        weights[f"{prefix}_recurrent"] = recurrent
+        weights[f"{prefix}_bias"] = bias
+
+    for weight in attention.weights:
+        path = getattr(weight, "path", weight.name)
+        part = next(name for name in ("query", "key", "value", "attention_output") if f"{name}/" in path)
+        kind = "kernel" if "kernel" in path else "bias"
+        weights[f"mha_{'output' if part == 'attention_output' else part}_{kind}"] = np.asarray(weight.numpy())
+
+    gamma, beta = layer_norm.get_weights()
+    weights["ln_gamma"] = gamma
+    weights["ln_beta"] = beta
+    weights["ln_epsilon"] = np.float32(layer_norm.epsilon)
+
+    for prefix, dense in (("dense1", dense1), ("dense2", dense2)):
+        kernel, bias = dense.get_weights()
+        weights[f"{prefix}_kernel"] = kernel
+        weights[f"{prefix}_bias"] = bias
+
+    return weights
+
+
+def export_numpy(model, output_path=NUMPY_WEIGHTS_PATH):
+    np.savez(output_path, **extract_weights(model))
+    print(f"✅ NumPy weights written to {output_path}")
+    return output_path
+
+
+def export_tokenizer(tokenizer, output_path=TOKENIZER_VOCAB_PATH):
+    config = {
+        "word_index": tokenizer.word_index,
+        "oov_token": tokenizer.oov_token,
+        "num_words": tokenizer.num_words,
+        "lower": tokenizer.lower,
+        "split": tokenizer.split,
+        "filters": tokenizer.filters,
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    print(f"✅ Tokenizer vocabulary written to {output_path}")
+    return output_path
+
+
+def export_all(model, tokenizer, quantize=False):
+    """Writes every serving artifact for the given Keras model and tokenizer."""
+    export_tokenizer(tokenizer)
+    export_numpy(model)
+    try:
+        export_onnx(model)
+        if quantize:
+            quantize_onnx()
+    except ImportError as e:
+        print(f"⚠️ Skipping ONNX export ({e}); install tf2onnx and onnxruntime to enable it")
+
+
+def main():
+    import joblib
+    from keras.models import load_model
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="profanity_lstm_model.h5")
+    parser.add_argument("--tokenizer", default="tokenizer.joblib")
+    parser.add_argument("--quantize", action="store_true", help="Also write an int8 quantized ONNX model")
+    args = parser.parse_args()
+
+    export_all(load_model(args.model), joblib.load(args.tokenizer), quantize=args.quantize)
+
+
+if __name__ == "__main__":
+    main()
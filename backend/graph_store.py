@@ -0,0 +1,108 @@
+"""
+Compact storage and incremental delivery of real-time graph points.
+
+Points live in typed arrays (int32 timestamps, float32 sentiment, uint8
+profanity flags) instead of Python lists. Each point's position is its
+sequence number, so a client that knows the last sequence it received can
+ask for just the points after it.
+"""
+from array import array
+
+import numpy as np
+
+
+class GraphSeries:
+    """Append-only, array-backed columns for one analysis run."""
+
+    def __init__(self):
+        self.timestamps = array("i")
+        self.sentiment_scores = array("f")
+        self.profanity_flags = array("B")
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def append(self, timestamp, sentiment_score, is_profane):
+        self.timestamps.append(timestamp)
+        self.sentiment_scores.append(sentiment_score)
+        self.profanity_flags.append(1 if is_profane else 0)
+        return len(self.timestamps)
+
+    def since(self, seq):
+        """Returns the points after sequence number `seq` as a delta message."""
+        end = len(self)
+        return {
+            "type": "graph_delta",
+            "seq": seq,
+            "next_seq": end,
+            "timestamps": self.timestamps[seq:end].tolist(),
+            "sentiment_scores": [round(score, 4) for score in self.sentiment_scores[seq:end]],
+            "profanity_flags": self.profanity_flags[seq:end].tolist(),
+        }
+
+    def columns(self):
+        """Zero-copy NumPy views of the columns."""
+        return (
+            np.frombuffer(self.timestamps, dtype=np.int32),
+            np.frombuffer(self.sentiment_scores, dtype=np.float32),
+            np.frombuffer(self.profanity_flags, dtype=np.uint8),
+        )
+
+    def summary(self, buckets=200, method="lttb"):
+        """Downsampled view of the whole series for zoomed-out charts."""
+        timestamps, scores, flags = self.columns()
+        if method == "minmax":
+            return {"type": "graph_summary", "method": "minmax", **minmax_buckets(timestamps, scores, flags, buckets)}
+
+        indices = lttb_indices(timestamps.astype(np.float64), scores.astype(np.float64), buckets)
+        return {
+            "type": "graph_summary",
+            "method": "lttb",
+            "timestamps": timestamps[indices].tolist(),
+            "sentiment_scores": np.round(scores[indices], 4).tolist(),
+            "profanity_flags": flags[indices].tolist(),
+        }
+
+
+def lttb_indices(x, y, threshold):
+    """Largest-Triangle-Three-Buckets: indices of `threshold` points that keep the series' shape."""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.int64)
+
+    previous = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket is the third triangle corner
+        next_start, next_end = end, edges[bucket + 2] if bucket + 2 < len(edges) else n
+        next_x = x[next_start:max(next_end, next_start + 1)].mean()
+        next_y = y[next_start:max(next_end, next_start + 1)].mean()
+
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(area.argmax())
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def minmax_buckets(timestamps, scores, flags, buckets):
+    """Per bucket: first timestamp, min and max sentiment, and how many points were profane."""
+    n = len(scores)
+    if n == 0:
+        return {"timestamps": [], "min_scores": [], "max_scores": [], "profane_counts": []}
+
+    starts = np.unique(np.linspace(0, n, min(buckets, n), endpoint=False).astype(np.int64))
+    return {
+        "timestamps": timestamps[starts].tolist(),
+        "min_scores": np.round(np.minimum.reduceat(scores, starts), 4).tolist(),
+        "max_scores": np.round(np.maximum.reduceat(scores, starts), 4).tolist(),
+        "profane_counts": np.add.reduceat(flags.astype(np.int64), starts).tolist(),
+    }
@@ -0,0 +1,181 @@
+"""
+Interchangeable inference backends for the profanity LSTM.
+
+Every backend takes a padded int32 matrix of shape (batch, MAX_SEQUENCE_LENGTH)
+and returns a float32 vector of profanity probabilities. fixed_batch is True when
+the backend should always get the same batch size (Keras retraces its graph for
+new shapes); the others take any batch size and are not padded. Only the Keras backend
+imports TensorFlow; the ONNX and NumPy backends serve the artifacts written by
+export_model.py.
+"""
+import json
+import re
+import numpy as np
+
+# Default artifact names written by export_model.py next to the Keras model
+ONNX_MODEL_PATH = "profanity_lstm_model.onnx"
+QUANTIZED_ONNX_MODEL_PATH = "profanity_lstm_model.int8.onnx"
+NUMPY_WEIGHTS_PATH = "profanity_lstm_weights.npz"
+TOKENIZER_VOCAB_PATH = "tokenizer_vocab.json"
+
+
+class KerasBackend:
+    name = "keras"
+    fixed_batch = True
+
+    def __init__(self, model_path):
+        # TensorFlow is only imported once the LSTM is actually needed
+        import tensorflow as tf
+        from keras.models import load_model
+
+        # Ensure TensorFlow uses CPU if GPU is unavailable
+        if not tf.config.experimental.list_physical_devices('GPU'):
+            print("Using CPU for TensorFlow operations.")
+        self.model = load_model(model_path)
+        self.files = [model_path]
+
+    def predict(self, padded):
+        return np.asarray(self.model.predict_on_batch(padded), dtype=np.float32)[:, 0]
+
+
+class OnnxBackend:
+    name = "onnx"
+    fixed_batch = False
+
+    def __init__(self, model_path):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        self.files = [model_path]
+
+    def predict(self, padded):
+        outputs = self.session.run(None, {self.input_name: padded.astype(np.int32, copy=False)})
+        return np.asarray(outputs[0], dtype=np.float32)[:, 0]
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-x))
+
+
+def _lstm(inputs, kernel, recurrent, bias, return_sequences):
+    """Keras LSTM forward pass (gate order i, f, c, o; tanh / sigmoid activations)."""
+    batch, steps, _ = inputs.shape
+    units = recurrent.shape[0]
+    h = np.zeros((batch, units), dtype=np.float32)
+    c = np.zeros((batch, units), dtype=np.float32)
+
+    # Input projections for every time step in one matrix multiply
+    projected = inputs @ kernel + bias
+    outputs = np.empty((batch, steps, units), dtype=np.float32) if return_sequences else None
+
+    for t in range(steps):
+        z = projected[:, t] + h @ recurrent
+        i = _sigmoid(z[:, :units])
+        f = _sigmoid(z[:, units:2 * units])
+        g = np.tanh(z[:, 2 * units:3 * units])
+        o = _sigmoid(z[:, 3 * units:])
+        c = f * c + i * g
+        h = o * np.tanh(c)
+        if return_sequences:
+            outputs[:, t] = h
+
+    return outputs if return_sequences else h
+
+
+class NumpyBackend:
+    """
+    Pure NumPy re-implementation of the network built in new_model.py:
+    Embedding -> LSTM(64) -> MultiHeadAttention(2 heads) -> LayerNorm -> LSTM(32) -> Dense(16) -> Dense(1).
+    """
+    name = "numpy"
+    fixed_batch = False
+
+    def __init__(self, weights_path):
+        with np.load(weights_path) as weights:
+            self.w = {key: weights[key].astype(np.float32) for key in weights.files}
+        self.key_dim = self.w["mha_query_kernel"].shape[-1]
+        self.layer_norm_epsilon = float(self.w.get("ln_epsilon", np.float32(1e-3)))
+        self.files = [weights_path]
+
+    def _attention(self, x):
+        w = self.w
+        query = np.einsum("btd,dhk->bthk", x, w["mha_query_kernel"]) + w["mha_query_bias"]
+        key = np.einsum("btd,dhk->bthk", x, w["mha_key_kernel"]) + w["mha_key_bias"]
+        value = np.einsum("btd,dhk->bthk", x, w["mha_value_kernel"]) + w["mha_value_bias"]
+
+        scores = np.einsum("bshk,bthk->bhts", key, query / np.sqrt(self.key_dim))
+        scores -= scores.max(axis=-1, keepdims=True)
+        weights = np.exp(scores)
+        weights /= weights.sum(axis=-1, keepdims=True)
+
+        context = np.einsum("bhts,bshk->bthk", weights, value)
+        return np.einsum("bthk,hko->bto", context, w["mha_output_kernel"]) + w["mha_output_bias"]
+
+    def _layer_norm(self, x):
+        mean = x.mean(axis=-1, keepdims=True)
+        variance = x.var(axis=-1, keepdims=True)
+        return (x - mean) / np.sqrt(variance + self.layer_norm_epsilon) * self.w["ln_gamma"] + self.w["ln_beta"]
+
+    def predict(self, padded):
+        w = self.w
+        x = w["embedding"][padded]
+        x = _lstm(x, w["lstm1_kernel"], w["lstm1_recurrent"], w["lstm1_bias"], return_sequences=True)
+        x = self._layer_norm(self._attention(x))
+        x = _lstm(x, w["lstm2_kernel"], w["lstm2_recurrent"], w["lstm2_bias"], return_sequences=False)
+        x = np.maximum(x @ w["dense1_kernel"] + w["dense1_bias"], 0.0)
+        return _sigmoid(x @ w["dense2_kernel"] + w["dense2_bias"])[:, 0].astype(np.float32)
+
+
+class VocabTokenizer:
+    """
+    Reproduces Keras Tokenizer.texts_to_sequences from an exported vocabulary,
+    so serving does not need to unpickle a Keras object.
+    """
+
+    def __init__(self, vocab_path):
+        with open(vocab_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        self.word_index = config["word_index"]
+        self.oov_index = self.word_index.get(config["oov_token"]) if config.get("oov_token") else None
+        self.num_words = config.get("num_words")
+        self.lower = config.get("lower", True)
+        self.split = config.get("split", " ")
+        filters = config.get("filters", "")
+        self.filter_pattern = re.compile("[" + re.escape(filters) + "]") if filters else None
+
+    def _words(self, text):
+        if self.lower:
+            text = text.lower()
+        if self.filter_pattern is not None:
+            text = self.filter_pattern.sub(self.split, text)
+        return [word for word in text.split(self.split) if word]
+
+    def texts_to_sequences(self, texts):
+        sequences = []
+        for text in texts:
+            sequence = []
+            for word in self._words(text):
+                index = self.word_index.get(word)
+                if index is not None and (not self.num_words or index < self.num_words):
+                    sequence.append(index)
+                elif self.oov_index is not None:
+                    sequence.append(self.oov_index)
+            sequences.append(sequence)
+        return sequences
+
+
+BACKENDS = {
+    "keras": KerasBackend,
+    "onnx": OnnxBackend,
+    "numpy": NumpyBackend,
+}
+
+
+def load_backend(name, path):
+    """Instantiates the named backend from its model artifact."""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown profanity backend {name!r}; choose from {sorted(BACKENDS)}")
+    return BACKENDS[name](path)
@@ -0,0 +1,144 @@
+"""
+Upload ingestion: stream the body to disk in chunks, hash it on the fly,
+validate the format from its first bytes, and decode it exactly once into a
+16 kHz mono float32 .npy file. Later stages memory-map that file instead of
+decoding the MP3/WAV again.
+
+Files are stored by content hash, so uploading the same audio twice stores
+and decodes it once.
+"""
+import os
+import uuid
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+from starlette.concurrency import run_in_threadpool
+
+from audio_processing import load_waveform, SAMPLE_RATE
+
+CHUNK_SIZE = 1024 * 1024
+# Bytes sniff_format looks at; streamed bodies may deliver them over several chunks
+SNIFF_BYTES = 16
+MAX_UPLOAD_BYTES = int(os.getenv("ECHO_MAX_UPLOAD_BYTES", 500 * 1024 * 1024))
+
+
+class UploadRejected(Exception):
+    """Raised when an upload cannot be accepted; carries the HTTP status to return."""
+
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+@dataclass
+class IngestedAudio:
+    digest: str
+    audio_path: str
+    waveform_path: str
+    audio_format: str
+    size: int
+    duration: float
+
+
+def sniff_format(head):
+    """Identifies the container from the first bytes of a file; returns an extension or None."""
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"fLaC":
+        return "flac"
+    if head[:4] == b"OggS":
+        return "ogg"
+    if head[4:8] == b"ftyp":
+        return "m4a"
+    if head[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return None
+
+
+async def ingest_chunks(chunks, upload_folder, max_bytes=MAX_UPLOAD_BYTES):
+    """
+    Consumes an async iterator of byte chunks and returns an IngestedAudio.
+    Raises UploadRejected for unknown formats, oversized bodies and undecodable audio.
+    """
+    os.makedirs(upload_folder, exist_ok=True)
+    tmp_path = os.path.join(upload_folder, f".incoming-{uuid.uuid4().hex}")
+    digest = hashlib.sha256()
+    audio_format = None
+    head = b""
+    size = 0
+
+    try:
+        with open(tmp_path, "wb") as buffer:
+            async for chunk in chunks:
+                if not chunk:
+                    continue
+                if audio_format is None:
+                    head += chunk[:SNIFF_BYTES - len(head)]
+                    if len(head) >= SNIFF_BYTES:
+                        audio_format = _require_format(head)
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadRejected(f"Upload exceeds {max_bytes} bytes", 413)
+                digest.update(chunk)
+                await run_in_threadpool(buffer.write, chunk)
+
+        if size == 0:
+            raise UploadRejected("Empty upload", 400)
+        if audio_format is None:
+            audio_format = _require_format(head)  # the whole upload is shorter than SNIFF_BYTES
+
+        content_digest = digest.hexdigest()
+        audio_path = os.path.join(upload_folder, f"{content_digest}.{audio_format}")
+        if os.path.exists(audio_path):
+            os.remove(tmp_path)  # same bytes were uploaded before
+        else:
+            os.replace(tmp_path, audio_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    waveform_path = os.path.join(upload_folder, f"{content_digest}.f32.npy")
+    if not os.path.exists(waveform_path):
+        try:
+            await run_in_threadpool(_decode_to_npy, audio_path, waveform_path)
+        except Exception as e:
+            raise UploadRejected(f"Could not decode audio: {e}", 422)
+
+    waveform = np.load(waveform_path, mmap_mode="r")
+    return IngestedAudio(
+        digest=content_digest,
+        audio_path=audio_path,
+        waveform_path=waveform_path,
+        audio_format=audio_format,
+        size=size,
+        duration=len(waveform) / SAMPLE_RATE,
+    )
+
+
+def _require_format(head):
+    audio_format = sniff_format(head)
+    if audio_format is None:
+        raise UploadRejected("Unsupported audio format", 415)
+    return audio_format
+
+
+def _decode_to_npy(audio_path, waveform_path):
+    """Decodes and resamples once, then writes atomically so readers never see a partial file."""
+    waveform = load_waveform(audio_path)
+    tmp_path = f"{waveform_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, np.ascontiguousarray(waveform, dtype=np.float32))
+    os.replace(tmp_path, waveform_path)
+
+
+async def iter_upload_file(upload_file, chunk_size=CHUNK_SIZE):
+    """Reads a FastAPI UploadFile in chunks."""
+    while True:
+        chunk = await upload_file.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
@@ -0,0 +1,313 @@
+import os
+import time
+import uuid
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from metrics import metrics
+from result_columns import ResultColumns, arrow_available
+
+# Worker pool sizing; each worker holds its own copy of the models
+MAX_WORKERS = int(os.getenv("ECHO_JOB_WORKERS", os.cpu_count() or 1))
+# Jobs allowed to wait or run at once before uploads are rejected
+MAX_PENDING_JOBS = int(os.getenv("ECHO_JOB_QUEUE_SIZE", MAX_WORKERS * 2))
+# Finished jobs kept around for status/result lookups
+MAX_FINISHED_JOBS = int(os.getenv("ECHO_JOB_HISTORY", 1000))
+# When set, finished results are also written here (Parquet if pyarrow is installed, else .npz)
+# and stay readable through /jobs/{job_id}/sentences after they drop out of the history
+RESULTS_DIR = os.getenv("ECHO_RESULTS_DIR")
+
+
+# Where running jobs publish (job_id, sentence) as each sentence is final. Worker processes get it
+# from _init_worker; jobs run on threads (as the benchmarks do) use the parent's queue directly.
+_progress = None
+
+
+class JobQueueFull(Exception):
+    """Raised when the job queue has no room for another upload."""
+
+
+def build_analysis_response(filename, columns, speaker_summary=None):
+    """
+    Builds the upload analysis payload returned to clients, without the per-sentence rows.
+    Those stay in `columns` (a ResultColumns); /jobs/{job_id}/result adds them back on request.
+    """
+    return {
+        "filename": filename,
+        "transcript": columns.transcript,
+        "speakers": columns.speakers(),
+        "speaker_summary": speaker_summary or {},
+        "summary": columns.summary(),
+    }
+
+
+def _init_worker(progress=None):
+    """Loads the models once per worker process."""
+    global _progress
+    _progress = progress
+    import pipeline  # noqa: F401  (registers every model loader)
+    from model_registry import registry
+    registry.warm()
+
+
+def run_pipeline(file_path, filename, digest=None, job_id=None):
+    """
+    Runs transcription, diarization and transcript analysis inside a worker.
+    This is the upload's only analysis: each sentence is published on the progress
+    queue as soon as it is final, so WebSocket subscribers watch this run (see
+    JobManager.follow) instead of starting their own.
+    The result carries the worker's stage trace under "trace"; the parent folds it
+    into its metrics and only returns it to clients that asked for it. The sentences
+    travel back as typed columns under "columns", which pickle far smaller than dicts.
+    """
+    from pipeline import AnalysisStream
+    from metrics import tracing
+
+    with tracing() as trace:
+        stream = AnalysisStream(file_path, digest)
+        for item in stream:
+            if _progress is not None:
+                _progress.put((job_id, item))
+        entry = stream.entry
+    columns = ResultColumns.from_entry(entry)
+    result = build_analysis_response(filename, columns, entry.get("speaker_summary"))
+    result["columns"] = columns
+    result["trace"] = trace.to_dict()
+    return result
+
+
+class JobManager:
+    """
+    Runs the audio pipeline on a bounded process pool.
+    Jobs are tracked in memory by ID; submit() raises JobQueueFull for back-pressure.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, max_pending=MAX_PENDING_JOBS):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.jobs = {}
+        self.finished = []
+        self.lock = threading.Lock()
+        self.executor = None
+        self.progress = None
+        self.followers = {}
+
+    def _get_executor(self):
+        if self.executor is None:
+            # spawn keeps torch/TensorFlow state out of the forked children
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self._get_progress(),),
+            )
+        return self.executor
+
+    def _get_progress(self):
+        global _progress
+        if self.progress is None:
+            self.progress = multiprocessing.get_context("spawn").Queue()
+            _progress = self.progress
+            threading.Thread(target=self._dispatch, args=(self.progress,), daemon=True).start()
+        return self.progress
+
+    def _dispatch(self, progress):
+        """Hands sentences published by running jobs to their followers."""
+        while True:
+            message = progress.get()
+            if message is None:
+                return
+            job_id, item = message
+            with self.lock:
+                callbacks = list(self.followers.get(job_id, ()))
+            for callback in callbacks:
+                try:
+                    callback("sentence", item)
+                except Exception as e:
+                    print(f"⚠️ Job {job_id} follower failed: {e}")
+
+    def follow(self, job_id, callback):
+        """
+        Calls callback("sentence", item) for each sentence the job finalizes from now on,
+        then callback("done", job) with the job record once it has finished or failed.
+        Sentences can arrive late or not at all; the finished job's columns are complete.
+        Returns False for unknown jobs. Callbacks run on background threads.
+        """
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return False
+            if job["status"] not in ("done", "failed"):
+                self.followers.setdefault(job_id, []).append(callback)
+                return True
+            job = dict(job)
+        callback("done", job)
+        return True
+
+    def pending_count(self):
+        return sum(1 for job in self.jobs.values() if job["status"] in ("queued", "running"))
+
+    def submit(self, file_path, filename, digest=None, upload_trace=None):
+        """
+        Queues a file for processing and returns its job ID.
+        Pass the content digest when the file is a pre-decoded waveform.
+        Passing the upload's trace (a dict) opts in to a timeline in the result.
+        """
+        with self.lock:
+            if self.pending_count() >= self.max_pending:
+                raise JobQueueFull(f"Job queue is full ({self.max_pending} jobs pending)")
+
+            job_id = uuid.uuid4().hex
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "filename": filename,
+                "status": "queued",
+                "created_at": time.time(),
+                "started_at": None,
+                "finished_at": None,
+                "result": None,
+                "columns": None,
+                "error": None,
+                "upload_trace": upload_trace,
+            }
+            self._get_progress()  # also when the executor was swapped for threads, which publish from here
+            future = self._get_executor().submit(run_pipeline, file_path, filename, digest, job_id)
+
+            # The pool does not report when a job starts, so mark it as soon as a worker is free
+            running = sum(1 for job in self.jobs.values() if job["status"] == "running")
+            if running < self.max_workers:
+                self.jobs[job_id]["status"] = "running"
+                self.jobs[job_id]["started_at"] = time.time()
+
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def add_finished(self, filename, result, columns):
+        """Records a job that needed no processing (e.g. a cache hit) and returns its ID."""
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[job_id] = {
+                "job_id": job_id,
+                "filename": filename,
+                "status": "done",
+                "created_at": now,
+                "started_at": now,
+                "finished_at": now,
+                "result": result,
+                "columns": columns,
+                "error": None,
+                "upload_trace": None,
+            }
+            self._remember_finished(job_id)
+        self._persist(job_id, columns)
+        return job_id
+
+    def _remember_finished(self, job_id):
+        self.finished.append(job_id)
+        while len(self.finished) > MAX_FINISHED_JOBS:
+            self.jobs.pop(self.finished.pop(0), None)
+
+    def _finish(self, job_id, future):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is None:
+                return
+            job["finished_at"] = time.time()
+            if job["started_at"] is None:
+                job["started_at"] = job["created_at"]
+            try:
+                result = future.result()
+                job["columns"] = result.pop("columns")
+                worker_trace = result.pop("trace", None)
+                if worker_trace:
+                    metrics.observe_trace(worker_trace)
+                    if job["upload_trace"] is not None:
+                        result["trace"] = {"upload": job["upload_trace"], "job": worker_trace}
+                job["result"] = result
+                job["status"] = "done"
+            except Exception as e:
+                print(f"❌ Job {job_id} failed: {e}")
+                if isinstance(e, BrokenProcessPool):
+                    # A worker died (e.g. OOM); start a fresh pool for later jobs
+                    self.executor = None
+                job["error"] = str(e)
+                job["status"] = "failed"
+            metrics.inc("echo_jobs_total", status=job["status"])
+
+            self._remember_finished(job_id)
+            followers = self.followers.pop(job_id, [])
+
+            # Promote the oldest queued job now that a worker is free
+            for queued in self.jobs.values():
+                if queued["status"] == "queued":
+                    queued["status"] = "running"
+                    queued["started_at"] = time.time()
+                    break
+
+        if job["status"] == "done":
+            # Sentences scored in the worker are remembered here too, for WebSocket runs that have to
+            # analyze in this process (the upload's job failed or was forgotten)
+            from nlp_analysis import sentence_cache
+            sentence_cache.seed(job["columns"].rows())
+            self._persist(job_id, job["columns"])
+        for callback in followers:
+            try:
+                callback("done", dict(job))
+            except Exception as e:
+                print(f"⚠️ Job {job_id} follower failed: {e}")
+
+    def _persist(self, job_id, columns):
+        if not RESULTS_DIR:
+            return
+        try:
+            os.makedirs(RESULTS_DIR, exist_ok=True)
+            columns.save(self._result_path(job_id, "parquet" if arrow_available() else "npz"))
+        except Exception as e:
+            print(f"⚠️ Could not persist the result of job {job_id}: {e}")
+
+    def _result_path(self, job_id, extension):
+        return os.path.join(RESULTS_DIR, f"{job_id}.{extension}")
+
+    def columns(self, job_id):
+        """The finished job's ResultColumns, from memory or from RESULTS_DIR; None if unavailable."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                return job["columns"]
+        if not RESULTS_DIR or not job_id or not all(c in "0123456789abcdef" for c in job_id):
+            return None
+        for extension in ("parquet", "npz"):
+            path = self._result_path(job_id, extension)
+            if os.path.exists(path) and (extension == "npz" or arrow_available()):
+                return ResultColumns.load(path)
+        return None
+
+    def get(self, job_id):
+        """Returns the job record, or None for unknown IDs."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
+
+    def status(self, job_id):
+        """Returns the job record without its result payload."""
+        job = self.get(job_id)
+        if job is None:
+            return None
+        job.pop("result", None)
+        job.pop("columns", None)
+        job.pop("upload_trace", None)
+        return job
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.progress is not None:
+            self.progress.put(None)
+            self.progress = None
+
+
+job_manager = JobManager()
@@ -0,0 +1,98 @@
+import re
+import unicodedata
+
+STRONG = "strong"
+MILD = "mild"
+
+
+class KeywordMatcher:
+    """
+    Single-pass keyword matcher built from tiered word lists.
+    Terms are compiled into one trie-shaped regex, so a sentence is scanned once
+    regardless of how many terms there are. Multi-word phrases match across any
+    whitespace, and punctuation attached to a word ("idiot!") does not hide it.
+    """
+
+    def __init__(self, tiers):
+        # tiers: list of (tier_name, words) in priority order; earlier tiers win on overlap
+        self.term_tiers = {}
+        for tier, words in tiers:
+            for word in words:
+                self.term_tiers.setdefault(_normalize(word), tier)
+        # The case-insensitive regex folds characters one at a time ("İ" matches "i"),
+        # while str.lower() may expand them ("İ" -> "i̇"), so those matches are looked up
+        # by a key with the combining marks stripped
+        self.folded_terms = {}
+        for term in self.term_tiers:
+            self.folded_terms.setdefault(_fold(term), term)
+
+        pattern = r"(?<!\w)(" + _trie_pattern(self.term_tiers.keys()) + r")(?!\w)"
+        # Matching lowercased text is much faster than re.IGNORECASE; the
+        # case-insensitive regex is only used when lowering changes the length
+        self.regex = re.compile(pattern)
+        self.regex_ignorecase = re.compile(pattern, re.IGNORECASE)
+
+    def finditer(self, text):
+        """Yields (term, start, end, tier) for every keyword found in the text."""
+        lowered = text.lower()
+        if len(lowered) == len(text):
+            matches = self.regex.finditer(lowered)
+        else:
+            matches = self.regex_ignorecase.finditer(text)
+        for match in matches:
+            term = _normalize(match.group(1))
+            if term not in self.term_tiers:
+                term = self.folded_terms.get(_fold(term))
+                if term is None:
+                    continue
+            yield term, match.start(1), match.end(1), self.term_tiers[term]
+
+    def find(self, text):
+        """Returns all matches as a list of dicts with term, offsets and tier."""
+        return [
+            {"term": term, "start": start, "end": end, "tier": tier}
+            for term, start, end, tier in self.finditer(text)
+        ]
+
+    def tiers_in(self, text):
+        """Returns the set of tiers that occur in the text."""
+        return {tier for _, _, _, tier in self.finditer(text)}
+
+
+def _normalize(term):
+    return " ".join(term.lower().split())
+
+
+def _fold(term):
+    decomposed = unicodedata.normalize("NFKD", term.casefold())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def _trie_pattern(terms):
+    """Builds a prefix-factored regex so alternatives sharing a prefix are tried once."""
+    trie = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    return _node_pattern(trie)
+
+
+def _node_pattern(node):
+    branches = []
+    optional = False
+    # Longer continuations first so "bloody hell" is preferred over a shorter prefix
+    for char in sorted(node, key=lambda c: (c == "", c)):
+        if char == "":
+            optional = True
+            continue
+        literal = r"\s+" if char == " " else re.escape(char)
+        branches.append(literal + _node_pattern(node[char]))
+
+    if not branches:
+        return ""
+    if len(branches) == 1 and not optional:
+        return branches[0]
+    body = "(?:" + "|".join(branches) + ")"
+    return body + "?" if optional else body
@@ -0,0 +1,187 @@
+"""
+Stage timers, counters and memory gauges for the analysis pipeline, exposed
+in Prometheus text format by the /metrics endpoint.
+
+    with metrics.stage("transcribe"):
+        ...
+
+Every stage is recorded in a histogram. When a trace is active (see
+tracing()), the stage is also added to that trace's timeline, which can be
+returned with a request's results to see where its time went.
+"""
+import sys
+import time
+import threading
+import resource
+import contextvars
+from contextlib import contextmanager
+
+# Histogram bucket upper bounds in seconds; stages range from sub-millisecond keyword checks to long transcriptions
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+COUNTERS = {
+    "echo_uploads_total": "Uploads received, by outcome.",
+    "echo_upload_bytes_total": "Bytes of accepted uploads.",
+    "echo_jobs_total": "Background jobs finished, by status.",
+    "echo_cache_lookups_total": "Result cache lookups, by result.",
+    "echo_sentences_analyzed_total": "Sentences scored for sentiment and profanity.",
+    "echo_ws_messages_total": "WebSocket messages sent, by endpoint.",
+    "echo_tier_segments_total": "Fast-pass Whisper segments in tiered mode, by outcome (kept or retry reason).",
+    "echo_tier_retry_seconds_total": "Seconds of audio re-transcribed with the large Whisper model.",
+}
+
+_current_trace = contextvars.ContextVar("echo_trace", default=None)
+
+
+def peak_rss_bytes():
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def current_rss_bytes():
+    """Resident set size from /proc (Linux); None elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * resource.getpagesize()
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Trace:
+    """A per-request timeline of stages, with the process's RSS sampled as each stage ends."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.events = []
+        self.lock = threading.Lock()
+
+    def add(self, stage, start, duration):
+        rss = current_rss_bytes()
+        event = {
+            "stage": stage,
+            "start": round(start - self.started, 4),
+            "duration": round(duration, 4),
+            "thread": threading.current_thread().name,
+            "rss_mb": round(rss / 2**20, 1) if rss is not None else None,
+        }
+        with self.lock:
+            self.events.append(event)
+
+    def to_dict(self):
+        with self.lock:
+            events = sorted(self.events, key=lambda event: event["start"])
+        return {
+            "total": round(time.perf_counter() - self.started, 4),
+            "peak_rss_mb": round(peak_rss_bytes() / 2**20, 1),
+            "events": events,
+        }
+
+
+@contextmanager
+def tracing():
+    """Collects every stage run in this context (and contexts copied from it) into a Trace."""
+    trace = Trace()
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+
+class Metrics:
+    """Thread-safe stage histograms, labelled counters and callback gauges."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.counters = {}
+        self.gauges = {}
+        self.worker_peak_rss = 0
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                histogram = self.stages[stage] = {"buckets": [0] * len(STAGE_BUCKETS), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(STAGE_BUCKETS):
+                if seconds <= bound:
+                    histogram["buckets"][i] += 1
+            histogram["sum"] += seconds
+            histogram["count"] += 1
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            self.observe(name, duration)
+            trace = _current_trace.get()
+            if trace is not None:
+                trace.add(name, start, duration)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def gauge(self, name, help_text, func):
+        """Registers a gauge whose value is read from `func` at scrape time."""
+        self.gauges[name] = (help_text, func)
+
+    def observe_trace(self, trace):
+        """Folds a trace produced in a worker process into this process's metrics."""
+        for event in trace.get("events", []):
+            self.observe(event["stage"], event["duration"])
+        with self.lock:
+            self.worker_peak_rss = max(self.worker_peak_rss, int(trace.get("peak_rss_mb", 0) * 2**20))
+
+    def render(self):
+        """Prometheus text exposition format."""
+        lines = [
+            "# HELP echo_stage_seconds Wall-clock seconds per pipeline stage.",
+            "# TYPE echo_stage_seconds histogram",
+        ]
+        with self.lock:
+            for stage, histogram in sorted(self.stages.items()):
+                for bound, count in zip(STAGE_BUCKETS, histogram["buckets"]):
+                    lines.append(f'echo_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+                lines.append(f'echo_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram["count"]}')
+                lines.append(f'echo_stage_seconds_sum{{stage="{stage}"}} {histogram["sum"]:.6f}')
+                lines.append(f'echo_stage_seconds_count{{stage="{stage}"}} {histogram["count"]}')
+
+            for name, help_text in COUNTERS.items():
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for (counter, labels), value in sorted(self.counters.items()):
+                    if counter == name:
+                        lines.append(f"{name}{_labels(labels)} {value}")
+            worker_peak_rss = self.worker_peak_rss
+
+        gauges = {
+            "process_resident_memory_bytes": ("Current resident memory of the server process.", current_rss_bytes),
+            "process_peak_resident_memory_bytes": ("Peak resident memory of the server process.", peak_rss_bytes),
+            "echo_worker_peak_resident_memory_bytes": (
+                "Highest peak resident memory reported by a job worker.", lambda: worker_peak_rss
+            ),
+            **self.gauges,
+        }
+        for name, (help_text, func) in gauges.items():
+            try:
+                value = func()
+            except Exception:
+                value = None
+            if value is not None:
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {value}"]
+
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+metrics = Metrics()
@@ -0,0 +1,102 @@
+import time
+import threading
+
+
+class ModelRegistry:
+    """
+    Loads models lazily on first use and keeps them for the life of the process.
+    Modules register a loader per model name; get() runs it once, records how long
+    it took, and returns the cached instance afterwards. A model whose loader fails
+    is stored as None so callers can fall back without retrying a slow load.
+    Listeners added with on_load() hear about every load and replacement.
+    """
+
+    def __init__(self):
+        self.loaders = {}
+        self.models = {}
+        self.load_times = {}
+        self.errors = {}
+        self.locks = {}
+        self.lock = threading.Lock()
+        # Times each model was replaced after its first load (e.g. by override())
+        self.replacements = {}
+        self.listeners = []
+
+    def register(self, name, loader):
+        with self.lock:
+            self.loaders[name] = loader
+            self.locks.setdefault(name, threading.Lock())
+
+    def get(self, name):
+        """Returns the named model, loading it on first use."""
+        if name in self.models:
+            return self.models[name]
+
+        with self.locks[name]:
+            if name in self.models:
+                return self.models[name]
+
+            start = time.perf_counter()
+            try:
+                instance = self.loaders[name]()
+                print(f"✅ Loaded {name} in {time.perf_counter() - start:.1f}s")
+            except Exception as e:
+                print(f"❌ Error loading {name}: {e}")
+                instance = None
+                self.errors[name] = str(e)
+
+            self.load_times[name] = time.perf_counter() - start
+            self.models[name] = instance
+        self._loaded(name, instance)
+        return instance
+
+    def override(self, name, instance):
+        """Installs a ready-made instance (e.g. a stand-in model for benchmarks) in place of the loader."""
+        with self.lock:
+            self.loaders[name] = lambda: instance
+            self.locks.setdefault(name, threading.Lock())
+            if name in self.models:
+                self.replacements[name] = self.replacements.get(name, 0) + 1
+            self.models[name] = instance
+            self.errors.pop(name, None)
+            self.load_times[name] = 0.0
+        self._loaded(name, instance)
+
+    def on_load(self, callback):
+        """Calls callback(name, instance) whenever a model is loaded or replaced."""
+        self.listeners.append(callback)
+
+    def _loaded(self, name, instance):
+        for callback in self.listeners:
+            try:
+                callback(name, instance)
+            except Exception as e:
+                print(f"⚠️ Model load listener failed for {name}: {e}")
+
+    def is_loaded(self, name):
+        return name in self.models
+
+    def warm(self, names=None):
+        """Loads the given (or all registered) models now."""
+        for name in names or list(self.loaders):
+            self.get(name)
+
+    def warm_in_background(self, names=None):
+        """Starts loading models on a daemon thread and returns the thread."""
+        thread = threading.Thread(target=self.warm, args=(names,), daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        """Reports which models are loaded and how long each took."""
+        return {
+            name: {
+                "loaded": name in self.models and self.models[name] is not None,
+                "load_seconds": round(self.load_times[name], 3) if name in self.load_times else None,
+                "error": self.errors.get(name),
+            }
+            for name in self.loaders
+        }
+
+
+registry = ModelRegistry()
@@ -96,6 +96,10 @@ joblib.dump(tokenizer, "tokenizer.joblib")
 
 print("✅ Model trained and saved successfully!")
 
+# **7b. Export for TensorFlow-free serving (ONNX, int8 ONNX, NumPy weights, tokenizer vocabulary)**
+from export_model import export_all
+export_all(model, tokenizer, quantize=True)
+
 # **8. Rule-Based Post-Processing**
 def rule_based_filter(text, lstm_prediction):
     profane_keywords = {"hell", "damn", "crap", "stupid", "idiot", "moron", "bullshit", "shit"}
@@ -1,43 +1,129 @@
 import os
+import json
+import threading
+import multiprocessing
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor
+import nltk
 import numpy as np
-import tensorflow as tf
 import joblib
-from keras.models import load_model
-from tensorflow.keras.preprocessing.sequence import pad_sequences
-from nltk.tokenize import sent_tokenize
 from nltk.sentiment import SentimentIntensityAnalyzer
 from dotenv import load_dotenv
+from keyword_matcher import KeywordMatcher, STRONG, MILD
+from model_registry import registry
+from metrics import metrics
+from result_cache import file_fingerprint
+from sentence_cache import SentenceCache, normalize_sentence
+from segmenter import split_sentences
+from bulk_sentiment import BulkVader
+from inference_backends import (
+    load_backend,
+    VocabTokenizer,
+    ONNX_MODEL_PATH,
+    NUMPY_WEIGHTS_PATH,
+    TOKENIZER_VOCAB_PATH,
+)
 
 # Load environment variables
 load_dotenv()
 
-# Ensure TensorFlow uses CPU if GPU is unavailable
-if not tf.config.experimental.list_physical_devices('GPU'):
-    print("Using CPU for TensorFlow operations.")
-
-# Load pre-trained LSTM model for profanity detection
-try:
-    MODEL_PATH = "profanity_lstm_model.h5"  # Update with actual path
-    model = load_model(MODEL_PATH)
-    print("✅ Model loaded successfully.")
-except Exception as e:
-    print(f"❌ Error loading model: {e}")
-    model = None
-
-# Load trained tokenizer
-try:
-    tokenizer = joblib.load("tokenizer.joblib")  # Ensure tokenizer is saved from training
-    print("✅ Tokenizer loaded successfully.")
-except Exception as e:
-    print(f"❌ Error loading tokenizer: {e}")
-    tokenizer = None
-
-# Vader Sentiment Analyzer
-sia = SentimentIntensityAnalyzer()
+MODEL_PATH = os.getenv("PROFANITY_MODEL_PATH", "profanity_lstm_model.h5")
+TOKENIZER_PATH = os.getenv("PROFANITY_TOKENIZER_PATH", "tokenizer.joblib")
+
+# Inference backend for the LSTM: "keras", "onnx", "numpy", or "auto" (ONNX, then NumPy, then Keras).
+# Point PROFANITY_ONNX_PATH at the .int8.onnx file to serve the quantized model.
+PROFANITY_BACKEND = os.getenv("PROFANITY_BACKEND", "auto")
+ONNX_PATH = os.getenv("PROFANITY_ONNX_PATH", ONNX_MODEL_PATH)
+NUMPY_PATH = os.getenv("PROFANITY_NUMPY_WEIGHTS_PATH", NUMPY_WEIGHTS_PATH)
+VOCAB_PATH = os.getenv("PROFANITY_TOKENIZER_VOCAB_PATH", TOKENIZER_VOCAB_PATH)
+
+BACKEND_PATHS = {"keras": MODEL_PATH, "onnx": ONNX_PATH, "numpy": NUMPY_PATH}
+
+def backend_choice():
+    """Resolves PROFANITY_BACKEND to a concrete backend name."""
+    if PROFANITY_BACKEND != "auto":
+        return PROFANITY_BACKEND
+    if os.path.exists(ONNX_PATH) and importlib.util.find_spec("onnxruntime"):
+        return "onnx"
+    if os.path.exists(NUMPY_PATH):
+        return "numpy"
+    return "keras"
+
+def profanity_model_files():
+    """Files that determine LSTM predictions, for cache invalidation."""
+    tokenizer_path = VOCAB_PATH if os.path.exists(VOCAB_PATH) else TOKENIZER_PATH
+    return [BACKEND_PATHS[backend_choice()], tokenizer_path]
+
+def _load_profanity_model():
+    name = backend_choice()
+    backend = load_backend(name, BACKEND_PATHS[name])
+    print(f"Using the {name} profanity backend.")
+    return backend
+
+def _load_tokenizer():
+    # The exported vocabulary avoids unpickling a Keras object (and importing TensorFlow)
+    if os.path.exists(VOCAB_PATH):
+        return VocabTokenizer(VOCAB_PATH)
+    return joblib.load(TOKENIZER_PATH)  # Ensure tokenizer is saved from training
+
+# Pre-trained LSTM for profanity detection, its tokenizer, and the Vader Sentiment Analyzer
+registry.register("profanity_lstm", _load_profanity_model)
+registry.register("tokenizer", _load_tokenizer)
+registry.register("vader", SentimentIntensityAnalyzer)
+registry.register("vader_bulk", lambda: BulkVader(registry.get("vader")))
+
+def get_model():
+    return registry.get("profanity_lstm")
+
+def get_tokenizer():
+    return registry.get("tokenizer")
 
 # Match sequence length to training data
 MAX_SEQUENCE_LENGTH = 50
 
+# Batch size for batched LSTM inference; short batches are padded to it for fixed-shape backends
+PREDICT_BATCH_SIZE = 64
+
+# Parallel sentence scoring for long transcripts. 1 keeps everything in this process;
+# below PARALLEL_MIN_SENTENCES the pool's overhead outweighs the gain and scoring stays serial.
+ANALYSIS_WORKERS = int(os.getenv("ECHO_ANALYSIS_WORKERS", 1))
+PARALLEL_MIN_SENTENCES = int(os.getenv("ECHO_PARALLEL_MIN_SENTENCES", 2000))
+PARALLEL_CHUNK_SIZE = int(os.getenv("ECHO_PARALLEL_CHUNK_SIZE", 500))
+
+# VADER engine for batches: "vader" (NLTK, one sentence at a time), "numpy" (vectorized BulkVader),
+# or "auto" (BulkVader once a batch has BULK_SENTIMENT_MIN_SENTENCES sentences)
+SENTIMENT_ENGINE = os.getenv("ECHO_SENTIMENT_ENGINE", "auto")
+BULK_SENTIMENT_MIN_SENTENCES = int(os.getenv("ECHO_BULK_SENTIMENT_MIN_SENTENCES", 200))
+
+# Sentences whose analysis is memoized per process; 0 disables the memo
+SENTENCE_CACHE_SIZE = int(os.getenv("ECHO_SENTENCE_CACHE_SIZE", 50000))
+
+# Registry models whose output ends up in a sentence's scores
+SCORING_MODELS = ["vader", "vader_bulk", "tokenizer", "profanity_lstm"]
+
+def model_version():
+    """Identifies the models behind a sentence's scores, so memoized results never outlive them."""
+    return json.dumps({
+        "backend": backend_choice(),
+        "files": file_fingerprint(profanity_model_files()),
+        "nltk": nltk.__version__,
+        "replaced": {name: registry.replacements.get(name, 0) for name in SCORING_MODELS},
+    }, sort_keys=True)
+
+# Shared by every request in this process; finished jobs seed it with their results
+sentence_cache = SentenceCache(SENTENCE_CACHE_SIZE, model_version())
+
+def _refresh_sentence_cache(name, instance):
+    # A model loaded from changed files or swapped in with registry.override() drops the old scores
+    if name in SCORING_MODELS:
+        sentence_cache.set_version(model_version())
+
+registry.on_load(_refresh_sentence_cache)
+metrics.gauge("echo_sentence_cache_entries", "Sentences memoized in this process.",
+              lambda: sentence_cache.stats()["entries"])
+metrics.gauge("echo_sentence_cache_hits", "Sentence memo hits in this process.", lambda: sentence_cache.hits)
+metrics.gauge("echo_sentence_cache_misses", "Sentence memo misses in this process.", lambda: sentence_cache.misses)
+
 # Expanded profanity list
 PROFANITY_WORDS = {
     "fuck", "shit", "bitch", "bastard", "asshole", "dumbass", "crap", "dick",
@@ -61,59 +147,187 @@ MILD_PROFANITY_WORDS = {
     "horrible", "awful", "freak", "weirdo", "screw", "shady", "dirty", "cheap",
     "clown", "shameless", "nasty", "stinking", "miserable", "dammit", "idiotic"
 }
+
+# Compiled once at import; strong profanity wins where a word is in both lists
+keyword_matcher = KeywordMatcher([
+    (STRONG, PROFANITY_WORDS),
+    (MILD, MILD_PROFANITY_WORDS),
+])
+
 def preprocess_text(text):
     """Tokenizes and pads input text for LSTM model."""
+    return preprocess_batch([text])
+
+def preprocess_batch(texts):
+    """Tokenizes and pads a list of sentences in a single pass."""
+    tokenizer = get_tokenizer()
     if tokenizer is None:
         print("⚠️ Warning: Tokenizer not available.")
         return None
-    sequences = tokenizer.texts_to_sequences([text])
-    padded_seq = pad_sequences(sequences, maxlen=MAX_SEQUENCE_LENGTH, padding="post", truncating="post")
+    sequences = tokenizer.texts_to_sequences(texts)
+    return pad_sequences_post(sequences, MAX_SEQUENCE_LENGTH)
+
+def pad_sequences_post(sequences, maxlen):
+    """Same result as Keras pad_sequences(padding="post", truncating="post") without importing TensorFlow."""
+    padded_seq = np.zeros((len(sequences), maxlen), dtype=np.int32)
+    for row, sequence in enumerate(sequences):
+        trimmed = sequence[:maxlen]
+        padded_seq[row, :len(trimmed)] = trimmed
     return padded_seq
 
-def detect_profanity(text, sentiment_score):
-    """Detects profanity using LSTM model and keyword matching."""
-    words = set(text.lower().split())
+def keyword_profanity(text, sentiment_score):
+    """Returns a label if the keyword lists decide the sentence, otherwise None."""
+    tiers = keyword_matcher.tiers_in(text)
 
     # Check for strong profanity words
-    if any(word in words for word in PROFANITY_WORDS):
+    if STRONG in tiers:
         return "Profane"
 
     # Check for mild profanity only if sentiment is negative
-    if any(word in words for word in MILD_PROFANITY_WORDS) and sentiment_score["compound"] < -0.3:
+    if MILD in tiers and sentiment_score["compound"] < -0.3:
+        return "Mildly Profane"
+
+    return None
+
+def label_from_prediction(prediction):
+    """Maps the LSTM probability (0=clean, 1=profanity) to a profanity label."""
+    # Compared as float32, whichever path produced it, so a score on a threshold gets one label
+    prediction = np.float32(prediction)
+    if prediction > 0.8:
+        return "Profane"
+    elif prediction > 0.5:
         return "Mildly Profane"
+    return "Clean"
+
+def detect_profanity(text, sentiment_score):
+    """Detects profanity using LSTM model and keyword matching."""
+    with metrics.stage("keyword"):
+        label = keyword_profanity(text, sentiment_score)
+    if label:
+        return label
 
     # Use LSTM model if available
+    model = get_model()
     if model:
         processed_text = preprocess_text(text)
         if processed_text is not None:
-            prediction = model.predict(processed_text)[0][0]  # Binary classification (0=clean, 1=profanity)
-            if prediction > 0.8:
-                return "Profane"
-            elif prediction > 0.5:
-                return "Mildly Profane"
+            with metrics.stage("lstm_predict"):
+                prediction = model.predict(processed_text)[0]  # Binary classification (0=clean, 1=profanity)
+            return label_from_prediction(prediction)
 
     return "Clean"
 
+def predict_profanity_batch(texts):
+    """
+    Scores many sentences with the LSTM in batches of up to PREDICT_BATCH_SIZE.
+    Returns one probability per sentence, or None if the model is unavailable.
+    """
+    if not texts:
+        return None
+    model = get_model()
+    if not model:
+        return None
+
+    padded = preprocess_batch(texts)
+    if padded is None:
+        return None
+
+    fixed_batch = getattr(model, "fixed_batch", False)
+    predictions = []
+    for start in range(0, len(padded), PREDICT_BATCH_SIZE):
+        batch = padded[start:start + PREDICT_BATCH_SIZE]
+        count = len(batch)
+        # Keras reuses its traced graph only for the same shape; other backends take short batches as-is
+        if fixed_batch and count < PREDICT_BATCH_SIZE:
+            filler = np.zeros((PREDICT_BATCH_SIZE - count, MAX_SEQUENCE_LENGTH), dtype=batch.dtype)
+            batch = np.concatenate([batch, filler])
+        with metrics.stage("lstm_predict"):
+            scores = model.predict(batch)
+        predictions.extend(np.asarray(scores[:count], dtype=np.float32))
+
+    return predictions
+
+def detect_profanity_batch(texts, sentiment_scores):
+    """
+    Batched equivalent of detect_profanity.
+    Keyword hits are short-circuited; the remaining sentences share LSTM forward passes.
+    """
+    with metrics.stage("keyword"):
+        labels = [keyword_profanity(text, score) for text, score in zip(texts, sentiment_scores)]
+    pending = [i for i, label in enumerate(labels) if label is None]
+
+    predictions = predict_profanity_batch([texts[i] for i in pending])
+    for slot, i in enumerate(pending):
+        labels[i] = label_from_prediction(predictions[slot]) if predictions else "Clean"
+
+    return labels
+
 def analyze_sentiment(text):
     """Analyze sentiment using Vader."""
-    return sia.polarity_scores(text)
+    return registry.get("vader").polarity_scores(text)
+
+def analyze_sentiment_batch(texts):
+    """
+    VADER scores for many sentences; large batches use the vectorized scorer (see ECHO_SENTIMENT_ENGINE).
+    Returns None where a sentence failed to score.
+    """
+    if SENTIMENT_ENGINE == "numpy" or (SENTIMENT_ENGINE == "auto" and len(texts) >= BULK_SENTIMENT_MIN_SENTENCES):
+        bulk = registry.get("vader_bulk")
+        if bulk is not None:
+            try:
+                return bulk.polarity_scores_batch(texts)
+            except Exception as e:
+                print(f"⚠️ Bulk sentiment failed, scoring sentence by sentence: {e}")
+
+    sentiments = [None] * len(texts)
+    for i, sentence in enumerate(texts):
+        try:
+            sentiments[i] = analyze_sentiment(sentence)
+        except Exception as inner_e:
+            print(f"⚠️ Error processing sentence: {sentence} | {inner_e}")
+    return sentiments
 
-def analyze_transcript(transcript):
-    """Process and analyze a given transcript."""
+def analyze_transcript(transcript, batched=True, workers=None):
+    """
+    Process and analyze a given transcript.
+    With batched=True the LSTM scores all sentences together instead of one at a time.
+    workers > 1 spreads long transcripts over a process pool (default ECHO_ANALYSIS_WORKERS).
+    """
     try:
-        sentences = sent_tokenize(transcript)
+        return analyze_sentences(split_sentences(transcript), batched, workers)
+    except Exception as e:
+        print(f"❌ Error analyzing transcript: {e}")
+        return []
+
+def analyze_sentences(sentences, batched=True, workers=None):
+    """
+    Analyzes sentences that are already split (e.g. by the streaming segmenter).
+    Returns one result per sentence, in order; sentences that fail to score are left out.
+    """
+    try:
+        if batched:
+            return _analyze_batched(sentences, ANALYSIS_WORKERS if workers is None else workers)
+
         results = []
 
         for sentence in sentences:
             try:
-                sentiment = analyze_sentiment(sentence)
+                cached = sentence_cache.get(sentence)
+                if cached is not None:
+                    results.append(_result(sentence, *cached))
+                    continue
+
+                with metrics.stage("vader"):
+                    sentiment = analyze_sentiment(sentence)
                 profanity = detect_profanity(sentence, sentiment)
+                sentence_cache.put(sentence, sentiment, profanity)
 
                 results.append({
                     "sentence": sentence,
                     "sentiment": sentiment,
                     "profanity": profanity
                 })
+                metrics.inc("echo_sentences_analyzed_total")
 
             except Exception as inner_e:
                 print(f"⚠️ Error processing sentence: {sentence} | {inner_e}")
@@ -121,5 +335,108 @@ def analyze_transcript(transcript):
         return results
 
     except Exception as e:
-        print(f"❌ Error analyzing transcript: {e}")
-        return []
\ No newline at end of file
+        print(f"❌ Error analyzing sentences: {e}")
+        return []
+
+def _result(sentence, sentiment, profanity):
+    # Copies, because callers attach timing and speakers to the returned dicts
+    return {"sentence": sentence, "sentiment": dict(sentiment), "profanity": profanity}
+
+def _analyze_batched(sentences, workers=1):
+    """
+    Runs VADER, then profanity detection for all sentences at once.
+    Memoized sentences are reused, and repeats within the transcript are scored once.
+    """
+    results = [None] * len(sentences)
+    pending = {}
+    for i, sentence in enumerate(sentences):
+        cached = sentence_cache.get(sentence)
+        if cached is not None:
+            results[i] = _result(sentence, *cached)
+        else:
+            pending.setdefault(normalize_sentence(sentence), []).append(i)
+
+    texts = [sentences[positions[0]] for positions in pending.values()]
+    if workers > 1 and len(texts) >= PARALLEL_MIN_SENTENCES:
+        with metrics.stage("analyze_parallel"):
+            scores = _score_parallel(texts, workers)
+    else:
+        scores = score_sentences(texts)
+
+    for positions, sentence, score in zip(pending.values(), texts, scores):
+        if score is None:
+            continue
+        sentiment, profanity = score
+        sentence_cache.put(sentence, sentiment, profanity)
+        for i in positions:
+            results[i] = _result(sentences[i], sentiment, profanity)
+
+    results = [result for result in results if result is not None]
+    metrics.inc("echo_sentences_analyzed_total", len(results))
+    return results
+
+def score_sentences(texts):
+    """
+    Scores sentences without the memo: VADER for the batch, then batched profanity detection.
+    Returns (sentiment, profanity) per sentence, or None where scoring failed.
+    """
+    with metrics.stage("vader"):
+        sentiments = analyze_sentiment_batch(texts)
+
+    scored = [i for i, sentiment in enumerate(sentiments) if sentiment is not None]
+    try:
+        labels = detect_profanity_batch([texts[i] for i in scored], [sentiments[i] for i in scored])
+    except Exception as e:
+        # Retry one sentence at a time so only the sentence that fails is dropped
+        print(f"⚠️ Batched profanity detection failed, scoring sentence by sentence: {e}")
+        labels = []
+        for i in scored:
+            try:
+                labels.append(detect_profanity(texts[i], sentiments[i]))
+            except Exception as inner_e:
+                print(f"⚠️ Error processing sentence: {texts[i]} | {inner_e}")
+                labels.append(None)
+
+    scores = [None] * len(texts)
+    for i, label in zip(scored, labels):
+        if label is not None:
+            scores[i] = (sentiments[i], label)
+    return scores
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def _init_analysis_worker():
+    """Loads the analysis models once per pool worker."""
+    registry.warm(SCORING_MODELS)
+
+def _get_pool(workers):
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            # spawn, like the job pool, so TensorFlow/torch state is not forked
+            pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_analysis_worker,
+            )
+            _pools[workers] = pool
+        return pool
+
+def _score_parallel(texts, workers):
+    """Scores contiguous chunks on a process pool; map() returns them in input order."""
+    chunk_size = max(PARALLEL_CHUNK_SIZE, -(-len(texts) // (workers * 4)))
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    try:
+        return [score for chunk_scores in _get_pool(workers).map(score_sentences, chunks) for score in chunk_scores]
+    except Exception as e:
+        print(f"⚠️ Parallel analysis failed, scoring serially: {e}")
+        with _pools_lock:
+            _pools.pop(workers, None)
+        return score_sentences(texts)
+
+def shutdown_analysis_pools():
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
@@ -1,16 +1,18 @@
-import asyncio
-from fastapi import FastAPI, UploadFile, File, WebSocket,WebSocketDisconnect
+from contextlib import nullcontext
+from fastapi import FastAPI, UploadFile, File, WebSocket,WebSocketDisconnect, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from starlette.websockets import WebSocketState
-import shutil
 import os
-import re
-import random
-import matplotlib.pyplot as plt
-import io
-import base64
-from fastapi.responses import JSONResponse
-from audio_processing import process_audio
-from nlp_analysis import analyze_transcript
+import json
+from fastapi.responses import JSONResponse, PlainTextResponse, Response
+from nlp_analysis import shutdown_analysis_pools
+from jobs import job_manager, JobQueueFull, build_analysis_response
+from pipeline import lookup_cached
+from model_registry import registry
+from sessions import SessionManager, UnknownUpload
+from ingestion import ingest_chunks, iter_upload_file, UploadRejected, MAX_UPLOAD_BYTES
+from metrics import metrics, tracing
+from result_columns import ResultColumns, BINARY_FORMATS, MEDIA_TYPES, arrow_available
 from fastapi.middleware.cors import CORSMiddleware
 
 app = FastAPI()
@@ -24,140 +26,247 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Load models in the background once the server is up instead of at import time
+WARM_MODELS_ON_STARTUP = os.getenv("ECHO_WARM_MODELS", "1") != "0"
+
+# Largest page of sentences the results endpoints return at once
+MAX_PAGE_ROWS = int(os.getenv("ECHO_MAX_PAGE_ROWS", 5000))
+
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)  # Ensure the upload directory exists
 
-# Store uploaded filenames for reference
-uploaded_files = {}
+# Uploads by ID and the analysis run each upload's subscribers share
+sessions = SessionManager(UPLOAD_FOLDER, jobs=job_manager)
 
-@app.post("/upload-audio/")
-async def upload_audio(file: UploadFile = File(...)):
+metrics.gauge("echo_jobs_pending", "Jobs queued or running.", job_manager.pending_count)
+metrics.gauge("echo_sessions", "Uploads currently remembered.", lambda: len(sessions.uploads))
+metrics.gauge("echo_models_loaded", "Models loaded in the server process.",
+              lambda: sum(1 for model in registry.status().values() if model.get("loaded")))
+
+async def accept_upload(chunks, filename, trace=False):
     """
-    Uploads an audio file and processes it completely.
-    Returns full analysis results.
+    Ingests an upload stream, registers it, and queues (or answers from cache) its analysis.
+    With trace=True the job result includes a JSON timeline of every stage.
     """
-    file_path = os.path.join(UPLOAD_FOLDER, file.filename)
+    with tracing() if trace else nullcontext() as upload_trace:
+        try:
+            with metrics.stage("ingest"):
+                ingested = await ingest_chunks(chunks, UPLOAD_FOLDER)
+        except UploadRejected as e:
+            metrics.inc("echo_uploads_total", outcome="rejected")
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        metrics.inc("echo_uploads_total", outcome="accepted")
+        metrics.inc("echo_upload_bytes_total", ingested.size)
+
+        # Each upload gets its own ID, so concurrent users never see each other's audio
+        upload_id = sessions.new_upload(filename, ingested.waveform_path, ingested.digest)
+        response = {"upload_id": upload_id, "filename": filename, "duration": ingested.duration}
+
+        # Duplicate uploads of already processed audio are answered from the cache
+        cached = await run_in_threadpool(lookup_cached, ingested.waveform_path, ingested.digest)
+
+    upload_trace = upload_trace.to_dict() if trace else None
+    if cached is not None:
+        columns = ResultColumns.from_entry(cached)
+        result = build_analysis_response(filename, columns, cached.get("speaker_summary"))
+        if upload_trace is not None:
+            result["trace"] = {"upload": upload_trace, "job": None}
+        job_id = job_manager.add_finished(filename, result, columns)
+        sessions.attach_job(upload_id, job_id)
+        return {"job_id": job_id, "status": "done", **response}
 
-    # Save the uploaded file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    try:
+        job_id = job_manager.submit(ingested.waveform_path, filename, ingested.digest, upload_trace)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
 
-    uploaded_files["latest"] = file.filename
+    # WebSocket subscribers watch this job rather than analyzing the upload a second time
+    sessions.attach_job(upload_id, job_id)
+    return {"job_id": job_id, "status": "queued", **response}
 
-    try:
-        # Process audio (transcription + speaker separation)
-        speakers, transcript = process_audio(file_path)
-
-        # Analyze entire transcript
-        full_analysis = analyze_transcript(transcript)
-
-        # Prepare comprehensive response
-        response = {
-            "filename": file.filename,
-            "transcript": transcript,
-            "speakers": speakers,
-            "analysis": full_analysis,
-            "summary": {
-                "total_sentences": len(full_analysis),
-                "profane_sentences": sum(1 for item in full_analysis if item['profanity'] != "Clean"),
-                "negative_sentiment_sentences": sum(1 for item in full_analysis if item['sentiment']['compound'] < 0)
-            }
-        }
-
-        return response
+@app.post("/upload-audio/", status_code=202)
+async def upload_audio(file: UploadFile = File(...), trace: bool = False):
+    """
+    Uploads an audio file and queues it for background processing.
+    Returns a job ID; poll /jobs/{job_id} for status and /jobs/{job_id}/result for results.
+    The upload ID is what WebSocket clients subscribe to for live results.
+    Add ?trace=true to get a per-stage timeline with the job result.
+    """
+    return await accept_upload(iter_upload_file(file), file.filename, trace)
 
-    except Exception as e:
-        return {"error": str(e), "filename": file.filename}
+@app.put("/upload-audio/stream", status_code=202)
+async def upload_audio_stream(request: Request, filename: str = "audio", trace: bool = False):
+    """
+    Same as /upload-audio/, but takes the raw audio bytes as the request body.
+    The body is validated, hashed and size-checked while it streams in, so bad
+    or oversized uploads are rejected without being buffered first.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length:
+        try:
+            content_length = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+        if content_length > MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail=f"Upload exceeds {MAX_UPLOAD_BYTES} bytes")
+    return await accept_upload(request.stream(), filename, trace)
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    """Returns the status of a processing job."""
+    job = job_manager.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/jobs/{job_id}/result")
+async def get_job_result(job_id: str, analysis: bool = True):
+    """
+    Returns the full analysis results once a job has finished.
+    Pass ?analysis=false to get only the transcript, speakers and summaries, and page
+    through the sentences with /jobs/{job_id}/sentences.
+    """
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job["status"] == "failed":
+        return {"error": job["error"], "filename": job["filename"]}
+    if job["status"] != "done":
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": job["status"]})
+    if not analysis:
+        return job["result"]
+    return {**job["result"], "analysis": await run_in_threadpool(job["columns"].rows)}
+
+def columns_response(columns, offset, limit, start, end, format):
+    """A page of result rows as JSON columns, or as an npz / Arrow IPC / Parquet payload."""
+    if format != "json" and format not in BINARY_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be json or one of {', '.join(BINARY_FORMATS)}")
+    if format in ("arrow", "parquet") and not arrow_available():
+        raise HTTPException(status_code=400, detail=f"{format} output needs pyarrow, which is not installed")
+    offset = max(0, offset)
+    limit = max(1, min(limit, MAX_PAGE_ROWS))
+    if format == "json":
+        return columns.page(offset, limit, start, end)
+
+    rows, total = columns.select(offset, limit, start, end)
+    headers = {"X-Total-Count": str(total)}
+    if offset + len(rows) < total:
+        headers["X-Next-Offset"] = str(offset + len(rows))
+    return Response(columns.encode(rows, format), media_type=MEDIA_TYPES[format], headers=headers)
+
+@app.get("/jobs/{job_id}/sentences")
+async def get_job_sentences(job_id: str, offset: int = 0, limit: int = 500,
+                            start: float = None, end: float = None, format: str = "json"):
+    """
+    Pages through a finished job's sentences, optionally only those starting between
+    `start` and `end` seconds. format=json returns columns (profanity and speaker as codes
+    into the label lists); npz, arrow and parquet return the same columns in binary.
+    """
+    job = job_manager.get(job_id)
+    if job is not None and job["status"] == "failed":
+        raise HTTPException(status_code=409, detail=job["error"])
+    if job is not None and job["status"] != "done":
+        return JSONResponse(status_code=202, content={"job_id": job_id, "status": job["status"]})
+    columns = await run_in_threadpool(job_manager.columns, job_id)
+    if columns is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return await run_in_threadpool(columns_response, columns, offset, limit, start, end, format)
+
+@app.get("/uploads/{upload_id}/sentences")
+async def get_upload_sentences(upload_id: str, offset: int = 0, limit: int = 500,
+                               start: float = None, end: float = None, format: str = "json"):
+    """Same as /jobs/{job_id}/sentences for an upload's WebSocket analysis run (results so far)."""
+    run = sessions.runs.get(upload_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="No analysis has been started for this upload")
+    columns = await run_in_threadpool(run.columns)
+    return await run_in_threadpool(columns_response, columns, offset, limit, start, end, format)
+
+@app.on_event("startup")
+def warm_models():
+    if WARM_MODELS_ON_STARTUP:
+        registry.warm_in_background()
+
+@app.get("/models")
+async def get_model_status():
+    """Reports which models are loaded and their load times."""
+    return registry.status()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Stage timings, counters and memory usage in Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.on_event("shutdown")
+def shutdown_jobs():
+    job_manager.shutdown()
+    shutdown_analysis_pools()
     
-real_time_graph_data = {
-    "timestamps": [],
-    "sentiment_scores": [],
-    "profanity_flags": []
-}
+def parse_control_message(message):
+    """
+    Control messages are either plain text (e.g. "start_processing") or JSON:
+    {"action": "start", "upload_id": "..."}, {"action": "resume", "upload_id": "...", "from_seq": 120}
+    or {"action": "summary", "upload_id": "...", "buckets": 200, "method": "lttb"}.
+    On /ws, "full_results": true repeats every streamed sentence in the final message.
+    """
+    try:
+        request = json.loads(message)
+        if isinstance(request, dict):
+            return request
+    except ValueError:
+        pass
+    return {"action": "start"}
 
 @app.websocket("/ws-graph")
 async def websocket_graph_endpoint(websocket: WebSocket):
     """
     Handles real-time graph streaming for audio transcription analysis.
+    Sends only new points ("graph_delta" with sequence numbers), so total traffic
+    grows linearly with the recording. Clients resume after a reconnect by sending
+    the last "next_seq" they received.
     """
     await websocket.accept()
     
-    # Reset graph data for new session
-    real_time_graph_data = {
-        "timestamps": [],
-        "sentiment_scores": [],
-        "profanity_flags": []
-    }
-    
     try:
         while True:
             try:
-                # Wait for filename or control message from frontend
-                message = await websocket.receive_text()
+                # Wait for a control message from frontend
+                request = parse_control_message(await websocket.receive_text())
                 
-                file_name = uploaded_files.get("latest", None)
-                if not file_name:
-                    await safe_send(websocket, {"error": "No file uploaded yet."})
+                upload_id = request.get("upload_id") or websocket.query_params.get("upload_id")
+                if not upload_id:
+                    await safe_send(websocket, {"type": "error", "message": "No upload_id given."})
                     continue
 
-                file_path = os.path.join(UPLOAD_FOLDER, file_name)
+                try:
+                    run = sessions.get_run(upload_id)
+                except UnknownUpload as e:
+                    await safe_send(websocket, {"type": "error", "message": str(e)})
+                    continue
 
-                # Validate file exists
-                if not os.path.exists(file_path):
-                    await safe_send(websocket, {"error": f"File not found: {file_path}"})
+                if request.get("action") == "summary":
+                    buckets = int(request.get("buckets", 200))
+                    await safe_send(websocket, run.series.summary(buckets, request.get("method", "lttb")))
                     continue
 
-                # Process audio in real-time
-                speakers, transcript = process_audio(file_path)
-                
-                # Sentence-level analysis
-                sentences = [s.strip() for s in re.split(r'[.!?]', transcript) if s.strip()]
-                
-                for i, sentence in enumerate(sentences):
-                    # Check if connection is still open
-                    if websocket.client_state != WebSocketState.CONNECTED:
+                seq = max(0, int(request.get("from_seq", 0)))
+                while websocket.client_state == WebSocketState.CONNECTED:
+                    await run.wait_beyond(seq)
+
+                    # Everything accumulated since the last send goes out as one delta
+                    if len(run.series) > seq:
+                        delta = run.series.since(seq)
+                        await safe_send(websocket, delta)
+                        seq = delta["next_seq"]
+                    elif run.error:
+                        await safe_send(websocket, {"type": "error", "message": f"Processing failed: {run.error}"})
+                        break
+                    else:
+                        await safe_send(websocket, {"type": "graph_complete", "next_seq": seq})
                         break
-
-                    # Analyze each sentence
-                    sentence_analyses = analyze_transcript(sentence)
-                    
-                    if not sentence_analyses:
-                        continue
-                    
-                    sentence_analysis = sentence_analyses[0]
-                    
-                    # Extract sentiment and profanity data
-                    sentiment_score = sentence_analysis.get('sentiment', {}).get('compound', 0)
-                    is_profane = sentence_analysis.get('profanity', 'Clean') != "Clean"
-                    
-                    # Update real-time graph data
-                    real_time_graph_data["timestamps"].append(i)
-                    real_time_graph_data["sentiment_scores"].append(sentiment_score)
-                    real_time_graph_data["profanity_flags"].append(1 if is_profane else 0)
-                    
-                    # Prepare graph data to send
-                    graph_data = {
-                        "type": "graph_update",
-                        "timestamps": real_time_graph_data["timestamps"],
-                        "sentiment_scores": real_time_graph_data["sentiment_scores"],
-                        "profanity_flags": real_time_graph_data["profanity_flags"]
-                    }
-                    
-                    # Send graph data
-                    await safe_send(websocket, graph_data)
-                    
-                    # Simulate real-time processing
-                    await asyncio.sleep(random.uniform(0.3, 0.7))
-                
-                # Send final graph completion message
-                await safe_send(websocket, {
-                    "type": "graph_complete",
-                    "final_data": real_time_graph_data
-                })
-                
-                # Break the main loop after processing
-                break
                 
+            except WebSocketDisconnect:
+                raise
             except Exception as processing_error:
                 await safe_send(websocket, {
                     "type": "error",
@@ -175,13 +284,19 @@ async def websocket_graph_endpoint(websocket: WebSocket):
         except:
             pass
 
+async def send_json_timed(websocket: WebSocket, data: dict, endpoint="/ws"):
+    """Sends a JSON message and records the send in the ws_send stage metrics."""
+    with metrics.stage("ws_send"):
+        await websocket.send_json(data)
+    metrics.inc("echo_ws_messages_total", endpoint=endpoint)
+
 async def safe_send(websocket: WebSocket, data: dict):
     """
     Safely send data through WebSocket, handling potential connection issues.
     """
     try:
         if websocket.client_state == WebSocketState.CONNECTED:
-            await websocket.send_json(data)
+            await send_json_timed(websocket, data, "/ws-graph")
     except Exception as e:
         print(f"Error sending WebSocket message: {e}")
 
@@ -189,58 +304,51 @@ async def safe_send(websocket: WebSocket, data: dict):
 async def websocket_endpoint(websocket: WebSocket):
     """
     Handles real-time streaming of analysis results.
-    Provides incremental updates as audio is processed.
+    Provides incremental updates as audio is processed. Clients subscribe to an
+    upload ID; every subscriber of the same upload shares one analysis run.
     """
     await websocket.accept()
     try:
         while True:
-            # Wait for filename from frontend
+            # Wait for the upload ID from frontend
             message = await websocket.receive_text()
             print("Received from frontend:", message)
 
-            file_name = uploaded_files.get("latest", None)
-            if not file_name:
-                await websocket.send_json({"error": "No file uploaded yet."})
+            request = parse_control_message(message)
+            upload_id = request.get("upload_id") or websocket.query_params.get("upload_id")
+            if not upload_id:
+                await send_json_timed(websocket, {"error": "No upload_id given."})
                 continue
 
-            file_path = os.path.join(UPLOAD_FOLDER, file_name)
-
-            # Validate file exists
-            if not os.path.exists(file_path):
-                await websocket.send_json({"error": f"File not found: {file_path}"})
+            try:
+                run = sessions.get_run(upload_id)
+            except UnknownUpload as e:
+                await send_json_timed(websocket, {"error": str(e)})
                 continue
 
-            # Step 1: Process audio (transcription + speaker separation)
+            # Step 1: Analysis runs (or is already running) in the background
             try:
-                speakers, transcript = process_audio(file_path)
-                
                 # Send initial metadata
-                await websocket.send_json({
+                await send_json_timed(websocket, {
                     "message": "Audio Processing Started",
-                    "speakers": speakers,
-                    "total_transcript_length": len(transcript)
+                    "upload_id": upload_id,
+                    "speakers": run.speakers or [],
+                    "streaming": not run.done
                 })
 
-                # Step 2: Stream analysis results in real-time
-                # More robust sentence splitting
-                sentences = [s.strip() for s in re.split(r'[.!?]', transcript) if s.strip()]
+                # Step 2: Stream analysis results as each sentence is finalized
                 analysis_results = []
+                keep_results = bool(request.get("full_results"))
 
-                for i, sentence in enumerate(sentences):
-                    try:
-                        # Ensure sentence is not empty
-                        if not sentence:
-                            continue
-
-                        # Analyze each sentence
-                        sentence_analyses = analyze_transcript(sentence)
-                        
-                        # Skip if no analysis results
-                        if not sentence_analyses:
-                            continue
-
-                        sentence_analysis = sentence_analyses[0]
+                i = max(0, int(request.get("from_seq", 0)))
+                while True:
+                    await run.wait_beyond(i)
+                    if i >= len(run.items):
+                        break
 
+                    sentence_analysis = run.items[i]
+                    sentence = sentence_analysis.get('sentence', '')
+                    try:
                         # Robust data preparation with error handling
                         result = {
                             "message": "Streaming Analysis",
@@ -253,37 +361,59 @@ async def websocket_endpoint(websocket: WebSocket):
                                 "compound": sentence_analysis.get('sentiment', {}).get('compound', 0)
                             },
                             "profanity": sentence_analysis.get('profanity', 'Clean'),
+                            "speaker": sentence_analysis.get('speaker'),
+                            "start": sentence_analysis.get('start'),
+                            "end": sentence_analysis.get('end'),
                             "flags": {
                                 "is_negative_sentiment": sentence_analysis.get('sentiment', {}).get('compound', 0) < 0,
                                 "is_profane": sentence_analysis.get('profanity', 'Clean') != "Clean"
                             }
                         }
 
-                        analysis_results.append(result)
-                        await websocket.send_json(result)
-                        
-                        # Simulate real-time processing with some randomness
-                        await asyncio.sleep(random.uniform(0.3, 0.7))
+                        if keep_results:
+                            analysis_results.append(result)
+                        await send_json_timed(websocket, result)
                     
+                    except WebSocketDisconnect:
+                        raise
                     except Exception as sentence_error:
                         print(f"Error processing sentence {i}: {sentence_error}")
-                        await websocket.send_json({
+                        await send_json_timed(websocket, {
                             "message": "Sentence Analysis Error",
                             "sentence_index": i,
                             "error": str(sentence_error),
                             "text": sentence
                         })
-                        continue
+                    i += 1
 
-                # Send final complete analysis
-                await websocket.send_json({
-                    "message": "Analysis Complete",
-                    "full_results": analysis_results
+                if run.error:
+                    raise RuntimeError(run.error)
+
+                # Speakers are only known once diarization has finished
+                await send_json_timed(websocket, {
+                    "message": "Speakers Identified",
+                    "speakers": run.speakers or [],
+                    "speaker_summary": run.speaker_summary or {}
                 })
 
+                # Every sentence was streamed above, so the final message only summarizes them;
+                # clients page through results_url instead of receiving the whole run again
+                columns = await run_in_threadpool(run.columns)
+                complete = {
+                    "message": "Analysis Complete",
+                    "total_sentences": len(columns),
+                    "summary": columns.summary(),
+                    "results_url": f"/uploads/{upload_id}/sentences",
+                }
+                if keep_results:
+                    complete["full_results"] = analysis_results
+                await send_json_timed(websocket, complete)
+
+            except WebSocketDisconnect:
+                raise
             except Exception as processing_error:
                 print(f"Audio processing error: {processing_error}")
-                await websocket.send_json({
+                await send_json_timed(websocket, {
                     "error": f"Processing failed: {str(processing_error)}",
                     "stage": "audio_processing"
                 })
@@ -292,5 +422,7 @@ async def websocket_endpoint(websocket: WebSocket):
     except Exception as connection_error:
         print(f"WebSocket connection error: {connection_error}")
     finally:
-        await websocket.close()
-    
\ No newline at end of file
+        try:
+            await websocket.close()
+        except Exception:
+            pass
@@ -0,0 +1,171 @@
+import time
+import threading
+from audio_processing import (
+    process_audio_segments, stream_speakers, stream_transcribe, WHISPER_MODEL_NAME, WHISPER_FAST_MODEL_NAME,
+    TRANSCRIBE_MODE, VAD_MODE,
+    SEGMENTATION_MODEL_ID, DIARIZATION_MODEL_ID, DIARIZATION_MODE, DIARIZATION_WINDOW_SECONDS,
+    DIARIZATION_OVERLAP_SECONDS, SPEAKER_LINK_THRESHOLD,
+)
+from nlp_analysis import analyze_sentences, backend_choice, profanity_model_files
+from result_cache import ResultCache, file_digest, file_fingerprint
+from alignment import assign_speakers, speaker_summary
+from segmenter import SentenceSegmenter
+from metrics import metrics
+
+result_cache = ResultCache()
+
+
+def model_fingerprint():
+    """Identifies every model that contributes to a cached result."""
+    return {
+        "whisper": WHISPER_MODEL_NAME,
+        "transcription": [TRANSCRIBE_MODE, WHISPER_FAST_MODEL_NAME] if TRANSCRIBE_MODE == "tiered" else TRANSCRIBE_MODE,
+        "vad": VAD_MODE,
+        "segmentation": SEGMENTATION_MODEL_ID,
+        "diarization": DIARIZATION_MODEL_ID,
+        "diarization_windows": [DIARIZATION_MODE, DIARIZATION_WINDOW_SECONDS, DIARIZATION_OVERLAP_SECONDS,
+                                SPEAKER_LINK_THRESHOLD],
+        "profanity_backend": backend_choice(),
+        "files": file_fingerprint(profanity_model_files()),
+    }
+
+
+def cache_key(file_path, digest=None):
+    digest = digest or file_digest(file_path)
+    return result_cache.key_for(digest, model_fingerprint())
+
+
+def lookup_cached(file_path, digest=None):
+    """Returns the cached analysis for a file, or None if it has not been processed."""
+    return _get_cached(cache_key(file_path, digest))
+
+
+def _get_cached(key):
+    with metrics.stage("cache_lookup"):
+        entry = result_cache.get(key)
+    metrics.inc("echo_cache_lookups_total", result="miss" if entry is None else "hit")
+    return entry
+
+
+def analyze_finalized(sentences):
+    """Scores sentences from the segmenter and carries over their times and transcript offsets."""
+    if not sentences:
+        return []
+    analysis = analyze_sentences([sentence["sentence"] for sentence in sentences])
+    # Sentences that failed to score are missing from the analysis; match the rest up in order
+    remaining = iter(sentences)
+    for item in analysis:
+        for sentence in remaining:
+            if sentence["sentence"] == item["sentence"]:
+                item["start"] = sentence["start"]
+                item["end"] = sentence["end"]
+                item["char_start"] = sentence["char_start"]
+                item["char_end"] = sentence["char_end"]
+                break
+    return analysis
+
+
+def finish_entry(speakers, transcript, analysis):
+    """Attributes analyzed sentences to speakers and assembles the result entry."""
+    labels = assign_speakers([(item.get("start"), item.get("end")) for item in analysis], speakers)
+    for item, speaker in zip(analysis, labels):
+        item["speaker"] = speaker
+    return {
+        "speakers": speakers,
+        "transcript": transcript,
+        "analysis": analysis,
+        "speaker_summary": speaker_summary(analysis, speakers),
+    }
+
+
+def build_entry(speakers, segments):
+    """
+    Assembles a result entry from complete Whisper output: the joined transcript,
+    its per-sentence analysis with start/end/speaker, and per-speaker aggregates.
+    """
+    transcript = " ".join(segment["text"].strip() for segment in segments if segment["text"].strip())
+    analysis = analyze_finalized(list(SentenceSegmenter().segment(segments)))
+    return finish_entry(speakers, transcript, analysis)
+
+
+def analyze_audio_file(file_path, digest=None, timings=None):
+    """
+    Returns speakers, transcript and per-sentence analysis for an audio file.
+    Results are cached by file content, so repeated requests skip the models entirely.
+    Pass a dict as timings to receive per-stage seconds (left empty on a cache hit).
+    """
+    key = cache_key(file_path, digest)
+    entry = _get_cached(key)
+    if entry is not None:
+        return entry
+
+    timings = {} if timings is None else timings
+    speakers, segments = process_audio_segments(file_path, timings)
+    start = time.perf_counter()
+    with metrics.stage("analyze"):
+        entry = build_entry(speakers, segments)
+    timings["analyze"] = time.perf_counter() - start
+    # Empty transcripts usually mean a stage failed; let the next request retry
+    if entry["transcript"].strip():
+        result_cache.put(key, entry)
+    return entry
+
+
+class AnalysisStream:
+    """
+    Iterates per-sentence analysis results (with start and end) as soon as each sentence is final.
+    Cached files replay instantly; otherwise Whisper runs window by window while
+    diarization runs alongside, and the finished result is written to the cache.
+    `speakers`, `speaker_summary` and the whole result `entry` are available once iteration has finished.
+    """
+
+    def __init__(self, file_path, digest=None):
+        self.file_path = file_path
+        self.key = cache_key(file_path, digest)
+        self.cached = _get_cached(self.key)
+        self.speakers = self.cached["speakers"] if self.cached else None
+        self.speaker_summary = self.cached.get("speaker_summary") if self.cached else None
+        self.entry = self.cached
+
+    def __iter__(self):
+        if self.cached is not None:
+            yield from self.cached["analysis"]
+            return
+
+        speakers = []
+
+        def diarize():
+            # Long recordings are diarized window by window, so turns arrive while Whisper runs
+            try:
+                for turn in stream_speakers(self.file_path):
+                    speakers.append(turn)
+            except Exception as e:
+                print(f"Error during speaker diarization: {e}")
+
+        diarization = threading.Thread(target=diarize, daemon=True)
+        diarization.start()
+
+        analysis = []
+        texts = []
+        segmenter = SentenceSegmenter()
+        for segment in stream_transcribe(self.file_path):
+            if segment["text"].strip():
+                texts.append(segment["text"].strip())
+            # Sentences come out with their times as soon as the segmenter knows they are complete
+            for item in analyze_finalized(list(segmenter.feed(segment))):
+                analysis.append(item)
+                yield item
+
+        for item in analyze_finalized(list(segmenter.flush())):
+            analysis.append(item)
+            yield item
+
+        diarization.join()
+        self.speakers = speakers
+
+        # Sentences were streamed before diarization finished; attribute them now
+        entry = finish_entry(speakers, " ".join(texts), analysis)
+        self.speaker_summary = entry["speaker_summary"]
+        self.entry = entry
+        if entry["transcript"]:
+            result_cache.put(self.key, entry)
@@ -0,0 +1,324 @@
+"""
+Columnar storage and paged delivery of finished analysis results.
+
+A finished analysis is kept as typed NumPy columns rather than one dict per
+sentence. The columns are:
+- sentence character offsets into the transcript (uint32)
+- start/end seconds and the four VADER scores (float32)
+- profanity codes (uint8)
+- speaker indexes (int16, -1 for none)
+The speaker turns are kept the same way. Rows are served a page or a time
+range at a time, either as JSON columns or as a binary .npz, Arrow IPC or
+Parquet payload. Summary counts are computed on the columns. Arrow and
+Parquet need pyarrow, which is optional; .npz always works.
+"""
+import io
+import json
+import importlib.util
+
+import numpy as np
+
+PROFANITY_LABELS = ("Clean", "Mildly Profane", "Profane")
+PROFANITY_CODES = {label: code for code, label in enumerate(PROFANITY_LABELS)}
+SENTIMENT_KEYS = ("neg", "neu", "pos", "compound")
+# Decimals VADER rounds to; float32 columns are rounded back to these on output
+SENTIMENT_DECIMALS = {"neg": 3, "neu": 3, "pos": 3, "compound": 4}
+
+BINARY_FORMATS = ("npz", "arrow", "parquet")
+MEDIA_TYPES = {
+    "npz": "application/octet-stream",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def arrow_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+class ResultColumns:
+    """One analysis as typed columns; build with from_entry() or from_analysis()."""
+
+    def __init__(self, text, transcript_length, columns, speaker_labels, turns):
+        self.text = text  # the transcript, plus any sentence that could not be found in it
+        self.transcript_length = transcript_length
+        self.columns = columns
+        self.speaker_labels = speaker_labels
+        self.turns = turns
+
+    @classmethod
+    def from_entry(cls, entry):
+        """Builds the columns of a pipeline result entry (transcript, speakers, analysis)."""
+        return cls.from_analysis(entry["analysis"], entry.get("transcript"), entry.get("speakers") or [])
+
+    @classmethod
+    def from_analysis(cls, analysis, transcript=None, speakers=()):
+        transcript = transcript or ""
+        count = len(analysis)
+        parts = [transcript]
+        length = len(transcript)
+        cursor = 0
+
+        speaker_labels = []
+        speaker_index = {}
+
+        def speaker_id(label):
+            if label is None:
+                return -1
+            if label not in speaker_index:
+                speaker_index[label] = len(speaker_labels)
+                speaker_labels.append(label)
+            return speaker_index[label]
+
+        turns = {
+            "start": np.array([turn["start"] for turn in speakers], dtype=np.float32),
+            "end": np.array([turn["end"] for turn in speakers], dtype=np.float32),
+            "speaker": np.array([speaker_id(turn["speaker"]) for turn in speakers], dtype=np.int16),
+        }
+
+        columns = {
+            "char_start": np.empty(count, dtype=np.uint32),
+            "char_end": np.empty(count, dtype=np.uint32),
+            "start": np.empty(count, dtype=np.float32),
+            "end": np.empty(count, dtype=np.float32),
+            **{key: np.empty(count, dtype=np.float32) for key in SENTIMENT_KEYS},
+            "profanity": np.empty(count, dtype=np.uint8),
+            "speaker": np.empty(count, dtype=np.int16),
+        }
+        for i, item in enumerate(analysis):
+            sentence = item["sentence"]
+            # Segmenter offsets point into the joined transcript; older entries are searched in order
+            position = item.get("char_start")
+            if position is None or transcript[position:position + len(sentence)] != sentence:
+                position = transcript.find(sentence, cursor) if sentence else cursor
+            if position < 0:
+                if length:
+                    parts.append(" ")
+                    length += 1
+                position = length
+                parts.append(sentence)
+                length += len(sentence)
+            else:
+                cursor = position + len(sentence)
+
+            columns["char_start"][i] = position
+            columns["char_end"][i] = position + len(sentence)
+            start, end = item.get("start"), item.get("end")
+            columns["start"][i] = np.nan if start is None else start
+            columns["end"][i] = np.nan if end is None else end
+            for key in SENTIMENT_KEYS:
+                columns[key][i] = item["sentiment"][key]
+            columns["profanity"][i] = PROFANITY_CODES[item["profanity"]]
+            columns["speaker"][i] = speaker_id(item.get("speaker"))
+
+        return cls("".join(parts), len(transcript), columns, speaker_labels, turns)
+
+    def __len__(self):
+        return len(self.columns["profanity"])
+
+    @property
+    def transcript(self):
+        return self.text[:self.transcript_length]
+
+    def summary(self):
+        """Sentence counts for the response summary."""
+        return {
+            "total_sentences": len(self),
+            "profane_sentences": int(np.count_nonzero(self.columns["profanity"])),
+            "negative_sentiment_sentences": int(np.count_nonzero(self.columns["compound"] < 0)),
+        }
+
+    def speakers(self):
+        """Speaker turns as dicts, like the pipeline produces them."""
+        return [
+            {"start": start, "end": end, "speaker": self.speaker_labels[index]}
+            for start, end, index in zip(
+                _seconds(self.turns["start"]), _seconds(self.turns["end"]), self.turns["speaker"].tolist()
+            )
+        ]
+
+    def select(self, offset=0, limit=None, start=None, end=None):
+        """Row indexes of a page, optionally only sentences starting in [start, end) seconds."""
+        rows = np.arange(len(self))
+        if start is not None or end is not None:
+            times = self.columns["start"]
+            mask = ~np.isnan(times)
+            if start is not None:
+                mask &= times >= start
+            if end is not None:
+                mask &= times < end
+            rows = rows[mask]
+        stop = None if limit is None else offset + limit
+        return rows[offset:stop], len(rows)
+
+    def sentences(self, rows):
+        starts = self.columns["char_start"][rows].tolist()
+        ends = self.columns["char_end"][rows].tolist()
+        return [self.text[start:end] for start, end in zip(starts, ends)]
+
+    def rows(self, rows=None):
+        """The selected rows (default all) as per-sentence dicts, the shape of pipeline analysis items."""
+        rows = np.arange(len(self)) if rows is None else rows
+        c = self.columns
+        sentiments = zip(*(_rounded(c[key][rows], SENTIMENT_DECIMALS[key]) for key in SENTIMENT_KEYS))
+        return [
+            {
+                "sentence": sentence,
+                "sentiment": dict(zip(SENTIMENT_KEYS, scores)),
+                "profanity": PROFANITY_LABELS[profanity],
+                "start": start,
+                "end": end,
+                "speaker": self.speaker_labels[speaker] if speaker >= 0 else None,
+                "char_start": char_start,
+                "char_end": char_end,
+            }
+            for sentence, scores, profanity, start, end, speaker, char_start, char_end in zip(
+                self.sentences(rows), sentiments, c["profanity"][rows].tolist(),
+                _seconds(c["start"][rows]), _seconds(c["end"][rows]), c["speaker"][rows].tolist(),
+                c["char_start"][rows].tolist(), c["char_end"][rows].tolist(),
+            )
+        ]
+
+    def page(self, offset=0, limit=500, start=None, end=None):
+        """A page of rows as JSON-ready columns; profanity and speaker are codes into the label lists."""
+        rows, total = self.select(offset, limit, start, end)
+        c = self.columns
+        stop = offset + len(rows)
+        return {
+            "offset": offset,
+            "limit": limit,
+            "total": total,
+            "next_offset": stop if stop < total else None,
+            "profanity_labels": list(PROFANITY_LABELS),
+            "speaker_labels": self.speaker_labels,
+            "columns": {
+                "index": rows.tolist(),
+                "sentence": self.sentences(rows),
+                "start": _seconds(c["start"][rows]),
+                "end": _seconds(c["end"][rows]),
+                **{key: _rounded(c[key][rows], SENTIMENT_DECIMALS[key]) for key in SENTIMENT_KEYS},
+                "profanity": c["profanity"][rows].tolist(),
+                "speaker": c["speaker"][rows].tolist(),
+            },
+        }
+
+    def encode(self, rows, fmt):
+        """Binary payload of the selected rows: "npz", "arrow" (IPC stream) or "parquet"."""
+        buffer = io.BytesIO()
+        if fmt == "npz":
+            np.savez(buffer, **self._npz_arrays(rows))
+        elif fmt == "arrow":
+            import pyarrow as pa
+            table = self.to_arrow(rows)
+            with pa.ipc.new_stream(buffer, table.schema) as writer:
+                writer.write_table(table)
+        elif fmt == "parquet":
+            import pyarrow.parquet as pq
+            pq.write_table(self.to_arrow(rows), buffer)
+        else:
+            raise ValueError(f"Unknown format: {fmt}")
+        return buffer.getvalue()
+
+    def _npz_arrays(self, rows):
+        # Sentences travel as one UTF-8 buffer with byte offsets, like an Arrow string column
+        encoded = [sentence.encode("utf-8") for sentence in self.sentences(rows)]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+        np.cumsum([len(sentence) for sentence in encoded], out=offsets[1:])
+        return {
+            "index": rows.astype(np.uint32),
+            "sentence_utf8": np.frombuffer(b"".join(encoded), dtype=np.uint8),
+            "sentence_offsets": offsets,
+            **{name: column[rows] for name, column in self.columns.items()},
+            "profanity_labels": np.array(PROFANITY_LABELS),
+            "speaker_labels": np.array(self.speaker_labels, dtype=str),
+        }
+
+    def to_arrow(self, rows=None):
+        """The selected rows (default all) as a pyarrow Table; profanity and speaker are dictionary columns."""
+        import pyarrow as pa
+        rows = np.arange(len(self)) if rows is None else rows
+        c = self.columns
+        speakers = c["speaker"][rows]
+        table = pa.table({
+            "index": pa.array(rows.astype(np.uint32)),
+            "sentence": pa.array(self.sentences(rows), type=pa.string()),
+            **{name: pa.array(c[name][rows]) for name in ("char_start", "char_end", "start", "end", *SENTIMENT_KEYS)},
+            "profanity": pa.DictionaryArray.from_arrays(
+                pa.array(c["profanity"][rows].astype(np.int8)), pa.array(PROFANITY_LABELS)
+            ),
+            "speaker": pa.DictionaryArray.from_arrays(
+                pa.array(speakers, mask=speakers < 0), pa.array(self.speaker_labels, type=pa.string())
+            ),
+        })
+        return table
+
+    def save(self, path):
+        """Persists the whole result: Parquet for *.parquet (pyarrow), otherwise .npz."""
+        metadata = {
+            "transcript_length": self.transcript_length,
+            "speaker_labels": self.speaker_labels,
+        }
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            table = self.to_arrow()
+            # The transcript and speaker turns do not fit the row layout; they ride along as metadata
+            metadata.update(text=self.text, turns={key: column.tolist() for key, column in self.turns.items()})
+            table = table.replace_schema_metadata({"echo_result": json.dumps(metadata)})
+            pq.write_table(table, path)
+            return path
+        with open(path, "wb") as f:
+            np.savez(
+                f, text=np.array(self.text), metadata=np.array(json.dumps(metadata)),
+                **self.columns, **{f"turn_{key}": column for key, column in self.turns.items()},
+            )
+        return path
+
+    @classmethod
+    def load(cls, path):
+        if path.endswith(".parquet"):
+            import pyarrow.parquet as pq
+            table = pq.read_table(path)
+            metadata = json.loads(table.schema.metadata[b"echo_result"])
+            columns = {
+                name: table.column(name).to_numpy()
+                for name in ("char_start", "char_end", "start", "end", *SENTIMENT_KEYS)
+            }
+            columns["profanity"] = _dictionary_codes(table.column("profanity"), PROFANITY_LABELS, np.uint8)
+            columns["speaker"] = _dictionary_codes(table.column("speaker"), metadata["speaker_labels"], np.int16)
+            turns = {
+                "start": np.array(metadata["turns"]["start"], dtype=np.float32),
+                "end": np.array(metadata["turns"]["end"], dtype=np.float32),
+                "speaker": np.array(metadata["turns"]["speaker"], dtype=np.int16),
+            }
+            return cls(metadata["text"], metadata["transcript_length"], columns, metadata["speaker_labels"], turns)
+
+        with np.load(path) as data:
+            metadata = json.loads(str(data["metadata"]))
+            columns = {name: data[name] for name in data.files if name not in ("text", "metadata")}
+            turns = {name[len("turn_"):]: columns.pop(name) for name in list(columns) if name.startswith("turn_")}
+            return cls(str(data["text"]), metadata["transcript_length"], columns, metadata["speaker_labels"], turns)
+
+
+def _rounded(column, decimals):
+    return np.round(column.astype(np.float64), decimals).tolist()
+
+
+def _seconds(column):
+    # float32 times rounded to the millisecond; missing times (NaN) become None
+    values = np.round(column.astype(np.float64), 3)
+    return [None if value != value else value for value in values.tolist()]
+
+
+def _dictionary_codes(chunked, labels, dtype):
+    """Codes of a dictionary column in terms of `labels`, with nulls as -1."""
+    codes = np.full(len(chunked), -1, dtype=np.int16)
+    position = 0
+    for chunk in chunked.chunks:
+        lookup = np.array([labels.index(value) for value in chunk.dictionary.to_pylist()] or [0], dtype=np.int16)
+        indices = chunk.indices.to_numpy(zero_copy_only=False)
+        valid = ~np.asarray(chunk.is_null())
+        values = np.full(len(chunk), -1, dtype=np.int16)
+        values[valid] = lookup[indices[valid].astype(np.int64)]
+        codes[position:position + len(chunk)] = values
+        position += len(chunk)
+    return codes.astype(dtype)
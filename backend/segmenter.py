@@ -0,0 +1,125 @@
+"""
+Incremental sentence segmentation of Whisper output.
+
+SentenceSegmenter is the single place sentences are split, for uploads,
+batch runs and the WebSocket streams alike. Segments are fed in as Whisper
+produces them. Sentences are emitted once they are final, with character
+offsets into the joined transcript and interpolated start/end times. Only
+the unfinished tail of the text is kept, so memory stays constant on
+unbounded streams.
+"""
+import os
+from collections import deque
+
+from model_registry import registry
+
+# Text without sentence punctuation is force-split once the unfinished tail grows past this
+MAX_PENDING_CHARS = int(os.getenv("ECHO_MAX_PENDING_CHARS", 2000))
+
+
+def _load_punkt():
+    try:
+        from nltk.tokenize import PunktTokenizer  # NLTK >= 3.8.2 ships Punkt as punkt_tab
+        return PunktTokenizer("english")
+    except ImportError:
+        import nltk
+        return nltk.data.load("tokenizers/punkt/english.pickle")
+
+# The same Punkt model sent_tokenize uses, loaded once
+registry.register("punkt", _load_punkt)
+
+
+def time_at(char_pos, span):
+    """Interpolates a timestamp inside a segment from a character position."""
+    char_start, char_end, start, end = span
+    length = max(char_end - char_start, 1)
+    fraction = min(max((char_pos - char_start) / length, 0.0), 1.0)
+    return start + fraction * (end - start)
+
+
+class SentenceSegmenter:
+    """
+    Feed Whisper segments (dicts with start, end, text) and iterate the sentences
+    that became final. Call flush() at the end of the stream for the rest.
+    Each sentence is a dict with sentence, char_start, char_end, start and end.
+    """
+
+    def __init__(self, tokenizer=None, max_pending_chars=MAX_PENDING_CHARS):
+        self.tokenizer = tokenizer
+        self.max_pending_chars = max_pending_chars
+        self.pending = ""
+        self.pending_offset = 0
+        self.length = 0
+        self.spans = deque()
+
+    def feed(self, segment):
+        text = segment["text"].strip()
+        if not text:
+            return
+        if self.length:
+            self.length += 1  # joining space, as in " ".join(texts)
+        self.spans.append((self.length, self.length + len(text), segment["start"], segment["end"]))
+
+        if self.pending:
+            self.pending = f"{self.pending} {text}"
+        else:
+            self.pending = text
+            self.pending_offset = self.length
+        self.length += len(text)
+        yield from self._emit(final=False)
+
+    def flush(self):
+        yield from self._emit(final=True)
+
+    def segment(self, segments):
+        """Segments a complete list of segments."""
+        for segment in segments:
+            yield from self.feed(segment)
+        yield from self.flush()
+
+    def _emit(self, final):
+        if not self.pending:
+            return
+        tokenizer = self.tokenizer or registry.get("punkt")
+        bounds = list(tokenizer.span_tokenize(self.pending))
+
+        # The last sentence may still continue in the next segment
+        if not final and bounds and len(self.pending) - bounds[-1][0] <= self.max_pending_chars:
+            bounds.pop()
+        if not bounds:
+            return
+
+        for char_start, char_end in bounds:
+            yield self._sentence(self.pending_offset + char_start, self.pending_offset + char_end)
+
+        cut = bounds[-1][1]
+        rest = self.pending[cut:]
+        self.pending = rest.lstrip()
+        self.pending_offset += cut + len(rest) - len(self.pending)
+
+        # Segments that ended before the unfinished text are no longer needed for timing
+        while len(self.spans) > 1 and self.spans[0][1] <= self.pending_offset:
+            self.spans.popleft()
+
+    def _sentence(self, char_start, char_end):
+        spans = self.spans
+        first = 0
+        while first < len(spans) - 1 and spans[first][1] <= char_start:
+            first += 1
+        last = first
+        while last < len(spans) - 1 and spans[last][1] < char_end:
+            last += 1
+        return {
+            "sentence": self.pending[char_start - self.pending_offset:char_end - self.pending_offset],
+            "char_start": char_start,
+            "char_end": char_end,
+            "start": time_at(char_start, spans[first]),
+            "end": time_at(char_end, spans[last]),
+        }
+
+
+def split_sentences(text, tokenizer=None):
+    """Splits plain text with the same segmenter; returns the sentence strings."""
+    segmenter = SentenceSegmenter(tokenizer)
+    sentences = segmenter.segment([{"start": 0.0, "end": 0.0, "text": text}])
+    return [sentence["sentence"] for sentence in sentences]
@@ -0,0 +1,85 @@
+import re
+import threading
+from collections import OrderedDict
+
+# Only whitespace is normalized: VADER scores capitals and punctuation ("GREAT!!" vs "great")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sentence(sentence):
+    return _WHITESPACE.sub(" ", sentence).strip()
+
+
+class SentenceCache:
+    """
+    Bounded, thread-safe LRU memo of per-sentence analysis (sentiment scores and
+    profanity label), keyed by normalized sentence text and a model version.
+    Each process keeps its own; max_entries=0 disables it.
+    """
+
+    def __init__(self, max_entries, version=None):
+        self.max_entries = max_entries
+        self.version = version
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _key(self, sentence):
+        return (self.version, normalize_sentence(sentence))
+
+    def get(self, sentence):
+        """Returns (sentiment, profanity) or None."""
+        if self.max_entries <= 0:
+            return None
+        key = self._key(sentence)
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, sentence, sentiment, profanity):
+        if self.max_entries <= 0:
+            return
+        key = self._key(sentence)
+        with self.lock:
+            self.entries[key] = (dict(sentiment), profanity)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def seed(self, analysis):
+        """Adds already scored sentences, e.g. from a finished job's result."""
+        for item in analysis:
+            if "sentence" in item and "sentiment" in item and "profanity" in item:
+                self.put(item["sentence"], item["sentiment"], item["profanity"])
+
+    def set_version(self, version):
+        """Switches model version; entries scored by other versions are dropped."""
+        with self.lock:
+            if version != self.version:
+                self.version = version
+                self.entries.clear()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
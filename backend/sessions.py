@@ -0,0 +1,185 @@
+"""
+Per-upload sessions and shared analysis runs.
+
+Every upload gets its own ID, even when identical audio shares one file on disk. The first WebSocket that
+subscribes to an upload starts one AnalysisRun in the background; every other
+subscriber (graph or text, concurrent or reconnecting) reads the same run, so
+the audio is analyzed once no matter how many clients watch it. The run follows
+the upload's background job, which streams its sentences as they are final, and
+only analyzes in this process when there is no job to follow (or it failed).
+"""
+import os
+import time
+import uuid
+import asyncio
+
+from starlette.concurrency import run_in_threadpool, iterate_in_threadpool
+
+from graph_store import GraphSeries
+from pipeline import AnalysisStream
+from result_columns import ResultColumns
+
+# Uploads remembered at once; the oldest ones (and their results) are dropped beyond this
+MAX_SESSIONS = int(os.getenv("ECHO_MAX_SESSIONS", 64))
+
+
+class UnknownUpload(Exception):
+    """Raised when a client subscribes to an upload ID the server does not know."""
+
+
+class AnalysisRun:
+    """
+    One analysis of one upload. Sentence results and graph points are appended
+    as they arrive; subscribers wait for new ones and read them by position.
+    """
+
+    def __init__(self):
+        self.items = []
+        self.series = GraphSeries()
+        self.speakers = None
+        self.speaker_summary = None
+        self.cached = False
+        self.done = False
+        self.error = None
+        self.changed = asyncio.Condition()
+        self._columns = None
+
+    async def run(self, file_path, digest=None, jobs=None, job_id=None):
+        try:
+            if jobs is None or job_id is None or not await self._follow(jobs, job_id):
+                await self._analyze(file_path, digest)
+        except Exception as e:
+            print(f"Analysis failed for {file_path}: {e}")
+            self.error = str(e)
+        finally:
+            self.done = True
+            async with self.changed:
+                self.changed.notify_all()
+
+    async def _analyze(self, file_path, digest):
+        stream = await run_in_threadpool(AnalysisStream, file_path, digest)
+        self.cached = stream.cached is not None
+        self.speakers = stream.speakers
+
+        async for sentence_analysis in iterate_in_threadpool(stream):
+            await self._add(sentence_analysis)
+
+        self.speakers = stream.speakers
+        self.speaker_summary = stream.speaker_summary
+
+    async def _follow(self, jobs, job_id):
+        """
+        Mirrors the upload's job: its sentences as they arrive, then its final result.
+        Returns False when there is nothing to follow (unknown job, or one that failed
+        before this run saw any of its sentences).
+        """
+        loop = asyncio.get_running_loop()
+        events = asyncio.Queue()
+
+        def deliver(kind, payload):
+            loop.call_soon_threadsafe(events.put_nowait, (kind, payload))
+
+        if not jobs.follow(job_id, deliver):
+            return False
+        while True:
+            kind, payload = await events.get()
+            if kind == "sentence":
+                await self._add(payload)
+            elif payload["status"] == "done":
+                break
+            elif not self.items:
+                return False
+            else:
+                raise RuntimeError(payload["error"])
+
+        # Sentences were streamed before diarization finished; the job's rows carry the speakers,
+        # and any sentence whose message was still in flight is added from them
+        columns = payload["columns"]
+        rows = columns.rows()
+        seen = min(len(self.items), len(rows))
+        self.items[:seen] = rows[:seen]
+        for row in rows[seen:]:
+            await self._add(row)
+        self.speakers = columns.speakers()
+        self.speaker_summary = payload["result"].get("speaker_summary")
+        self._columns = columns
+        return True
+
+    async def _add(self, sentence_analysis):
+        sentiment_score = sentence_analysis.get('sentiment', {}).get('compound', 0)
+        is_profane = sentence_analysis.get('profanity', 'Clean') != "Clean"
+        self.series.append(len(self.items), sentiment_score, is_profane)
+        self.items.append(sentence_analysis)
+        async with self.changed:
+            self.changed.notify_all()
+
+    def columns(self):
+        """The results so far as ResultColumns; built once for a finished run."""
+        if self._columns is not None:
+            return self._columns
+        done = self.done
+        columns = ResultColumns.from_analysis(list(self.items), speakers=self.speakers or [])
+        if done:
+            self._columns = columns
+        return columns
+
+    async def wait_beyond(self, seq):
+        """Waits until there are results after position `seq` or the run has finished."""
+        async with self.changed:
+            await self.changed.wait_for(lambda: len(self.items) > seq or self.done)
+
+
+class SessionManager:
+    """Tracks uploads by ID and the analysis run shared by each upload's subscribers."""
+
+    def __init__(self, upload_folder, max_sessions=MAX_SESSIONS, jobs=None):
+        self.upload_folder = upload_folder
+        self.jobs = jobs
+        self.max_sessions = max_sessions
+        self.uploads = {}
+        self.runs = {}
+
+    def new_upload(self, filename, file_path, digest=None):
+        """Registers an ingested file under a new upload ID."""
+        upload_id = uuid.uuid4().hex
+        self.uploads[upload_id] = {
+            "filename": os.path.basename(filename or "audio"),
+            "path": file_path,
+            "digest": digest,
+            "job_id": None,
+            "created_at": time.time(),
+        }
+        self._evict()
+        return upload_id
+
+    def attach_job(self, upload_id, job_id):
+        """Records the background job analyzing the upload; its subscribers follow that job."""
+        self.get_upload(upload_id)["job_id"] = job_id
+
+    def get_upload(self, upload_id):
+        upload = self.uploads.get(upload_id)
+        if upload is None:
+            raise UnknownUpload(f"Unknown upload ID: {upload_id}")
+        return upload
+
+    def get_run(self, upload_id):
+        """Returns the upload's analysis run, starting it on first subscription."""
+        upload = self.get_upload(upload_id)
+        run = self.runs.get(upload_id)
+        if run is None or run.error:
+            run = AnalysisRun()
+            self.runs[upload_id] = run
+            asyncio.create_task(run.run(upload["path"], upload["digest"], self.jobs, upload["job_id"]))
+        return run
+
+    def _evict(self):
+        # Oldest first; runs still streaming to someone are kept
+        for upload_id in list(self.uploads):
+            if len(self.uploads) <= self.max_sessions:
+                break
+            run = self.runs.get(upload_id)
+            if run is not None and not run.done:
+                continue
+            # Files are content-addressed and may be shared with other uploads, so they stay on disk
+            self.uploads.pop(upload_id)
+            self.runs.pop(upload_id, None)
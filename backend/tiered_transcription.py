@@ -0,0 +1,130 @@
+"""
+Two-tier Whisper transcription: a fast first pass, then targeted re-runs.
+
+Everything is transcribed with the small WHISPER_FAST_MODEL first. Some
+segments are doubtful: Whisper was unsure of them (low average
+log-probability), they may be hallucinated over silence (high no-speech
+probability), or they matter most for the analysis (the profanity or
+negative-sentiment checks fire). Those segments are re-transcribed with the
+large WHISPER_MODEL. Neighbouring doubtful segments share one re-run, and
+the large model's segments replace the fast ones in the merged transcript.
+Enabled with ECHO_TRANSCRIBE_MODE=tiered.
+"""
+import os
+
+import numpy as np
+
+import audio_processing
+from model_registry import registry
+from metrics import metrics
+from nlp_analysis import score_sentences
+
+# Whisper's per-segment confidence; segments below / above these are re-run with the large model
+RETRY_MIN_LOGPROB = float(os.getenv("ECHO_TIER_MIN_LOGPROB", -0.8))
+RETRY_MAX_NO_SPEECH = float(os.getenv("ECHO_TIER_MAX_NO_SPEECH", 0.5))
+# Same cut-off the mild profanity keywords use for "negative"
+RETRY_MAX_COMPOUND = float(os.getenv("ECHO_TIER_MAX_COMPOUND", -0.3))
+# Audio kept either side of a re-run so words cut at a segment edge are heard whole
+RETRY_PADDING_SECONDS = 0.5
+
+
+def _transcribe(name, audio, prompt, stage):
+    """Runs the named Whisper model; returns segments with their confidence, or None on failure."""
+    try:
+        with metrics.stage(stage):
+            result = registry.get(name).transcribe(audio, language="en", initial_prompt=prompt)
+    except Exception as e:
+        print(f"Error during transcription with {name}: {e}")
+        return None
+    return [
+        {
+            "start": segment["start"],
+            "end": segment["end"],
+            "text": segment["text"].strip(),
+            "avg_logprob": segment.get("avg_logprob", 0.0),
+            "no_speech_prob": segment.get("no_speech_prob", 0.0),
+        }
+        for segment in result["segments"]
+        if segment["text"].strip()
+    ]
+
+
+def retry_reasons(segments):
+    """Why each fast-pass segment should be re-transcribed, or None to keep it."""
+    scores = score_sentences([segment["text"] for segment in segments])
+    reasons = []
+    for segment, score in zip(segments, scores):
+        if segment["avg_logprob"] < RETRY_MIN_LOGPROB:
+            reasons.append("low_logprob")
+        elif segment["no_speech_prob"] > RETRY_MAX_NO_SPEECH:
+            reasons.append("no_speech")
+        elif score is not None and score[1] != "Clean":
+            reasons.append("profanity")
+        elif score is not None and score[0]["compound"] < RETRY_MAX_COMPOUND:
+            reasons.append("negative")
+        else:
+            reasons.append(None)
+    return reasons
+
+
+def retry_runs(reasons):
+    """Groups consecutive flagged segments into (first, last) index runs."""
+    runs = []
+    for i, reason in enumerate(reasons):
+        if reason is None:
+            continue
+        if runs and runs[-1][1] == i - 1:
+            runs[-1][1] = i
+        else:
+            runs.append([i, i])
+    return [tuple(run) for run in runs]
+
+
+def tiered_segments(audio, prompt=None):
+    """
+    Transcribes a waveform (or file) with the fast model and re-runs doubtful segments with the large one.
+    Returns dicts with start, end and text, like _whisper_segments.
+    """
+    waveform = audio if isinstance(audio, np.ndarray) else audio_processing.load_waveform(audio)
+    sample_rate = audio_processing.SAMPLE_RATE
+
+    fast = None
+    if "whisper_fast" in registry.loaders and registry.get("whisper_fast") is not None:
+        fast = _transcribe("whisper_fast", waveform, prompt, "transcribe_fast")
+    if fast is None:
+        # Without a working fast model this is a plain large-model transcription
+        fast = _transcribe("whisper", waveform, prompt, "transcribe") or []
+        return [_plain(segment) for segment in fast]
+
+    reasons = retry_reasons(fast) if fast else []
+    merged = []
+    position = 0
+    for first, last in retry_runs(reasons):
+        merged += fast[position:first]
+        position = last + 1
+
+        run_start, run_end = fast[first]["start"], fast[last]["end"]
+        chunk_start = max(0.0, run_start - RETRY_PADDING_SECONDS)
+        chunk_end = run_end + RETRY_PADDING_SECONDS
+        chunk = waveform[int(chunk_start * sample_rate):int(chunk_end * sample_rate)]
+        context = fast[first - 1]["text"] if first > 0 else prompt
+
+        redo = _transcribe("whisper", chunk, context, "transcribe_retry")
+        metrics.inc("echo_tier_retry_seconds_total", round(run_end - run_start, 3))
+        if redo is None:
+            merged += fast[first:last + 1]  # keep the fast text rather than lose the passage
+            continue
+        for segment in redo:
+            start, end = chunk_start + segment["start"], chunk_start + segment["end"]
+            # The padding belongs to the neighbouring segments, which keep their fast-pass text
+            if run_start <= (start + end) / 2 <= run_end:
+                merged.append({**segment, "start": start, "end": end})
+    merged += fast[position:]
+
+    for reason in reasons:
+        metrics.inc("echo_tier_segments_total", outcome=reason or "kept")
+    return [_plain(segment) for segment in merged]
+
+
+def _plain(segment):
+    return {"start": segment["start"], "end": segment["end"], "text": segment["text"]}
@@ -0,0 +1,108 @@
+"""
+Voice activity detection helpers for skipping silence before Whisper.
+
+Speech regions are (start, end) pairs in seconds. They are grouped into
+batches of at most VAD_MAX_BATCH_SECONDS of speech; each batch is transcribed
+as one clip with the silences between its regions cut out, and Whisper's
+timestamps are mapped back to positions in the original recording.
+"""
+import numpy as np
+
+# Energy VAD settings
+FRAME_SECONDS = 0.03
+MIN_SPEECH_SECONDS = 0.25
+MIN_SILENCE_SECONDS = 0.5
+PAD_SECONDS = 0.2
+NOISE_MARGIN_DB = 15.0
+MIN_THRESHOLD_DB = -55.0
+
+
+def energy_speech_regions(waveform, sample_rate, frame_s=FRAME_SECONDS, min_speech_s=MIN_SPEECH_SECONDS,
+                          min_silence_s=MIN_SILENCE_SECONDS, pad_s=PAD_SECONDS):
+    """
+    Finds speech by frame energy. The threshold sits NOISE_MARGIN_DB above the
+    recording's noise floor (its quietest frames), but never below MIN_THRESHOLD_DB.
+    Returns a list of (start, end) seconds.
+    """
+    frame = int(frame_s * sample_rate)
+    n_frames = len(waveform) // frame
+    if n_frames == 0:
+        return []
+
+    frames = np.asarray(waveform[:n_frames * frame], dtype=np.float32).reshape(n_frames, frame)
+    # einsum avoids materializing the squared signal, which matters for memory-mapped hour-long files
+    energy = np.einsum("ij,ij->i", frames, frames) / frame
+    db = 10 * np.log10(energy + 1e-10)
+    threshold = max(np.percentile(db, 10) + NOISE_MARGIN_DB, MIN_THRESHOLD_DB)
+
+    edges = np.diff(np.concatenate([[0], (db > threshold).astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1) * frame_s
+    ends = np.flatnonzero(edges == -1) * frame_s
+
+    duration = len(waveform) / sample_rate
+    regions = merge_close_regions(list(zip(starts.tolist(), ends.tolist())), min_silence_s)
+    return [
+        (max(0.0, start - pad_s), min(duration, end + pad_s))
+        for start, end in regions
+        if end - start >= min_speech_s
+    ]
+
+
+def merge_close_regions(regions, min_gap_s):
+    """Joins regions separated by less than `min_gap_s` seconds (or overlapping after padding)."""
+    merged = []
+    for start, end in sorted(regions):
+        if merged and start - merged[-1][1] < min_gap_s:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def batch_regions(regions, max_batch_s):
+    """Groups consecutive regions into batches holding at most `max_batch_s` seconds of speech."""
+    batches = []
+    current = []
+    current_length = 0.0
+    for start, end in regions:
+        # Regions longer than a batch are split so Whisper never sees more than one window at once
+        while end - start > max_batch_s:
+            if current:
+                batches.append(current)
+                current, current_length = [], 0.0
+            batches.append([(start, start + max_batch_s)])
+            start += max_batch_s
+        if current and current_length + (end - start) > max_batch_s:
+            batches.append(current)
+            current, current_length = [], 0.0
+        current.append((start, end))
+        current_length += end - start
+    if current:
+        batches.append(current)
+    return batches
+
+
+def batch_audio(waveform, batch, sample_rate):
+    """Concatenates the batch's regions into one contiguous float32 clip."""
+    return np.concatenate([
+        np.asarray(waveform[int(start * sample_rate):int(end * sample_rate)], dtype=np.float32)
+        for start, end in batch
+    ])
+
+
+def to_original_time(t, batch, is_start=False):
+    """
+    Maps a time within a concatenated batch clip back to the original recording.
+    A segment start that falls exactly on a cut belongs to the region after it.
+    """
+    elapsed = 0.0
+    for start, end in batch:
+        length = end - start
+        if t < elapsed + length or (t == elapsed + length and not is_start):
+            return start + max(0.0, t - elapsed)
+        elapsed += length
+    return batch[-1][1]
+
+
+def speech_seconds(regions):
+    return sum(end - start for start, end in regions)
@@ -0,0 +1,167 @@
+"""
+Speaker diarization of long recordings in fixed, overlapping windows.
+
+Each window is diarized on its own, so peak memory depends on the window
+length, not the recording length. Speakers found in different windows are
+linked by their pyannote embeddings. Every global speaker keeps a running
+centroid, and each window's speakers are matched to those centroids one to
+one. A speaker without a usable embedding is matched by overlapping speech
+in the region the window shares with the previous one. Turns are kept only
+in each window's own central region, and they are yielded as soon as a
+window finishes.
+"""
+import numpy as np
+
+import audio_processing
+from metrics import metrics
+
+
+class SpeakerLinker:
+    """Maps per-window speaker labels to recording-wide labels by embedding similarity."""
+
+    def __init__(self, threshold):
+        self.threshold = threshold
+        self.centroid_sums = []
+        self.counts = []
+
+    def _new_speaker(self):
+        self.centroid_sums.append(None)
+        self.counts.append(0)
+        return len(self.counts) - 1
+
+    def link(self, local_labels, embeddings, overlap_votes):
+        """
+        Returns {local label: global index}. overlap_votes maps a local label to
+        {global index: seconds of shared speech} from the overlap region.
+        """
+        usable = {}
+        for label, embedding in zip(local_labels, embeddings):
+            if embedding is not None and np.all(np.isfinite(embedding)):
+                usable[label] = embedding / (np.linalg.norm(embedding) or 1.0)
+
+        candidates = []
+        for label, embedding in usable.items():
+            for index, centroid_sum in enumerate(self.centroid_sums):
+                if centroid_sum is not None:
+                    centroid = centroid_sum / (np.linalg.norm(centroid_sum) or 1.0)
+                    candidates.append((float(embedding @ centroid), label, index))
+
+        # Greedy one-to-one matching: two speakers in one window are never the same person
+        mapping = {}
+        taken = set()
+        for similarity, label, index in sorted(candidates, key=lambda candidate: candidate[0], reverse=True):
+            if similarity < self.threshold:
+                break
+            if label not in mapping and index not in taken:
+                mapping[label] = index
+                taken.add(index)
+
+        for label in local_labels:
+            if label in mapping:
+                continue
+            votes = {index: seconds for index, seconds in overlap_votes.get(label, {}).items() if index not in taken}
+            index = max(votes, key=votes.get) if votes else self._new_speaker()
+            mapping[label] = index
+            taken.add(index)
+
+        for label, embedding in usable.items():
+            index = mapping[label]
+            if self.centroid_sums[index] is None:
+                self.centroid_sums[index] = embedding.copy()
+            else:
+                self.centroid_sums[index] += embedding
+            self.counts[index] += 1
+        return mapping
+
+
+def _diarize_window(chunk):
+    """Runs pyannote on one window; returns (turns, labels, embeddings) with window-relative times."""
+    pipeline = audio_processing.get_diarization_pipeline()
+    audio = audio_processing._pyannote_input(chunk)
+    try:
+        annotation, embeddings = pipeline(audio, return_embeddings=True)
+    except TypeError:
+        # Pipelines without embedding output can still be linked by overlap
+        annotation, embeddings = pipeline(audio), None
+
+    labels = list(annotation.labels())
+    turns = [(turn.start, turn.end, speaker) for turn, _, speaker in annotation.itertracks(yield_label=True)]
+    if embeddings is None or len(embeddings) < len(labels):
+        embeddings = [None] * len(labels)
+    return turns, labels, list(embeddings)[:len(labels)]
+
+
+def _overlap_votes(turns, previous_turns, region_start, region_end):
+    """Seconds each (local label, global index) pair speak at the same time in the shared region."""
+    votes = {}
+    for start, end, label in turns:
+        start, end = max(start, region_start), min(end, region_end)
+        if end <= start:
+            continue
+        for previous_start, previous_end, index in previous_turns:
+            shared = min(end, previous_end) - max(start, previous_start)
+            if shared > 0:
+                label_votes = votes.setdefault(label, {})
+                label_votes[index] = label_votes.get(index, 0.0) + shared
+    return votes
+
+
+def stream_diarization(audio, window_s=None, overlap_s=None, threshold=None):
+    """
+    Diarizes audio window by window and yields speaker turns ({start, end, speaker}) in time order.
+    Accepts a file path or a 16 kHz mono waveform. Labels are consistent across the whole recording.
+    """
+    window_s = window_s or audio_processing.DIARIZATION_WINDOW_SECONDS
+    overlap_s = audio_processing.DIARIZATION_OVERLAP_SECONDS if overlap_s is None else overlap_s
+    threshold = audio_processing.SPEAKER_LINK_THRESHOLD if threshold is None else threshold
+    stride_s = window_s - overlap_s
+
+    linker = SpeakerLinker(threshold)
+    previous_turns = []
+    held = None
+
+    windows = audio_processing.iter_audio_windows(audio, window_s, stride_s)
+    current = next(windows, None)
+    while current is not None:
+        upcoming = next(windows, None)
+        offset, chunk = current
+        is_last = upcoming is None
+
+        with metrics.stage("diarize_window"):
+            local_turns, labels, embeddings = _diarize_window(chunk)
+        turns = [(offset + start, offset + end, label) for start, end, label in local_turns]
+
+        votes = _overlap_votes(turns, previous_turns, offset, offset + overlap_s) if offset > 0 else {}
+        mapping = linker.link(labels, embeddings, votes)
+        turns = [(start, end, mapping[label]) for start, end, label in turns]
+
+        # Only the stretch after this window's overlap can be shared with the next one
+        next_offset = offset + stride_s
+        previous_turns = [turn for turn in turns if turn[1] > next_offset]
+
+        lower = offset + overlap_s / 2 if offset > 0 else float("-inf")
+        upper = float("inf") if is_last else next_offset + overlap_s / 2
+        owned = sorted(
+            (max(start, lower), min(end, upper), index)
+            for start, end, index in turns
+            if min(end, upper) > max(start, lower)
+        )
+
+        for start, end, index in owned:
+            # A turn cut at the previous boundary continues here; join the two halves
+            if held is not None and held[2] == index and start <= held[1] + 1e-3:
+                held = (held[0], max(held[1], end), index)
+                continue
+            if held is not None:
+                yield _turn(held)
+            held = (start, end, index)
+
+        current = upcoming
+
+    if held is not None:
+        yield _turn(held)
+
+
+def _turn(turn):
+    start, end, index = turn
+    return {"start": float(start), "end": float(end), "speaker": f"SPEAKER_{index:02d}"}
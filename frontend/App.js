@@ -8,6 +8,7 @@ const App = () => {
   const [uploadProgress, setUploadProgress] = useState(0);
   const [statusType, setStatusType] = useState(''); // 'uploading', 'success', 'error'
   const [isProcessing, setIsProcessing] = useState(false);
+  const [uploadId, setUploadId] = useState(null);
   const fileInputRef = useRef(null);
 
   const handleFileSelect = (event) => {
@@ -27,6 +28,29 @@ const App = () => {
     else return (bytes / 1048576).toFixed(1) + ' MB';
   };
 
+  // Poll the background job until the backend has finished processing
+  const waitForJob = async (jobId) => {
+    while (true) {
+      await new Promise(resolve => setTimeout(resolve, 2000));
+      const { data } = await axios.get(`http://localhost:8000/jobs/${jobId}`);
+
+      if (data.status === 'done') {
+        const result = await axios.get(`http://localhost:8000/jobs/${jobId}/result`);
+        console.log('Analysis result:', result.data);
+        setUploadStatus('Processing complete!');
+        setIsProcessing(false);
+        return;
+      }
+      if (data.status === 'failed') {
+        setUploadStatus(`Processing failed: ${data.error}`);
+        setStatusType('error');
+        setIsProcessing(false);
+        return;
+      }
+      setUploadStatus(data.status === 'queued' ? 'Waiting for a free worker...' : 'Processing audio...');
+    }
+  };
+
   const handleUpload = async () => {
     if (!selectedFile) {
       setUploadStatus('Please select a file first');
@@ -65,6 +89,9 @@ const App = () => {
       setUploadStatus('Upload successful! Processing audio...');
       setStatusType('success');
       console.log('Upload response:', response.data);
+      setUploadId(response.data.upload_id);
+
+      await waitForJob(response.data.job_id);
 
     } catch (error) {
       console.error('Upload error:', error);
@@ -73,7 +100,7 @@ const App = () => {
       // More detailed error handling
       if (error.response) {
         // The request was made and the server responded with a status code
-        setUploadStatus(`Upload failed: ${error.response.data.message || 'Server error'}`);
+        setUploadStatus(`Upload failed: ${error.response.data.detail || error.response.data.message || 'Server error'}`);
       } else if (error.request) {
         // The request was made but no response was received
         setUploadStatus('No response from server. Please check your connection.');
@@ -210,7 +237,7 @@ const App = () => {
         )}
       </div>
       
-      <SentimentAnalysisGraph />
+      <SentimentAnalysisGraph uploadId={uploadId} />
     </div>
   );
 };
@@ -23,7 +23,7 @@ ChartJS.register(
   Legend
 );
 
-const SentimentAnalysisGraph = () => {
+const SentimentAnalysisGraph = ({ uploadId }) => {
   const [graphData, setGraphData] = useState({
     timestamps: [],
     sentimentScores: [],
@@ -31,51 +31,93 @@ const SentimentAnalysisGraph = () => {
   });
   const [isConnected, setIsConnected] = useState(false);
   const websocketRef = useRef(null);
+  // Sequence number of the next point we expect; sent back to resume after a reconnect
+  const nextSeqRef = useRef(0);
+  const isStreamingRef = useRef(false);
+  const reconnectTimerRef = useRef(null);
+  // The upload this graph is subscribed to; a ref so the reconnect handler sees the latest value
+  const uploadIdRef = useRef(uploadId);
+  uploadIdRef.current = uploadId;
 
   useEffect(() => {
-    // Establish WebSocket connection
-    websocketRef.current = new WebSocket('ws://localhost:8000/ws-graph');
+    let unmounted = false;
 
-    websocketRef.current.onopen = () => {
-      console.log('WebSocket connection established');
-      setIsConnected(true);
-    };
+    const connect = () => {
+      // Establish WebSocket connection
+      websocketRef.current = new WebSocket('ws://localhost:8000/ws-graph');
 
-    websocketRef.current.onmessage = (event) => {
-      const data = JSON.parse(event.data);
+      websocketRef.current.onopen = () => {
+        console.log('WebSocket connection established');
+        setIsConnected(true);
 
-      // Handle different types of graph updates
-      switch(data.type) {
-        case 'graph_update':
-          setGraphData(prevData => ({
-            timestamps: data.timestamps,
-            sentimentScores: data.sentiment_scores,
-            profanityFlags: data.profanity_flags
+        // Pick up where we left off if the connection dropped mid-stream
+        if (isStreamingRef.current) {
+          websocketRef.current.send(JSON.stringify({
+            action: 'resume',
+            upload_id: uploadIdRef.current,
+            from_seq: nextSeqRef.current
           }));
-          break;
-        
-        case 'graph_complete':
-          console.log('Graph analysis complete', data.final_data);
-          break;
-        
-        case 'error':
-          console.error('Graph processing error:', data.message);
-          break;
-      }
-    };
+        }
+      };
 
-    websocketRef.current.onerror = (error) => {
-      console.error('WebSocket error:', error);
-      setIsConnected(false);
-    };
+      websocketRef.current.onmessage = (event) => {
+        const data = JSON.parse(event.data);
 
-    websocketRef.current.onclose = () => {
-      console.log('WebSocket connection closed');
-      setIsConnected(false);
+        // Handle different types of graph updates
+        switch(data.type) {
+          case 'graph_delta':
+            // Ignore anything we already have (e.g. a duplicate after resuming)
+            if (data.seq !== nextSeqRef.current) {
+              const skip = nextSeqRef.current - data.seq;
+              if (skip < 0 || skip >= data.timestamps.length) break;
+              data.timestamps = data.timestamps.slice(skip);
+              data.sentiment_scores = data.sentiment_scores.slice(skip);
+              data.profanity_flags = data.profanity_flags.slice(skip);
+            }
+            nextSeqRef.current = data.next_seq;
+            setGraphData(prevData => ({
+              timestamps: prevData.timestamps.concat(data.timestamps),
+              sentimentScores: prevData.sentimentScores.concat(data.sentiment_scores),
+              profanityFlags: prevData.profanityFlags.concat(data.profanity_flags)
+            }));
+            break;
+          
+          case 'graph_complete':
+            isStreamingRef.current = false;
+            console.log('Graph analysis complete', data.next_seq, 'points');
+            break;
+
+          case 'graph_summary':
+            console.log('Graph summary', data);
+            break;
+          
+          case 'error':
+            isStreamingRef.current = false;
+            console.error('Graph processing error:', data.message);
+            break;
+        }
+      };
+
+      websocketRef.current.onerror = (error) => {
+        console.error('WebSocket error:', error);
+        setIsConnected(false);
+      };
+
+      websocketRef.current.onclose = () => {
+        console.log('WebSocket connection closed');
+        setIsConnected(false);
+        if (!unmounted) {
+          reconnectTimerRef.current = setTimeout(connect, 2000);
+        }
+      };
     };
 
+    connect();
+
     // Cleanup on component unmount
     return () => {
+      unmounted = true;
+      clearTimeout(reconnectTimerRef.current);
       if (websocketRef.current) {
         websocketRef.current.close();
       }
@@ -85,7 +127,10 @@ const SentimentAnalysisGraph = () => {
   // Trigger WebSocket to start processing
   const startProcessing = () => {
     if (websocketRef.current && websocketRef.current.readyState === WebSocket.OPEN) {
-      websocketRef.current.send('start_processing');
+      nextSeqRef.current = 0;
+      isStreamingRef.current = true;
+      setGraphData({ timestamps: [], sentimentScores: [], profanityFlags: [] });
+      websocketRef.current.send(JSON.stringify({ action: 'start', upload_id: uploadId }));
     }
   };
 
@@ -214,9 +259,9 @@ const SentimentAnalysisGraph = () => {
       <div className="graph-controls">
         <button 
           onClick={startProcessing}
-          disabled={!isConnected}
+          disabled={!isConnected || !uploadId}
         >
-          {isConnected ? 'Start Processing' : 'Connecting...'}
+          {!isConnected ? 'Connecting...' : uploadId ? 'Start Processing' : 'Upload a file first'}
         </button>
         
         {!isConnected && (